@@ -0,0 +1,186 @@
+"""
+Persistent sidecar cache of file indexes and display parameters.
+
+A cache entry records what ngrid learned about a file: the delimiter, column
+names and types, chosen formatters, column stats, and the byte offset of each
+row.  When the same file is opened again unchanged, the entry lets the model
+skip sniffing and seek directly to any row.
+
+Modules used only to read and write entries are imported as needed, so that
+importing this module doesn't slow startup without a cache.
+"""
+
+#-------------------------------------------------------------------------------
+
+from   __future__ import absolute_import
+
+import os
+
+#-------------------------------------------------------------------------------
+
+# Version of the entry layout; entries from other versions are ignored.
+VERSION = 2
+
+# Number of bytes hashed at each of the head and tail of a file.
+HASH_BYTES = 1 << 20
+
+DEFAULT_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME", os.path.join("~", ".cache")), "ngrid")
+
+# Maximum total size of the cache directory, in bytes.
+DEFAULT_MAX_SIZE = 256 << 20
+
+SUFFIX = ".ngrid-cache"
+
+#-------------------------------------------------------------------------------
+
+def get_key(path):
+    """
+    Returns a key that identifies the current contents of a file.
+
+    The key combines the absolute path, size, modification time, and a hash
+    of the first and last `HASH_BYTES` of the file.
+    """
+    import hashlib
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    digest = hashlib.sha1()
+    with open(path, "rb") as file:
+        digest.update(file.read(HASH_BYTES))
+        if stat.st_size > HASH_BYTES:
+            file.seek(max(HASH_BYTES, stat.st_size - HASH_BYTES))
+            digest.update(file.read(HASH_BYTES))
+    return (VERSION, path, stat.st_size, stat.st_mtime, digest.hexdigest())
+
+
+class SidecarCache:
+    """
+    Directory of cache entries, with size-bounded LRU eviction.
+
+    Each entry is a dict, stored under a name derived from the file's path.
+    Loading an entry marks it as recently used.
+
+    An entry is keyed to the file's contents when it was loaded, so that if
+    the file changes while it's shown, an entry made from it isn't used.
+    """
+
+    def __init__(self, path=DEFAULT_DIR, max_size=DEFAULT_MAX_SIZE):
+        """
+        @param path
+          The cache directory.
+        @param max_size
+          Maximum total size of entries, in bytes.
+        """
+        self.__path = os.path.expanduser(path)
+        self.__max_size = max_size
+        # Keys of files when loaded, by absolute path.
+        self.__keys = {}
+
+
+    @property
+    def path(self):
+        return self.__path
+
+
+    def __get_entry_path(self, path):
+        import hashlib
+        name = hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()
+        return os.path.join(self.__path, name + SUFFIX)
+
+
+    def load(self, path):
+        """
+        Returns the entry for a file, or `None` if missing or out of date.
+        """
+        try:
+            key = get_key(path)
+        except (IOError, OSError):
+            return None
+        self.__keys[os.path.abspath(path)] = key
+
+        entry_path = self.__get_entry_path(path)
+        try:
+            with open(entry_path, "rb") as file:
+                import pickle
+                entry = pickle.load(file)
+        except (IOError, OSError):
+            return None
+        except Exception:
+            # Corrupt or incompatible entry; discard it.
+            self.__remove(entry_path)
+            return None
+
+        if entry.get("key") != key:
+            return None
+
+        # Mark as recently used.
+        try:
+            os.utime(entry_path, None)
+        except OSError:
+            pass
+        return entry
+
+
+    def store(self, path, entry):
+        """
+        Stores the entry for a file, evicting old entries if necessary.
+
+        The entry is keyed to the file as it was when loaded with `load()`,
+        or else as it is now.
+        """
+        entry = dict(entry)
+        key = self.__keys.get(os.path.abspath(path))
+        entry["key"] = get_key(path) if key is None else key
+
+        try:
+            os.makedirs(self.__path)
+        except OSError:
+            if not os.path.isdir(self.__path):
+                raise
+
+        import pickle
+        import tempfile
+        # Write atomically, so concurrent readers never see a partial entry.
+        fd, tmp_path = tempfile.mkstemp(dir=self.__path, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                pickle.dump(entry, file, pickle.HIGHEST_PROTOCOL)
+            os.rename(tmp_path, self.__get_entry_path(path))
+        except:
+            self.__remove(tmp_path)
+            raise
+
+        self.evict()
+
+
+    def evict(self):
+        """
+        Removes least recently used entries until within the size limit.
+        """
+        entries = []
+        for name in os.listdir(self.__path):
+            if name.endswith(SUFFIX):
+                entry_path = os.path.join(self.__path, name)
+                try:
+                    stat = os.stat(entry_path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry_path))
+
+        total = sum( s for _, s, _ in entries )
+        for _, size, entry_path in sorted(entries):
+            if total <= self.__max_size:
+                break
+            self.__remove(entry_path)
+            total -= size
+
+
+    @staticmethod
+    def __remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+
@@ -0,0 +1,102 @@
+"""
+Settings from a configuration file.
+
+The file, `~/.config/ngrid/config`, has INI-style sections of `name = value`
+settings.  Settings in the `[ngrid]` section apply to all inputs.  Each other
+section is a profile named by a filename pattern, such as `[*.psv]`, whose
+settings apply on top to inputs with matching names, in the order of the
+sections.  Lines starting with `#` or `;` are comments.
+
+    [ngrid]
+    max_rows = 1000000
+    jobs = 8
+    max_fps = 30
+
+    [*.psv]
+    delimiter = |
+
+A setting is the long name of a command line option, such as `max_rows`, or a
+display parameter, such as `precision_max`.  Values are strings, interpreted
+by their users; options given on the command line take precedence.
+
+The file is parsed directly, without `configparser`, to keep startup fast.
+"""
+
+#-------------------------------------------------------------------------------
+
+from   __future__ import absolute_import
+
+import fnmatch
+import io
+import os
+
+#-------------------------------------------------------------------------------
+
+DEFAULT_PATH = os.path.join(
+    os.environ.get("XDG_CONFIG_HOME", os.path.join("~", ".config")),
+    "ngrid", "config")
+
+# Name of the section of settings for all inputs.
+MAIN_SECTION = "ngrid"
+
+#-------------------------------------------------------------------------------
+
+def parse_config(lines, path="config"):
+    """
+    Parses the sections of a config file.
+
+    @param lines
+      Lines of the file.
+    @return
+      A list of section name and settings dict pairs, in order.
+    @raise ValueError
+      A line isn't a section, setting, or comment.
+    """
+    sections = []
+    settings = None
+    for i, line in enumerate(lines):
+        line = line.strip()
+        if line == "" or line[0] in "#;":
+            continue
+        if line.startswith("[") and line.endswith("]"):
+            settings = {}
+            sections.append((line[1 : -1].strip(), settings))
+            continue
+        name, sep, value = line.partition("=")
+        if not sep or settings is None:
+            raise ValueError(
+                "{}:{}: expected [section] or name = value: {}"
+                .format(path, i + 1, line))
+        settings[name.strip()] = value.strip()
+    return sections
+
+
+def load_config(filename=None, path=DEFAULT_PATH):
+    """
+    Loads settings for an input from a config file.
+
+    @param filename
+      The input's filename, to apply matching profiles, or `None`.
+    @return
+      A dict of settings, empty if there's no config file.
+    @raise ValueError
+      The config file is malformed.
+    """
+    path = os.path.expanduser(path)
+    if not os.path.exists(path):
+        return {}
+    with io.open(path, encoding="utf-8") as file:
+        sections = parse_config(file, path)
+
+    settings = {}
+    for name, section in sections:
+        if name == MAIN_SECTION:
+            settings.update(section)
+    if filename is not None:
+        basename = os.path.basename(filename)
+        for name, section in sections:
+            if name != MAIN_SECTION and fnmatch.fnmatch(basename, name):
+                settings.update(section)
+    return settings
+
+
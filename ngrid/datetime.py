@@ -9,9 +9,6 @@ from   __future__ import absolute_import
 import datetime
 import re
 
-import pytz
-from   pytz import UTC
-
 from   .util import if_none
 
 #-------------------------------------------------------------------------------
@@ -117,7 +114,7 @@ def ensure_datetime(dt):
 
     Accepts the following:
     - A `datetime` instance.
-    - A `numpy.datetime64` instance.
+    - A `numpy.datetime64` instance, other than NaT.
     - `"now"`, for the current datetime.
     - A "YYYY-MM-DD HH:MM:SS" string, assumed to be UTC.
     - A "YYYY-MM-DDTHH:MM:SSZ" ISO 8601 string.
@@ -125,14 +122,22 @@ def ensure_datetime(dt):
     if isinstance(dt, datetime.datetime):
         return dt
 
+    # Import pytz only when it's needed, to start up faster.
+    from pytz import UTC
+
     # Check for numpy.datetime64.  We just try to convert it like this to avoid
     # importing numpy, if it hasn't been yet.
     try:
-        item = dt.item()
-    except:
+        kind = dt.dtype.kind
+    except AttributeError:
         pass
     else:
-        if isinstance(item, datetime.datetime):
+        if kind == "M":
+            # Convert to microseconds first: `item()` returns an int for
+            # nanosecond precision, and a date for day precision.
+            item = dt.astype("datetime64[us]").item()
+            if item is None:
+                raise TypeError("not a datetime: {!r}".format(dt))
             return item.replace(tzinfo=UTC)
 
     if dt == "now":
@@ -193,8 +198,9 @@ def ensure_tz(tz):
     if isinstance(tz, datetime.tzinfo):
         return tz
 
+    import pytz
     if tz is None:
-        return UTC
+        return pytz.UTC
 
     if isinstance(tz, str):
         try:
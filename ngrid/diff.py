@@ -0,0 +1,617 @@
+"""
+Side-by-side comparison of two tables.
+
+Rows of the two models are aligned by position, or by the values of a key
+column.  Each column that both have is shown twice, left then right, and
+cells whose values differ are highlighted.
+
+Differences are found in chunks of rows, comparing whole column arrays at once.
+Aligning by key, a streaming merge is used while both inputs are sorted by the
+key, holding only the current chunks.  If either is found not to be sorted, the
+comparison starts over with a hash join: the right model's key and compared
+columns are loaded as arrays, and left rows are looked up in chunks.
+"""
+
+#-------------------------------------------------------------------------------
+
+from   __future__ import absolute_import, division
+
+import bisect
+import six
+
+import numpy as np
+
+from   . import formatters, grid
+from   .groupby import get_columns
+
+#-------------------------------------------------------------------------------
+
+# Number of rows of each input to compare at once.
+DIFF_CHUNK = 65536
+
+# Values of the status column.
+SAME        = u""
+CHANGED     = u"~"
+LEFT_ONLY   = u"-"
+RIGHT_ONLY  = u"+"
+
+def _is_numeric(arr):
+    return arr.dtype.kind in "biuf"
+
+
+def compare(left, right, rtol=0, atol=0):
+    """
+    Compares two arrays of values elementwise.
+
+    Numbers are equal if within tolerances, as `numpy.isclose()`; NaNs equal
+    each other, as do NaTs.  Values of different kinds are compared as strings.
+
+    @return
+      A boolean array, true where the values differ.
+    """
+    if _is_numeric(left) and _is_numeric(right):
+        if (rtol == 0 and atol == 0
+            and left.dtype.kind != "f" and right.dtype.kind != "f"):
+            # Exact, without loss of precision for large ints.
+            return left != right
+        return ~np.isclose(
+            left.astype(float), right.astype(float),
+            rtol=rtol, atol=atol, equal_nan=True)
+    elif left.dtype.kind == "M" and right.dtype.kind == "M":
+        return (
+            left.astype("datetime64[ns]").view(np.int64)
+            != right.astype("datetime64[ns]").view(np.int64))
+    elif left.dtype.kind != right.dtype.kind:
+        return left.astype(six.text_type) != right.astype(six.text_type)
+    else:
+        return np.asarray(left != right, dtype=bool)
+
+
+def _keys_equal(left, right):
+    """
+    Compares two arrays of keys elementwise.  NaNs equal each other, as do
+    NaTs, so that rows with missing keys are matched, as `compare()` does for
+    values.
+    """
+    equal = left == right
+    if left.dtype.kind in "fM":
+        equal |= (left != left) & (right != right)
+    return equal
+
+
+def _is_sorted(keys, last):
+    """
+    Returns true if `keys` are in order, and none is less than `last`.
+    """
+    return (
+        bool((keys[1 :] >= keys[: -1]).all())
+        and (last is None or len(keys) == 0 or bool(keys[0] >= last)))
+
+
+class DiffModel:
+    """
+    Data model of the differences between two models.
+
+    The first column shows the status of each row: blank if the same on both
+    sides, "~" if changed, "-" if only on the left, "+" if only on the right.
+    Aligning by key, the key column follows.  Then, for each other column with
+    a name on both sides, the left and right values.  Cells missing on one side
+    are `None`.
+
+    Aligning by key, rows are shown in key order while the inputs are sorted,
+    and otherwise in left order, followed by rows only on the right.  Keys
+    should be unique; each left row is matched to the first right row with the
+    same key, so that further right rows with it appear only on the right.
+    """
+
+    title_lines = []
+
+    def __init__(self, left, right, key=None, rtol=0, atol=0,
+                 changes_only=False):
+        """
+        @param key
+          The name of the key column, or `None` to align rows by position.
+        @param rtol
+          Relative tolerance for comparing numbers.
+        @param atol
+          Absolute tolerance for comparing numbers.
+        @param changes_only
+          If true, omit rows that are the same on both sides.
+        @raise IOError
+          A model doesn't have the key column.
+        """
+        self.__left         = left
+        self.__right        = right
+        self.__rtol         = rtol
+        self.__atol         = atol
+        self.__changes_only = changes_only
+
+        if key is None:
+            self.__key_cols = None
+        else:
+            for model in (left, right):
+                if key not in model.names:
+                    raise IOError(
+                        "no column {} in {}".format(key, model.filename))
+            self.__key_cols = (
+                list(left.names).index(key), list(right.names).index(key))
+        # Pairs of left and right columns to compare, by name.
+        right_names = list(right.names)
+        self.__pairs = [
+            (c, right_names.index(n))
+            for c, n in enumerate(left.names)
+            if n in right_names and n != key
+            ]
+        # Compare keys as strings, unless both are numbers or of one kind.
+        if self.__key_cols is not None:
+            l, r = (
+                get_columns(m, [c], 0, min(m.num_rows, 1))[0]
+                for m, c in zip((left, right), self.__key_cols) )
+            self.__str_keys = not (
+                (_is_numeric(l) and _is_numeric(r))
+                or l.dtype.kind == r.dtype.kind)
+            self.__key_dtype = (
+                six.text_type if self.__str_keys
+                else np.result_type(l.dtype, r.dtype))
+        else:
+            self.__key_dtype = None
+
+        self.names = (
+            (u"",)
+            + (() if key is None else (key,))
+            + tuple(
+                s.format(left.names[c])
+                for c, _ in self.__pairs for s in (u"{} <", u"{} >") )
+            )
+        self.num_cols = len(self.names)
+        self.counts = {CHANGED: 0, LEFT_ONLY: 0, RIGHT_ONLY: 0}
+        self.done = False
+        self.__reset(merge=self.__key_cols is not None)
+        self.ensure_rows(0)
+
+
+    def __reset(self, merge):
+        """
+        Starts the comparison over.
+
+        @param merge
+          True to align by key with a streaming merge; false, by key with a
+          hash join, or by position.
+        """
+        self.__merge = merge
+        # Output rows, as chunks of left row, right row, and changed pairs.
+        self.__starts   = []
+        self.__chunks   = []
+        self.__num_rows = 0
+        for status in self.counts:
+            self.counts[status] = 0
+        # Left and right rows compared so far.
+        self.__pos = [0, 0]
+        # For the merge, keys of rows read but not yet compared, the last key
+        # read, and whether all rows have been read, for each side.
+        empty = np.zeros(0, self.__key_dtype)
+        self.__pending  = [empty, empty]
+        self.__last     = [None, None]
+        self.__ended    = [False, False]
+        # For the hash join, the right keys in order, their rows, the right
+        # values, and which right rows have been matched.
+        self.__index    = None
+
+
+    @property
+    def filename(self):
+        return u"{} vs {}: ~{} -{} +{}".format(
+            self.__left.filename, self.__right.filename,
+            self.counts[CHANGED], self.counts[LEFT_ONLY],
+            self.counts[RIGHT_ONLY])
+
+
+    @property
+    def files(self):
+        """
+        Pairs of path and model of the inputs.
+        """
+        return [ (m.filename, m) for m in (self.__left, self.__right) ]
+
+
+    @property
+    def num_rows(self):
+        return self.__num_rows
+
+
+    @property
+    def memory_size(self):
+        size = sum( a.nbytes for c in self.__chunks for a in c )
+        if self.__index is not None:
+            size += sum( a.nbytes for a in self.__index[: 2] )
+            size += sum( a.nbytes for a in self.__index[2] )
+        return size + sum(
+            getattr(m, "memory_size", 0) or 0
+            for m in (self.__left, self.__right) )
+
+
+    def __load(self, side, stop):
+        """
+        Loads rows of one side, up to `stop`.
+
+        @return
+          The number of rows available, up to `stop`, and whether there will be
+          no more.
+        """
+        model = (self.__left, self.__right)[side]
+        if model.num_rows < stop:
+            model.ensure_rows(stop)
+        num_rows = min(model.num_rows, stop)
+        return num_rows, model.done and model.num_rows <= stop
+
+
+    def __add(self, lrows, rrows, changed):
+        """
+        Adds output rows.
+
+        @param lrows
+          Left row of each, or -1.
+        @param rrows
+          Right row of each, or -1.
+        @param changed
+          Whether each pair of columns differs, by row.
+        """
+        left_only = rrows < 0
+        right_only = lrows < 0
+        changed_rows = changed.any(axis=1) & ~left_only & ~right_only
+        self.counts[LEFT_ONLY] += int(left_only.sum())
+        self.counts[RIGHT_ONLY] += int(right_only.sum())
+        self.counts[CHANGED] += int(changed_rows.sum())
+        if self.__changes_only:
+            keep = left_only | right_only | changed_rows
+            lrows, rrows, changed = lrows[keep], rrows[keep], changed[keep]
+        if len(lrows) > 0:
+            self.__starts.append(self.__num_rows)
+            self.__chunks.append((lrows, rrows, changed))
+            self.__num_rows += len(lrows)
+
+
+    def __compare(self, lstart, lstop, lrows, rstart, rstop, rrows):
+        """
+        Compares pairs of rows.
+
+        @param lrows
+          Left rows to compare, in `[lstart, lstop)`.
+        @param rrows
+          The right rows to compare them with, in `[rstart, rstop)`.
+        @return
+          Whether each pair of columns differs, by row.
+        """
+        lcols = [ l for l, _ in self.__pairs ]
+        rcols = [ r for _, r in self.__pairs ]
+        lvals = get_columns(self.__left, lcols, lstart, lstop)
+        rvals = get_columns(self.__right, rcols, rstart, rstop)
+        return self.__compare_values(
+            len(lrows),
+            [ v[lrows - lstart] for v in lvals ],
+            [ v[rrows - rstart] for v in rvals ])
+
+
+    def __compare_values(self, num_rows, lvals, rvals):
+        changed = np.zeros((num_rows, len(lvals)), bool)
+        for j, (l, r) in enumerate(zip(lvals, rvals)):
+            changed[:, j] = compare(l, r, self.__rtol, self.__atol)
+        return changed
+
+
+    def __step(self):
+        """
+        Compares the next chunk of rows.
+
+        @return
+          True if progress was made.
+        """
+        if self.__key_cols is None:
+            return self.__step_position()
+        elif self.__merge:
+            return self.__step_merge()
+        else:
+            return self.__step_hash()
+
+
+    def __step_position(self):
+        lpos, rpos = self.__pos
+        pos = lpos
+        lnum, lend = self.__load(0, pos + DIFF_CHUNK)
+        rnum, rend = self.__load(1, pos + DIFF_CHUNK)
+        # Past the end of one side, rows are only on the other.
+        stop = min(
+            pos + DIFF_CHUNK if lend else lnum,
+            pos + DIFF_CHUNK if rend else rnum,
+            max(lnum, rnum))
+        if stop <= pos and not (lend and rend):
+            return False
+        rows = np.arange(pos, stop, dtype=np.int64)
+        both = max(min(lnum, rnum, stop), pos)
+        changed = np.zeros((stop - pos, len(self.__pairs)), bool)
+        changed[: both - pos] = self.__compare(
+            pos, both, rows[: both - pos], pos, both, rows[: both - pos])
+        self.__add(
+            np.where(rows < lnum, rows, -1), np.where(rows < rnum, rows, -1),
+            changed)
+        self.__pos = [stop, stop]
+        self.done = lend and rend and stop >= max(lnum, rnum)
+        return True
+
+
+    def __read_keys(self, side, start, stop):
+        model = (self.__left, self.__right)[side]
+        keys, = get_columns(model, [self.__key_cols[side]], start, stop)
+        return keys.astype(six.text_type) if self.__str_keys else keys
+
+
+    def __step_merge(self):
+        pending, last, ended = self.__pending, self.__last, self.__ended
+        # Read another chunk from the side that's behind, or from both.
+        behind = [ s for s in (0, 1) if not ended[s] ]
+        if all( last[s] is not None for s in behind ):
+            lo = min([ last[s] for s in behind ] or [None])
+            behind = [ s for s in behind if not last[s] > lo ]
+        read = 0
+        for side in behind:
+            start = self.__pos[side] + len(pending[side])
+            num, ended[side] = self.__load(side, start + DIFF_CHUNK)
+            keys = self.__read_keys(side, start, num)
+            if not _is_sorted(keys, last[side]):
+                # Start over, with a hash join.
+                self.__reset(merge=False)
+                return True
+            if len(keys) > 0:
+                last[side] = keys[-1]
+                pending[side] = np.concatenate([pending[side], keys])
+                read += len(keys)
+
+        # Compare rows with keys less than the last read from each side that
+        # hasn't ended, as rows with equal keys may follow.
+        if all(ended):
+            lnum, rnum = len(pending[0]), len(pending[1])
+        elif any( last[s] is None for s in (0, 1) if not ended[s] ):
+            # Nothing from a side yet.
+            return read > 0
+        else:
+            bound = min( last[s] for s in (0, 1) if not ended[s] )
+            lnum, rnum = (
+                int(np.searchsorted(p, bound, "left")) for p in pending )
+
+        lstart, rstart = self.__pos
+        lkeys, rkeys = pending[0][: lnum], pending[1][: rnum]
+        lrows, rrows, changed = self.__join(
+            lkeys, lstart, rkeys, rstart + np.arange(rnum, dtype=np.int64),
+            None, rstart)
+        # Show rows in key order.
+        order = np.argsort(
+            np.concatenate([lkeys, rkeys[rrows[lrows < 0] - rstart]]),
+            kind="stable")
+        self.__add(lrows[order], rrows[order], changed[order])
+        self.__pos = [lstart + lnum, rstart + rnum]
+        pending[0], pending[1] = pending[0][lnum :], pending[1][rnum :]
+        self.done = all(ended) and len(pending[0]) == 0 == len(pending[1])
+        return read > 0 or lnum + rnum > 0 or self.done
+
+
+    def __join(self, lkeys, lstart, rkeys, rrows, rvals, rstart):
+        """
+        Matches left rows to right rows by key, and compares them.
+
+        @param lkeys
+          Keys of consecutive left rows from `lstart`.
+        @param rkeys
+          Sorted right keys.
+        @param rrows
+          The right row of each key.
+        @param rvals
+          Values of right columns to compare, by right row, or `None` to get
+          them from the right model for rows from `rstart`.
+        @return
+          Left row, right row, and changed pairs, for the left rows and then
+          for unmatched right rows, in right row order.
+        """
+        pos = np.searchsorted(rkeys, lkeys, "left")
+        found = pos < len(rkeys)
+        found[found] = _keys_equal(rkeys[pos[found]], lkeys[found])
+        lrows = lstart + np.arange(len(lkeys), dtype=np.int64)
+        if len(rkeys) == 0:
+            # All left rows are left-only.
+            matched = np.full(len(lkeys), -1, np.int64)
+        else:
+            matched = np.where(found, rrows[np.where(found, pos, 0)], -1)
+
+        changed = np.zeros((len(lkeys), len(self.__pairs)), bool)
+        if found.any():
+            if rvals is None:
+                changed[found] = self.__compare(
+                    lstart, lstart + len(lkeys), lrows[found],
+                    rstart, int(rrows.max()) + 1, matched[found])
+            else:
+                lvals = get_columns(
+                    self.__left, [ l for l, _ in self.__pairs ],
+                    lstart, lstart + len(lkeys))
+                changed[found] = self.__compare_values(
+                    int(found.sum()),
+                    [ v[found] for v in lvals ],
+                    [ v[matched[found]] for v in rvals ])
+
+        if rvals is None:
+            # Right rows not matched.
+            unmatched = np.ones(len(rkeys), bool)
+            unmatched[pos[found]] = False
+            right_only = np.sort(rrows[unmatched])
+            return (
+                np.concatenate([lrows, np.full(len(right_only), -1, np.int64)]),
+                np.concatenate([matched, right_only]),
+                np.concatenate([
+                    changed,
+                    np.zeros((len(right_only), len(self.__pairs)), bool)]))
+        else:
+            self.__index[3][matched[found]] = True
+            return lrows, matched, changed
+
+
+    def __build_index(self):
+        """
+        Loads the right keys and compared values for the hash join.
+        """
+        right = self.__right
+        right.ensure_rows(six.MAXSIZE)
+        num_rows = right.num_rows
+        keys = self.__read_keys(1, 0, num_rows)
+        rcols = [ r for _, r in self.__pairs ]
+        chunks = [
+            get_columns(right, rcols, s, min(s + DIFF_CHUNK, num_rows))
+            for s in range(0, num_rows, DIFF_CHUNK) ]
+        rvals = [
+            np.concatenate([ c[j] for c in chunks ]) if len(chunks) > 0
+            else np.zeros(0)
+            for j in range(len(rcols)) ]
+        order = np.argsort(keys, kind="stable")
+        self.__index = (
+            keys[order], order.astype(np.int64), rvals,
+            np.zeros(num_rows, bool))
+
+
+    def __step_hash(self):
+        if self.__index is None:
+            self.__build_index()
+        rkeys, rrows, rvals, matched = self.__index
+        start = self.__pos[0]
+        num, end = self.__load(0, start + DIFF_CHUNK)
+        if num > start:
+            lkeys = self.__read_keys(0, start, num)
+            self.__add(*self.__join(lkeys, start, rkeys, rrows, rvals, None))
+            self.__pos[0] = num
+        elif not end:
+            return False
+        if end:
+            # Then rows only on the right.
+            right_only = np.flatnonzero(~matched).astype(np.int64)
+            self.__add(
+                np.full(len(right_only), -1, np.int64), right_only,
+                np.zeros((len(right_only), len(self.__pairs)), bool))
+            self.__pos[1] = len(matched)
+            self.done = True
+        return True
+
+
+    def ensure_rows(self, max_row):
+        while not self.done and self.num_rows <= max_row:
+            if not self.__step():
+                # A live source has no more rows yet.
+                break
+        return min(max_row, self.num_rows)
+
+
+    def __get(self, idx):
+        """
+        Returns the left row, right row, and changed pairs of an output row.
+        """
+        i = bisect.bisect_right(self.__starts, idx) - 1
+        lrows, rrows, changed = self.__chunks[i]
+        j = idx - self.__starts[i]
+        return int(lrows[j]), int(rrows[j]), changed[j]
+
+
+    def get_status(self, idx):
+        """
+        Returns the status of a row.
+        """
+        lrow, rrow, changed = self.__get(idx)
+        return (
+            LEFT_ONLY if rrow < 0
+            else RIGHT_ONLY if lrow < 0
+            else CHANGED if changed.any()
+            else SAME)
+
+
+    def __get_columns(self):
+        """
+        Returns the side and model column of each column after the status.
+        """
+        key = () if self.__key_cols is None else ((None, self.__key_cols),)
+        return key + tuple(
+            (s, c) for p in self.__pairs for s, c in enumerate(p) )
+
+
+    def get_row(self, idx, cols=None):
+        """
+        @param cols
+          Indices of the columns to return, or `None` for all.
+        """
+        lrow, rrow, changed = self.__get(idx)
+        if cols is None:
+            cols = range(self.num_cols)
+        columns = self.__get_columns()
+        sides = [
+            (self.__left, lrow), (self.__right, rrow) ]
+        # Get values from each side's model at once.
+        wanted = ([], [])
+        for c in cols:
+            if c > 0:
+                side, col = columns[c - 1]
+                if side is None:
+                    side = 0 if lrow >= 0 else 1
+                    col = col[side]
+                wanted[side].append(col)
+        values = [
+            dict(zip(w, m.get_row(r, w))) if r >= 0 and len(w) > 0 else {}
+            for w, (m, r) in zip(wanted, sides) ]
+
+        row = []
+        for c in cols:
+            if c == 0:
+                row.append(self.get_status(idx))
+                continue
+            side, col = columns[c - 1]
+            if side is None:
+                side = 0 if lrow >= 0 else 1
+                col = col[side]
+            row.append(values[side].get(col))
+        return row
+
+
+    def get_highlighted(self, idx):
+        """
+        Returns the indices of columns to highlight in a row: the status of a
+        row that differs, and the cells of pairs that differ.
+        """
+        lrow, rrow, changed = self.__get(idx)
+        if lrow >= 0 and rrow >= 0 and not changed.any():
+            return set()
+        offset = 1 if self.__key_cols is None else 2
+        return set([0]) | set(
+            offset + 2 * int(j) + s
+            for j in np.flatnonzero(changed) for s in (0, 1) )
+
+
+    def get_default_formatters(self, cfg={}):
+        # Choose formatters for the rows that differ, rather than the first
+        # rows of each side, if the side's types are known.
+        sides = (self.__left, self.__right)
+        fmts = [ m.get_default_formatters(cfg) for m in sides ]
+        types = [ getattr(m, "types", None) for m in sides ]
+        num_rows = self.ensure_rows(grid.SAMPLELINES)
+        rows = [ self.get_row(i) for i in range(num_rows) ]
+        result = [formatters.StrFormatter(1)]
+        for c, (side, col) in enumerate(self.__get_columns(), 1):
+            if side is None:
+                side, col = 0, col[0]
+            values = [ r[c] for r in rows if r[c] is not None ]
+            if types[side] is None or len(values) == 0:
+                result.append(fmts[side][col])
+            else:
+                result.append(grid.get_default_formatter(
+                    types[side][col], values, cfg))
+        return result
+
+
+    def close(self):
+        for model in (self.__left, self.__right):
+            if hasattr(model, "close"):
+                model.close()
+
+
+
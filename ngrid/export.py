@@ -0,0 +1,231 @@
+"""
+Export of the rows of a model to a file.
+
+Rows are written in chunks, with values of each column converted and
+formatted as arrays, so that a view can export a few chunks at a time between
+keys.  CSV is written directly; Parquet and Feather require `pyarrow`.
+"""
+
+#-------------------------------------------------------------------------------
+
+from   __future__ import absolute_import, division
+
+import io
+import os
+import six
+
+import numpy as np
+
+from   .groupby import get_columns
+
+#-------------------------------------------------------------------------------
+
+# Number of rows to write at once.
+EXPORT_CHUNK = 65536
+
+# Export formats, by filename extension.
+FORMATS = {
+    ".csv"      : "csv",
+    ".feather"  : "feather",
+    ".parquet"  : "parquet",
+    ".pq"       : "parquet",
+    }
+
+def get_format(path):
+    """
+    Returns the export format for a path, by its extension.
+
+    @raise ValueError
+      The extension isn't that of a supported format.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    try:
+        return FORMATS[ext]
+    except KeyError:
+        raise ValueError(
+            "can't export to {}: use {}".format(
+                ext or "no extension", ", ".join(sorted(FORMATS))))
+
+
+def format_csv_column(arr):
+    """
+    Formats values of a column as CSV fields.
+
+    Missing values are empty.  Strings are quoted if they contain a comma,
+    quote, or line break.
+
+    @return
+      A list of strings.
+    """
+    kind = arr.dtype.kind
+    if kind == "f":
+        return np.where(np.isnan(arr), "", arr.astype(six.text_type)).tolist()
+    elif kind in "biu":
+        return arr.astype(six.text_type).tolist()
+    elif kind == "M":
+        strs = np.datetime_as_string(arr)
+        return np.where(np.isnat(arr), "", strs).tolist()
+    if kind == "O":
+        arr = np.array(
+            [ u"" if v is None else six.text_type(v) for v in arr ],
+            dtype=six.text_type)
+    strs = arr.astype(six.text_type)
+    if len(strs) == 0:
+        return []
+    quote = np.zeros(len(strs), dtype=bool)
+    for char in (u",", u'"', u"\n", u"\r"):
+        quote |= np.char.find(strs, char) >= 0
+    if quote.any():
+        strs = strs.astype(object)
+        strs[quote] = [
+            u'"' + s.replace(u'"', u'""') + u'"' for s in strs[quote] ]
+    return strs.tolist()
+
+
+class _CsvWriter:
+
+    def __init__(self, path, names):
+        self.__file = io.open(path, "w", encoding="utf-8", newline="")
+        self.__file.write(
+            u",".join(format_csv_column(np.array(names, dtype=six.text_type)))
+            + u"\n")
+
+
+    def write(self, arrays):
+        fields = [ format_csv_column(a) for a in arrays ]
+        self.__file.write(u"".join(
+            u",".join(r) + u"\n" for r in zip(*fields) ))
+
+
+    def close(self):
+        self.__file.close()
+
+
+
+class _ArrowWriter:
+
+    def __init__(self, path, names, format):
+        try:
+            import pyarrow
+        except ImportError:
+            raise ImportError("{} export requires pyarrow".format(format))
+        self.__pa = pyarrow
+        self.__path = path
+        self.__names = names
+        self.__format = format
+        self.__schema = None
+        self.__writer = None
+
+
+    def write(self, arrays):
+        pa = self.__pa
+        if self.__schema is None:
+            table = pa.Table.from_arrays(
+                [ pa.array(a) for a in arrays ], names=self.__names)
+            self.__schema = table.schema
+            if self.__format == "parquet":
+                import pyarrow.parquet
+                self.__writer = pyarrow.parquet.ParquetWriter(
+                    self.__path, self.__schema)
+            else:
+                import pyarrow.ipc
+                self.__writer = pyarrow.ipc.new_file(self.__path, self.__schema)
+        else:
+            table = pa.Table.from_arrays(
+                [ pa.array(a, type=f.type)
+                  for a, f in zip(arrays, self.__schema) ],
+                schema=self.__schema)
+        self.__writer.write_table(table)
+
+
+    def close(self):
+        if self.__writer is None:
+            # No rows; write the columns, as strings.
+            self.write(
+                [ np.zeros(0, dtype=six.text_type) for _ in self.__names ])
+        self.__writer.close()
+
+
+
+class Exporter:
+    """
+    Writes columns of the rows of a model to a file, a chunk at a time.
+
+    Rows are loaded as needed.  Stops at the end of the model, or, for a live
+    source, at the last row received so far.
+    """
+
+    def __init__(self, model, cols, path, format=None):
+        """
+        @param cols
+          Indices of the columns to write, in order.
+        @param format
+          The export format, or `None` to choose by the path's extension.
+        @raise ValueError
+          The format isn't supported.
+        @raise ImportError
+          The format requires a module that isn't installed.
+        """
+        format = get_format(path) if format is None else format
+        names = [
+            u"" if n is None else six.text_type(n)
+            for n in ( model.names[c] for c in cols ) ]
+        self.__model = model
+        self.__cols = list(cols)
+        self.path = path
+        if format == "csv":
+            self.__writer = _CsvWriter(path, names)
+        elif format in ("parquet", "feather"):
+            self.__writer = _ArrowWriter(path, names, format)
+        else:
+            raise ValueError("unknown export format: {}".format(format))
+        self.num_rows = 0
+        self.done = False
+
+
+    @property
+    def total(self):
+        """
+        The number of rows to write, possibly estimated, or `None` if unknown.
+        """
+        model = self.__model
+        if model.done:
+            return model.num_rows
+        return getattr(model, "estimated_rows", None)
+
+
+    def step(self):
+        """
+        Writes the next chunk of rows, closing the file after the last.
+
+        @return
+          True once all rows have been written.
+        """
+        if self.done:
+            return True
+        model = self.__model
+        start = self.num_rows
+        stop = model.ensure_rows(start + EXPORT_CHUNK)
+        if stop > start:
+            self.__writer.write(get_columns(model, self.__cols, start, stop))
+            self.num_rows = stop
+        if stop < start + EXPORT_CHUNK:
+            self.close()
+        return self.done
+
+
+    def run(self):
+        """
+        Writes all remaining rows.
+        """
+        while not self.step():
+            pass
+
+
+    def close(self):
+        if not self.done:
+            self.__writer.close()
+            self.done = True
+
+
+
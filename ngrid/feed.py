@@ -0,0 +1,343 @@
+"""
+Live input from pipes and sockets, read by an asyncio event loop.
+
+An `InputLoop` reads pipes and connections to a TCP or Unix socket listener
+into `LineFeed`s, which models read as they do a `lines.LineReader`.  The loop
+also watches the keyboard, so that a view can wait for a key or for input with
+a single selector.  The loop runs only while the view waits, or while a model
+waits for a line it needs, so reading never competes with drawing.
+
+Requires Python 3.
+"""
+
+#-------------------------------------------------------------------------------
+
+from   __future__ import absolute_import
+
+import asyncio
+from   collections import deque
+
+#-------------------------------------------------------------------------------
+
+def parse_address(address):
+    """
+    Parses a socket address.
+
+    @param address
+      "HOST:PORT" or ":PORT" for a TCP socket, or the path of a Unix socket.
+    @return
+      A `(host, port)` pair for TCP, or the path.
+    """
+    host, sep, port = address.rpartition(":")
+    if sep and port.isdigit():
+        return host or "localhost", int(port)
+    else:
+        return address
+
+
+class LineFeed:
+    """
+    Lines received asynchronously from one or more sources.
+
+    Has the interface of `lines.LineReader` that models use, but isn't
+    seekable.  Iterating produces the lines received so far; if there are
+    none, runs the event loop until a line arrives or all sources end.
+
+    Lines from each source are kept whole, so that sources may be interleaved
+    line by line.  With `skip_headers`, a source's first line is dropped if it
+    repeats the first line of the first source, as when a writer reconnects
+    and sends its header again.
+    """
+
+    def __init__(self, loop, encoding="utf-8", errors="replace",
+                 skip_headers=False, on_input=None):
+        """
+        @param on_input
+          A function to call when lines arrive or sources end.
+        """
+        self.__loop         = loop
+        self.__encoding     = encoding
+        self.__errors       = errors
+        self.__skip_headers = skip_headers
+        self.__on_input     = on_input
+        self.__lines        = deque()
+        self.__header       = None
+        self.__transports   = set()
+        self.__waiter       = None
+        # Open sources, and whether more may connect.
+        self.__num_open     = 0
+        self.listening      = False
+        self.offset         = 0
+        self.line_offset    = None
+
+
+    name        = None
+    seekable    = False
+    size        = None
+
+
+    @property
+    def encoding(self):
+        return self.__encoding
+
+
+    @property
+    def eof(self):
+        """
+        True if all sources have ended and no more may connect.
+        """
+        return self.__num_open == 0 and not self.listening
+
+
+    @property
+    def pending(self):
+        """
+        The number of lines that can be read without waiting, or `None` once
+        input has ended, after which reading never waits.
+        """
+        return None if self.eof else len(self.__lines)
+
+
+    def __iter__(self):
+        return self
+
+
+    def __next__(self):
+        lines = self.__lines
+        while len(lines) == 0:
+            if self.eof:
+                raise StopIteration
+            self.__waiter = self.__loop.create_future()
+            try:
+                self.__loop.run_until_complete(self.__waiter)
+            finally:
+                self.__waiter = None
+        line = lines.popleft()
+        self.line_offset = self.offset
+        self.offset += len(line) + 1
+        return line.decode(self.__encoding, self.__errors)
+
+
+    next = __next__
+
+
+    def reopen(self):
+        raise IOError("not a seekable file")
+
+
+    def close(self):
+        """
+        Closes all sources.
+        """
+        self.listening = False
+        for transport in list(self.__transports):
+            transport.close()
+
+
+    def _connect(self, transport):
+        self.__num_open += 1
+        self.__transports.add(transport)
+
+
+    def _add(self, lines, first):
+        """
+        Adds lines received from a source.
+
+        @param first
+          True if these are the first lines from the source.
+        """
+        if first and self.__skip_headers:
+            if self.__header is None:
+                self.__header = lines[0]
+            elif lines[0] == self.__header:
+                lines = lines[1 :]
+        self.__lines.extend(lines)
+        self.__notify()
+
+
+    def _disconnect(self, transport):
+        self.__num_open -= 1
+        self.__transports.discard(transport)
+        self.__notify()
+
+
+    def __notify(self):
+        if self.__waiter is not None and not self.__waiter.done():
+            self.__waiter.set_result(None)
+        if self.__on_input is not None:
+            self.__on_input()
+
+
+
+class _LineProtocol(asyncio.Protocol):
+    """
+    Splits data from a pipe or connection into lines for a feed.
+    """
+
+    def __init__(self, feed):
+        self.__feed = feed
+        self.__transport = None
+        # The last line received, if incomplete.
+        self.__partial = b""
+        self.__first = True
+
+
+    def connection_made(self, transport):
+        self.__transport = transport
+        self.__feed._connect(transport)
+
+
+    def data_received(self, data):
+        end = data.rfind(b"\n")
+        if end < 0:
+            self.__partial += data
+            return
+        lines = (self.__partial + data[: end]).split(b"\n")
+        self.__partial = data[end + 1 :]
+        self.__feed._add(lines, self.__first)
+        self.__first = False
+
+
+    def eof_received(self):
+        # Close the transport, as we don't write.
+        return False
+
+
+    def connection_lost(self, exc):
+        if len(self.__partial) > 0:
+            self.__feed._add([self.__partial], self.__first)
+            self.__partial = b""
+        self.__feed._disconnect(self.__transport)
+
+
+
+class InputLoop:
+    """
+    Event loop that reads live input sources and watches the keyboard.
+    """
+
+    def __init__(self, key_fd=None):
+        """
+        @param key_fd
+          The file descriptor from which keys are read, or `None`.
+        """
+        self.loop       = asyncio.new_event_loop()
+        self.__key_fd   = key_fd
+        self.__feeds    = []
+        self.__servers  = []
+        self.__waiter   = None
+        self.__timer    = None
+        self.__deadline = None
+        # Whether input has arrived that a view hasn't handled.
+        self.__arrived  = False
+
+
+    def __make_feed(self, encoding, skip_headers):
+        feed = LineFeed(
+            self.loop, encoding, skip_headers=skip_headers,
+            on_input=self.__on_input)
+        self.__feeds.append(feed)
+        return feed
+
+
+    def open_pipe(self, file, encoding="utf-8"):
+        """
+        Returns a feed of lines read from a pipe.
+
+        @param file
+          A file object open for reading on a pipe, FIFO, or terminal.
+        """
+        feed = self.__make_feed(encoding, False)
+        self.loop.run_until_complete(
+            self.loop.connect_read_pipe(lambda: _LineProtocol(feed), file))
+        return feed
+
+
+    def listen(self, address, encoding="utf-8", skip_headers=False):
+        """
+        Returns a feed of lines received on connections to a socket.
+
+        The feed never ends, as more connections may arrive.
+
+        @param address
+          A socket address, as for `parse_address()`.
+        @param skip_headers
+          If true, drop a connection's first line if it repeats the first
+          line of the first connection.
+        """
+        feed = self.__make_feed(encoding, skip_headers)
+        address = parse_address(address)
+        if isinstance(address, tuple):
+            server = self.loop.create_server(
+                lambda: _LineProtocol(feed), *address)
+        else:
+            server = self.loop.create_unix_server(
+                lambda: _LineProtocol(feed), address)
+        self.__servers.append(self.loop.run_until_complete(server))
+        feed.listening = True
+        return feed
+
+
+    def wait(self, min_delay=0):
+        """
+        Runs the event loop until a key is ready or input arrives.
+
+        @param min_delay
+          Seconds to wait, after input arrives, before returning for it, so
+          that input arriving quickly is handled in batches.  A key ends the
+          wait immediately.
+        @return
+          True if a key is ready, or false if input has arrived.
+        """
+        loop = self.loop
+        self.__waiter = loop.create_future()
+        self.__deadline = loop.time() + min_delay
+        if self.__arrived:
+            self.__schedule()
+        if self.__key_fd is not None:
+            loop.add_reader(self.__key_fd, self.__wake, True)
+        try:
+            key = loop.run_until_complete(self.__waiter)
+        finally:
+            if self.__key_fd is not None:
+                loop.remove_reader(self.__key_fd)
+            if self.__timer is not None:
+                self.__timer.cancel()
+                self.__timer = None
+            self.__waiter = None
+        if not key:
+            self.__arrived = False
+        return key
+
+
+    def close(self):
+        """
+        Closes all sources and the event loop.
+        """
+        for server in self.__servers:
+            server.close()
+        for feed in self.__feeds:
+            feed.close()
+        for server in self.__servers:
+            self.loop.run_until_complete(server.wait_closed())
+        # Let transports finish closing.
+        self.loop.run_until_complete(asyncio.sleep(0))
+        self.loop.close()
+
+
+    def __on_input(self):
+        self.__arrived = True
+        if self.__waiter is not None and self.__timer is None:
+            self.__schedule()
+
+
+    def __schedule(self):
+        self.__timer = self.loop.call_at(self.__deadline, self.__wake, False)
+
+
+    def __wake(self, key):
+        if self.__waiter is not None and not self.__waiter.done():
+            self.__waiter.set_result(key)
+
+
+
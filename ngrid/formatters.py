@@ -9,11 +9,29 @@ from   __future__ import absolute_import
 import datetime
 import math
 import six
+import sys
 
-from   pytz import UTC
+import numpy as np
 
 from   . import text
-from   .datetime import ensure_datetime
+from   .datetime import ensure_datetime, ensure_tz
+
+# The smallest positive normal float, and the largest finite float.
+FLOAT_MIN = sys.float_info.min
+FLOAT_MAX = sys.float_info.max
+
+# Largest magnitude of a float with all integer values exactly representable.
+FLOAT_EXACT_MAX = 2.0 ** 52
+
+# The negative float closest to zero.
+FLOAT_NEG_MIN = -5e-324
+
+def _get_sign_flag(sign):
+    """
+    Returns the `format()` sign option equivalent to a formatter's `sign`.
+    """
+    return "" if sign is None else " " if sign == "-" else "+"
+
 
 #-------------------------------------------------------------------------------
 
@@ -229,6 +247,25 @@ class FloatFormatter:
         self.__multiplier   = None if precision is None else 10 ** precision
         self.__width        = width
 
+        # For the fast path, a `format()` spec that produces the same result
+        # as the general logic in `format()`, for values small enough that
+        # scaling by the precision leaves an exactly representable integer.
+        if point == ".":
+            self.__spec = "{}{}{}{}.{}f".format(
+                _get_sign_flag(sign),
+                "#" if precision == 0 else "",
+                "0" if pad == "0" else "",
+                width,
+                0 if precision is None else precision)
+            self.__fast_max = FLOAT_EXACT_MAX / (self.__multiplier or 1)
+            # Without a sign, negative values, but not negative zero, take the
+            # general path.
+            self.__fast_min = (
+                FLOAT_NEG_MIN if sign is None else -self.__fast_max)
+        else:
+            self.__spec = None
+            self.__fast_min = self.__fast_max = 0
+
 
     @property
     def size(self):
@@ -286,6 +323,20 @@ class FloatFormatter:
         return self.__class__(**args)
 
 
+    def __format_fast(self, value):
+        """
+        Formats a value with the fast path's spec.
+
+        @return
+          The formatted value, or `None` if it takes the general path.
+        """
+        if self.__fast_min < value < self.__fast_max:
+            # Add zero to turn negative zero into zero.
+            result = format(value + 0.0, self.__spec)
+            return result if len(result) <= self.__width else "#" * self.__width
+        return None
+
+
     def format(self, value):
         """
         Formats a value.
@@ -293,6 +344,10 @@ class FloatFormatter:
         @type value
           `float`
         """
+        result = self.__format_fast(value)
+        if result is not None:
+            return result
+
         sign = (
             "" if self.__sign is None
             else "-" if value < 0
@@ -349,7 +404,9 @@ class FloatFormatter:
         """
         Converts a value to a float and formats it.
         """
-        return self.format(float(value))
+        value = float(value)
+        result = self.__format_fast(value)
+        return self.format(value) if result is None else result
 
 
 
@@ -402,6 +459,19 @@ class EFloatFormatter:
         self.__multiplier   = None if precision is None else 10 ** precision
         self.__width        = width
 
+        # For the fast path, a `format()` spec for the mantissa and exponent of
+        # normal values.  Its mantissa is correctly rounded; the general logic
+        # in `format()` agrees, except where its arithmetic carries into a
+        # misrounded mantissa.
+        self.__spec = (
+            "{}{}.{}E".format(
+                _get_sign_flag(sign),
+                "#" if precision == 0 else "",
+                0 if precision is None else precision)
+            if point == "." else None)
+        # Map from exponent part produced by the spec to formatted exponent.
+        self.__exps = {}
+
 
     @property
     def size(self):
@@ -459,6 +529,24 @@ class EFloatFormatter:
         return self.__class__(**args)
 
 
+    def __format_fast(self, value):
+        """
+        Formats a normal value with the fast path's spec.
+
+        @return
+          The formatted value, or `None` if it takes the general path.
+        """
+        if (self.__spec is not None
+            and FLOAT_MIN <= abs(value) <= FLOAT_MAX
+            and (value > 0 or self.__sign is not None)):
+            mantissa, _, exp = format(value, self.__spec).partition("E")
+            try:
+                return mantissa + self.__exps[exp]
+            except KeyError:
+                return self.__format_exp(mantissa, exp)
+        return None
+
+
     def format(self, value):
         """
         Formats a value.
@@ -466,6 +554,10 @@ class EFloatFormatter:
         @type value
           `float`
         """
+        result = self.__format_fast(value)
+        if result is not None:
+            return result
+
         sign = (
             "" if self.__sign is None
             else "-" if value < 0
@@ -518,11 +610,26 @@ class EFloatFormatter:
         return result
 
 
+    def __format_exp(self, mantissa, exp):
+        """
+        Formats the exponent part produced by the fast path spec.
+        """
+        digits = exp[1 :].lstrip("0") or "0"
+        if len(digits) > self.__size:
+            # Doesn't fit.
+            return "#" * self.__width
+        self.__exps[exp] = (
+            self.__exp + exp[0] + "0" * (self.__size - len(digits)) + digits)
+        return mantissa + self.__exps[exp]
+
+
     def __call__(self, value):
         """
         Converts a value to a float and formats it.
         """
-        return self.format(float(value))
+        value = float(value)
+        result = self.__format_fast(value)
+        return self.format(value) if result is None else result
 
 
 
@@ -550,6 +657,9 @@ class StrFormatter:
         self.__pad      = pad
         self.__position = position
         self.__pad_left = pad_left
+        # The last dictionary formatted, and its formatted values.
+        self.__dictionary = None
+        self.__formatted = None
 
 
     @property
@@ -618,6 +728,20 @@ class StrFormatter:
         return self.format(str(value))
 
 
+    def format_codes(self, codes, dictionary):
+        """
+        Formats dictionary-encoded values.
+
+        Formats each value in the dictionary once, and keeps the results while
+        the same dictionary is used, so that formatting looks up codes.
+        """
+        if self.__dictionary is not dictionary:
+            self.__formatted = np.array(
+                [ self(v) for v in dictionary ], dtype=object)
+            self.__dictionary = dictionary
+        return self.__formatted[codes].tolist()
+
+
 
 #-------------------------------------------------------------------------------
 
@@ -625,21 +749,246 @@ DATETIME_FORMATS = {
     "simple"            : "%Y-%m-%d %H:%M:%S",
     "ISO 8601 extended" : "%Y-%m-%dT%H:%M:%SZ",
     "ISO 8601"          : "%Y%m%dT%H%M%SZ",
+    "date"              : "%Y-%m-%d",
+    "time"              : "%H:%M:%S",
+    }
+
+# Specifications to use instead for times not in UTC.
+ZONED_DATETIME_FORMATS = {
+    "ISO 8601 extended" : "%Y-%m-%dT%H:%M:%S%:z",
+    "ISO 8601"          : "%Y%m%dT%H%M%S%z",
     }
 
+# Names of formats, in the order to cycle through them.
+DATETIME_CYCLE = ("ISO 8601 extended", "simple", "ISO 8601", "date", "time")
+
+# Positions of `strftime` fields in a string from `numpy.datetime_as_string()`.
+_ISO_FIELDS = {
+    "Y": (0, 4),
+    "y": (2, 4),
+    "m": (5, 7),
+    "d": (8, 10),
+    "H": (11, 13),
+    "M": (14, 16),
+    "S": (17, 19),
+    }
+
+# Length of a string from `numpy.datetime_as_string()` with nanoseconds.
+_ISO_LENGTH = 29
+
+def _parse_datetime_spec(spec):
+    """
+    Splits a `strftime`-style specification into fields and literal text.
+
+    @return
+      A list of directive characters, such as `"Y"` or `":z"`, and literal
+      strings, in order; or `None` if the spec has any directive besides
+      those in `_ISO_FIELDS`, `%z`, `%:z`, and `%%`.
+    """
+    parts = []
+    literal = ""
+    i = 0
+    while i < len(spec):
+        char = spec[i]
+        if char != "%":
+            literal += char
+            i += 1
+            continue
+        directive = spec[i + 1 : i + 3 if spec[i + 1 : i + 2] == ":" else i + 2]
+        if directive == "%":
+            literal += "%"
+        elif directive in _ISO_FIELDS or directive in ("z", ":z"):
+            if len(literal) > 0:
+                parts.append(literal)
+                literal = ""
+            parts.append(directive)
+        else:
+            return None
+        i += 1 + len(directive)
+    if len(literal) > 0:
+        parts.append(literal)
+    return parts
+
+
+def _format_offset(offset, colon):
+    """
+    Formats a UTC offset in minutes as `+HHMM`, or `+HH:MM`.
+    """
+    hours, minutes = divmod(abs(offset), 60)
+    return "{}{:02d}{}{:02d}".format(
+        "-" if offset < 0 else "+", hours, ":" if colon else "", minutes)
+
+
+def _to_datetime64(value):
+    """
+    Converts a value to a UTC `numpy.datetime64` with nanosecond precision.
+    """
+    if isinstance(value, np.datetime64):
+        return value.astype("datetime64[ns]")
+    if value is None or value != value:
+        return np.datetime64("NaT", "ns")
+    try:
+        # Pandas timestamps, with nanoseconds.
+        return value.to_datetime64().astype("datetime64[ns]")
+    except AttributeError:
+        pass
+    value = ensure_datetime(value)
+    if value.tzinfo is not None:
+        value = value.astimezone(ensure_tz(None)).replace(tzinfo=None)
+    return np.datetime64(value, "ns")
+
+
+_EPOCH = datetime.datetime(1970, 1, 1)
+
+_EPOCH_ORDINAL = _EPOCH.toordinal()
+
+def _to_nanos(value):
+    """
+    Converts a value to UTC nanoseconds since the epoch, or `None` for NaT.
+    """
+    if (isinstance(value, datetime.datetime) 
+        and not hasattr(value, "nanosecond")):
+        # A plain datetime; convert without numpy.
+        if value.tzinfo is not None:
+            value = value.astimezone(ensure_tz(None)).replace(tzinfo=None)
+        delta = value - _EPOCH
+        return (
+            (delta.days * 86400 + delta.seconds) * 10 ** 9 
+            + delta.microseconds * 1000)
+    nanos = int(_to_datetime64(value).view(np.int64))
+    # NaT is the smallest int64.
+    return None if nanos == -2 ** 63 else nanos
+
+
+def _iso_string(nanos):
+    """
+    Formats nanoseconds since the epoch as `numpy.datetime_as_string()` does.
+    """
+    days, nanos = divmod(nanos, 86400 * 10 ** 9)
+    date = datetime.date.fromordinal(_EPOCH_ORDINAL + days)
+    secs, nanos = divmod(nanos, 10 ** 9)
+    hours, secs = divmod(secs, 3600)
+    minutes, secs = divmod(secs, 60)
+    return "{:04d}-{:02d}-{:02d}T{:02d}:{:02d}:{:02d}.{:09d}".format(
+        date.year, date.month, date.day, hours, minutes, secs, nanos)
+
+
+def format_values(formatter, values):
+    """
+    Formats a block of values, with the formatter's `format_array()` if any.
+
+    @rtype
+      `list` of `str`.
+    """
+    try:
+        format_array = formatter.format_array
+    except AttributeError:
+        return [ formatter(v) for v in values ]
+    else:
+        return format_array(values)
+
+
+def format_codes(formatter, codes, dictionary):
+    """
+    Formats a block of dictionary-encoded values, with the formatter's
+    `format_codes()` if any.
+
+    @param codes
+      Integer array of indices into `dictionary`.
+    @rtype
+      `list` of `str`.
+    """
+    try:
+        format_codes = formatter.format_codes
+    except AttributeError:
+        return format_values(formatter, dictionary[codes])
+    else:
+        return format_codes(codes, dictionary)
+
+
 class DatetimeFormatter:
+    """
+    Formats UTC times, converted to a display time zone.
 
-    def __init__(self, spec="ISO 8601 extended"):
+    If the spec uses only numeric fields and UTC offsets, formats fields
+    sliced from ISO 8601 strings, to nanosecond precision; `format_array()`
+    does so for a block of values at once.  Otherwise, formats values one at a
+    time with `strftime`, to microsecond precision.
+    """
+
+    def __init__(self, spec="ISO 8601 extended", nat_str="NaT", precision=None,
+                 tz=None):
         """
         @param spec
           A `strftime`-style format specification or name in `DATETIME_FORMATS`.
+        @param nat_str
+          String to show for missing values.
+        @param precision
+          The number of digits of fractional seconds to show after seconds,
+          up to 9; `None` for none.
+        @param tz
+          The time zone in which to show times, or anything `ensure_tz()`
+          accepts; `None` for UTC.
         """
-        dt = datetime.datetime(2014, 9, 17, 10, 7, 53, 123456, UTC)
-        spec = DATETIME_FORMATS.get(spec, spec)
-        width = len(format(dt, spec))
+        tz = ensure_tz(tz)
+        # Use the offset directly, for time zones with a fixed offset.
+        offset = tz.utcoffset(None)
+        precision = None if precision is None or precision <= 0 \
+                    else min(precision, 9)
+
+        if offset is not None and offset.total_seconds() == 0:
+            fmt = DATETIME_FORMATS.get(spec, spec)
+        else:
+            fmt = ZONED_DATETIME_FORMATS.get(
+                spec, DATETIME_FORMATS.get(spec, spec))
+
+        # Compile the spec to slices of an ISO 8601 string, literal text, and
+        # UTC offsets, represented by whether to include a colon.
+        parts = _parse_datetime_spec(fmt)
+        if parts is not None:
+            parts = [
+                (":" in p) if p in ("z", ":z")
+                else slice(*_ISO_FIELDS[p]) if p in _ISO_FIELDS and (
+                    p != "S" or precision is None)
+                # Seconds, with the point and fractional digits.
+                else slice(17, 20 + precision) if p == "S"
+                else p
+                for p in parts
+                ]
+
+        self.__spec         = spec
+        self.__precision    = precision
+        self.__tz           = tz
+        self.__offset       = (
+            None if offset is None else int(offset.total_seconds()) // 60)
+        # Offsets in minutes, by UTC minute, for other time zones.
+        self.__offsets      = {}
+        self.__fmt          = fmt
+        self.__parts        = parts
+
+        dt = np.datetime64("2014-09-17T10:07:53.123456789", "ns")
+        self.__width        = None
+        self.__width        = len(self.format_array([dt])[0])
+        self.__nat_str      = text.pad(
+            nat_str[: self.__width], self.__width, pad=" ", left=True)
+
+
+    @property
+    def spec(self):
+        """
+        The name of the format, or the format specification.
+        """
+        return self.__spec
+
+
+    @property
+    def precision(self):
+        return self.__precision
+
 
-        self.__spec = spec
-        self.__width = width
+    @property
+    def tz(self):
+        return self.__tz
 
 
     @property
@@ -650,22 +999,150 @@ class DatetimeFormatter:
         return self.__width
 
 
+    def changing(self, **kw_args):
+        args = dict(
+            spec        =self.__spec,
+            nat_str     =self.__nat_str.strip(),
+            precision   =self.__precision,
+            tz          =self.__tz,
+            )
+        args.update(kw_args)
+        return self.__class__(**args)
+
+
+    def __get_offset(self, minute):
+        """
+        Returns the UTC offset in minutes of the display time zone.
+
+        @param minute
+          The UTC time, in minutes since the epoch.
+        """
+        try:
+            return self.__offsets[minute]
+        except KeyError:
+            dt = datetime.datetime(1970, 1, 1, tzinfo=ensure_tz(None)) \
+                 + datetime.timedelta(minutes=minute)
+            offset = dt.astimezone(self.__tz).utcoffset()
+            offset = self.__offsets[minute] = int(offset.total_seconds()) // 60
+            return offset
+
+
+    def __get_offsets(self, values, nat):
+        """
+        Returns UTC offsets in minutes of the display time zone at times.
+
+        @type values
+          `datetime64[ns]` array.
+        @param nat
+          Mask of NaT values, for which the offset is arbitrary.
+        @return
+          An offset, if the time zone has a fixed offset, or an array of them.
+        """
+        if self.__offset is not None:
+            return self.__offset
+
+        # Offsets change at most on minute boundaries.  Look up each minute
+        # once.
+        minutes = values.astype("datetime64[m]").view(np.int64)
+        minutes = np.where(nat, 0, minutes)
+        minutes, inverse = np.unique(minutes, return_inverse=True)
+        offsets = np.array([ self.__get_offset(m) for m in minutes.tolist() ])
+        return offsets[inverse.ravel()]
+
+
+    def format_array(self, values):
+        """
+        Formats a block of values.
+
+        @param values
+          A `datetime64` array, or a sequence of values that `__call__()`
+          accepts.
+        @rtype
+          `list` of `str`.
+        """
+        values = np.asarray(values)
+        if values.dtype.kind != "M":
+            values = np.array(
+                [ _to_datetime64(v) for v in values.ravel() ], 
+                dtype="datetime64[ns]")
+        values = values.astype("datetime64[ns]").ravel()
+        num = len(values)
+        if num == 0:
+            return []
+        nat = np.isnat(values)
+        offsets = self.__get_offsets(values, nat)
+
+        if self.__parts is None:
+            # Format one at a time.
+            tz = self.__tz
+            utc = ensure_tz(None)
+            result = [
+                "" if n else format(utc.localize(v).astimezone(tz), self.__fmt)
+                for v, n in zip(values.astype("datetime64[us]").tolist(), nat)
+                ]
+            result = np.array(result, dtype=six.text_type)
+            if self.__width is not None:
+                result = np.char.ljust(result, self.__width)
+                result = result.astype("U{}".format(self.__width))
+
+        else:
+            # Slice fields out of ISO 8601 strings, as a matrix of characters.
+            local = values + np.asarray(offsets).astype("timedelta64[m]")
+            iso = np.datetime_as_string(local, unit="ns")
+            chars = iso.astype("U{}".format(_ISO_LENGTH)).view("U1")
+            chars = chars.reshape(num, _ISO_LENGTH)
+            cols = []
+            for part in self.__parts:
+                if isinstance(part, slice):
+                    cols.append(chars[:, part])
+                elif isinstance(part, bool):
+                    # Format each distinct offset once.
+                    offs, inverse = np.unique(offsets, return_inverse=True)
+                    offs = [ _format_offset(o, part) for o in offs.tolist() ]
+                    offs = np.array(offs)[np.broadcast_to(inverse.ravel(), num)]
+                    width = len(offs[0])
+                    cols.append(offs.view("U1").reshape(num, width))
+                else:
+                    cols.append(np.broadcast_to(
+                        np.array(list(part)), (num, len(part))))
+            chars = np.ascontiguousarray(np.concatenate(cols, axis=1))
+            result = chars.view("U{}".format(chars.shape[1])).ravel()
+
+        if self.__width is not None:
+            result[nat] = self.__nat_str
+        return result.tolist()
+
+
     def format(self, value):
         """
         Formats a value.
 
         @type value
-          UTC `datetime`.
+          UTC `datetime` or `numpy.datetime64`.
         """
-        result = format(value, self.__spec)
-        return result
+        parts = self.__parts
+        if parts is None:
+            return self.format_array([value])[0]
+        nanos = _to_nanos(value)
+        if nanos is None:
+            return self.__nat_str
+
+        offset = self.__offset
+        if offset is None:
+            offset = self.__get_offset(nanos // (60 * 10 ** 9))
+        iso = _iso_string(nanos + offset * 60 * 10 ** 9)
+        return "".join(
+            iso[p] if isinstance(p, slice) 
+            else _format_offset(offset, p) if isinstance(p, bool)
+            else p
+            for p in parts )
         
 
     def __call__(self, value):
         """
-        Converts a value to a UTC `datetime` and formats it.
+        Converts a value to a UTC time and formats it.
         """
-        return self.format(ensure_datetime(value))
+        return self.format(value)
 
 
 
@@ -8,10 +8,13 @@ Based on ngrid.py by smyang.
 
 from   __future__ import absolute_import, division
 
+import array
+import bisect
 from   contextlib import closing
 import csv
 import curses
 from   datetime import datetime
+import itertools
 import locale
 from   math import floor, ceil, log10, isnan, isinf
 import os
@@ -19,11 +22,16 @@ import re
 import six
 from   six import u
 import sys
+import time
 
 import numpy as np
 
 from   . import text, formatters
+from   .formatters import format_codes, format_values
+from   .rows import Interner, RowStore
+from   .stats import ColumnStats, make_summary
 from   .terminal import get_terminal_size
+from   .timing import FrameTimer
 
 #-------------------------------------------------------------------------------
 
@@ -35,8 +43,49 @@ DELIMS = [',', ' ', '|', '\t']
 
 QUOTE_CHAR = '"'
 
+# Default maximum number of rows to keep in memory.
+MAX_ROWS = 1 << 17
+
+# Default number of rows to read ahead of those shown.
+READ_AHEAD = 200
+
+# Number of rows per chunk when computing column stats.
+STATS_CHUNK = 65536
+
+# Seconds to spend accumulating a column summary before each redraw.
+SUMMARY_SECS = 0.1
+
+# Seconds to spend exporting rows before checking for a key and redrawing.
+EXPORT_SECS = 0.1
+
+# Partial blocks for bars, in eighths.
+BAR_BLOCKS = u" \u258f\u258e\u258d\u258c\u258b\u258a\u2589\u2588"
+
 # Types, ordered from most specific to least specific.
-TYPES = [bool, int, float, str]
+TYPES = [bool, int, float, datetime, str]
+
+# ISO 8601 date or datetime, with optional fractional seconds and UTC offset.
+DATETIME_REGEX = re.compile(
+    r"(\d{4}-\d\d-\d\d(?:[T ]\d\d:\d\d(?::\d\d(?:\.\d{1,9})?)?)?)"
+    r"(Z|[+-]\d\d:?\d\d)?$")
+
+# Words of column names that suggest int values are times since the epoch.
+EPOCH_NAME_WORDS = frozenset(
+    ("time", "timestamp", "date", "datetime", "epoch", "ts"))
+
+# Words of a column name: runs of letters, split at camelCase, or of digits.
+NAME_WORD_REGEX = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+")
+
+# For epoch times, the range of values for each unit, and the multiplier to
+# nanoseconds.  The ranges don't overlap, so the unit is implied by the value.
+EPOCH_UNITS = [
+    (10 ** 8 , 9 * 10 ** 9 , 10 ** 9),       # seconds
+    (10 ** 11, 9 * 10 ** 12, 10 ** 6),       # milliseconds
+    (10 ** 14, 9 * 10 ** 15, 10 ** 3),       # microseconds
+    (10 ** 17, 2 ** 63 - 1 , 1),             # nanoseconds
+    ]
+
+NAT = np.datetime64("NaT", "ns")
 
 HEADER = True
 
@@ -53,6 +102,7 @@ SEPARATORS = [
 DEFAULT_CFG = {
     "ellipsis"          : u("\u2026"),
     "inf_string"        : u("\u221e"),
+    "max_fps"           : u("10"),
     "nan_string"        : u("NaN"),
     "precision_max"     : u("6"),
     "precision_min"     : u("1"),
@@ -64,6 +114,7 @@ DEFAULT_CFG = {
     "show_header"       : u("True"),
     "str_width_max"     : u("32"),
     "str_width_min"     : u("4"),
+    "time_zone"         : u("UTC"),
     }
 
 #-------------------------------------------------------------------------------
@@ -100,31 +151,151 @@ def as_float(value):
     return float(value)
 
 
+def as_datetime(value):
+    """
+    Converts an ISO 8601 string or epoch time to a `datetime64[ns]`.
+
+    A string of digits is an epoch time, in the unit implied by its magnitude
+    per `EPOCH_UNITS`.
+    """
+    if isinstance(value, (datetime, np.datetime64)):
+        return np.datetime64(value, "ns")
+    if value == "":
+        return NAT
+
+    if value.isdigit():
+        value = int(value)
+        for lo, hi, scale in EPOCH_UNITS:
+            if lo <= value <= hi:
+                return np.datetime64(value * scale, "ns")
+        raise ValueError("not an epoch time: {}".format(value))
+
+    match = DATETIME_REGEX.match(value)
+    if match is None:
+        raise ValueError("not a datetime: {}".format(value))
+    dt, tz = match.groups()
+    result = np.datetime64(dt, "ns")
+    if tz is not None and tz != "Z":
+        # Convert to UTC.
+        minutes = int(tz[1 : 3]) * 60 + int(tz[-2 :])
+        result -= np.timedelta64(minutes if tz[0] == "+" else -minutes, "m")
+    return result
+
+
 TYPE_CONVERTERS = {
     bool: as_bool,
     float: as_float,
+    datetime: as_datetime,
     }
     
 
-def guess_type(values):
+def _converts(convert, values):
+    """
+    Returns true if `convert` accepts all values.
+    """
+    try:
+        for value in values:
+            convert(value)
+    except (TypeError, ValueError):
+        return False
+    else:
+        return True
+
+
+def _is_epoch_name(name):
+    """
+    Returns true if a column name suggests times since the epoch: if one of
+    its words, or its plural, is in `EPOCH_NAME_WORDS`.
+    """
+    for word in NAME_WORD_REGEX.findall(name):
+        word = word.lower()
+        if word in EPOCH_NAME_WORDS or (
+                word.endswith("s") and word[: -1] in EPOCH_NAME_WORDS):
+            return True
+    return False
+
+
+def guess_type(values, name=None):
     """
     Returns the most specific type that represents all values.
 
+    @param name
+      The column name, or `None`.  Ints are guessed to be epoch times if the
+      name suggests times, per `_is_epoch_name()`, and all values are in the
+      range of an epoch unit.
     @return
       The type and a convert function.
     """
     for type in TYPES:
         convert = TYPE_CONVERTERS.get(type, type)
-        try:
-            for value in values:
-                convert(value)
-        except (TypeError, ValueError):
-            pass
-        else:
+        if _converts(convert, values):
+            if (type is int and name is not None 
+                and _is_epoch_name(name)
+                and _converts(as_datetime, values)):
+                return datetime, as_datetime
             return type, convert
     raise RuntimeError("can't guess type")
 
 
+def _as_datetime64(strs):
+    """
+    Converts an array of ISO 8601 strings or epoch times to `datetime64[ns]`.
+
+    @raise ValueError
+      Vectorized conversion isn't possible.
+    """
+    missing = strs == ""
+    digits = np.char.isdigit(strs)
+    if (digits | missing).all() and digits.any():
+        # Epoch times.
+        ints = np.where(missing, "0", strs).astype(np.int64)
+        nanos = np.zeros(len(ints), dtype=np.int64)
+        found = missing.copy()
+        for lo, hi, scale in EPOCH_UNITS:
+            sel = (lo <= ints) & (ints <= hi)
+            nanos[sel] = ints[sel] * scale
+            found |= sel
+        if not found.all():
+            raise ValueError("not epoch times")
+        result = nanos.view("datetime64[ns]")
+        result[missing] = NAT
+        return result
+
+    if digits.any():
+        raise ValueError("mixed epoch and ISO 8601 times")
+    # Leave UTC offsets to the scalar conversion.
+    if (np.char.count(strs, "+") + np.char.count(strs, "-", 10) > 0).any():
+        raise ValueError("UTC offsets")
+    return np.char.rstrip(strs, "Z").astype("datetime64[ns]")
+
+
+def as_array(type, values):
+    """
+    Converts a sequence of strings to an array of `type`.
+
+    Uses vectorized conversion where possible, and falls back to converting
+    values one at a time with the type's converter.
+    """
+    strs = np.array(values, dtype=six.text_type)
+    try:
+        if type is float:
+            return np.where(strs == "", "nan", strs).astype(float)
+        elif type is int:
+            return strs.astype(np.int64)
+        elif type is bool:
+            lower = np.char.lower(strs)
+            if ((lower == "true") | (lower == "false")).all():
+                return lower == "true"
+        elif type is datetime:
+            return _as_datetime64(strs)
+        elif type is str:
+            return strs
+    except (TypeError, ValueError, OverflowError):
+        pass
+    convert = TYPE_CONVERTERS.get(type, type)
+    return np.array([ convert(v) for v in values ])
+
+
 def get_size(value):
     """
     Finds the number of digits required to represent the positive integer part.
@@ -185,7 +356,7 @@ def get_default_formatter(type, values, cfg={}):
             inf_str=cfg["inf_string"])
 
     elif type is str:
-        width = np.vectorize(len)(np.vectorize(str)(values)).max()
+        width = np.vectorize(text.width)(np.vectorize(str)(values)).max()
         str_width_min = int(cfg["str_width_min"])
         str_width_max = int(cfg["str_width_max"])
         width = clip(str_width_min, width, str_width_max)
@@ -195,12 +366,38 @@ def get_default_formatter(type, values, cfg={}):
         return formatters.BoolFormatter("TRUE", "FALSE", size=1, pad_left=True)
 
     elif type is datetime:
-        return formatters.DatetimeFormatter("ISO 8601 extended")
+        tz = cfg["time_zone"]
+        values = values.astype("datetime64[ns]")
+        values = values[~np.isnat(values)]
+        if (tz in (None, "UTC") 
+            and (values == values.astype("datetime64[D]")).all()):
+            # All at midnight.
+            return formatters.DatetimeFormatter("date")
+        # Show as many fractional digits as needed, in groups of three.
+        nanos = values.view(np.int64) % 10 ** 9
+        for precision in (0, 3, 6, 9):
+            if (nanos % 10 ** (9 - precision) == 0).all():
+                break
+        return formatters.DatetimeFormatter(
+            "ISO 8601 extended", precision=precision, tz=tz)
 
     else:
         raise NotImplementedError("type: {}".format(type))
         
 
+def format_cells(formatter, values):
+    """
+    Formats a block of cells, as `format_values()`.  A value of `None` is a
+    missing cell, and is shown blank.
+    """
+    if not any( v is None for v in values ):
+        return format_values(formatter, values)
+    strs = iter(format_values(
+        formatter, [ v for v in values if v is not None ]))
+    blank = " " * formatter.width
+    return [ blank if v is None else next(strs) for v in values ]
+
+
 def _make_csv_reader(lines, delimiter, quotechar):
     """
     Creates a unicode-friendly CSV reader.
@@ -257,6 +454,16 @@ def guess_delimiter(lines, delims=None):
 class DelimitedFileModel:
     """
     Data model that reads incrementally from a delimited (e.g. CSV) file.
+
+    If the input provides byte offsets of lines, as `lines.LineReader` does,
+    the model records the offset of each row.  Once the input is fully read,
+    `get_cache_entry()` returns these along with the inferred parameters; when
+    a model is constructed from such an entry, it reads rows directly by
+    offset instead of parsing the whole input.
+
+    Only about `max_rows` rows are kept in memory, in a `rows.RowStore`.
+    Rows of a seekable file are read again by offset when needed; other rows,
+    such as those from a pipe, are spilled to a temporary file.
     """
 
     @staticmethod
@@ -282,13 +489,14 @@ class DelimitedFileModel:
         @type row
           Sequence of `str`.
         @rtype
-          Same as `row`.
+          `list` of `str`.
         """
-        return tuple( v.strip(" \"") for v in row )
+        return [ v.strip(" \"") for v in row ]
 
 
     def __init__(self, lines, has_header, num_sample, delim, comment_prefix, 
-                 filename):
+                 filename, cached=None, parent=None, max_rows=MAX_ROWS,
+                 types=None, read_ahead=READ_AHEAD):
         """
         @type lines
           Iterable of `str`, such as a file object.
@@ -296,73 +504,276 @@ class DelimitedFileModel:
           True to read a column header.
         @param num_sample
           Number of sample lines to read.
+        @param cached
+          A cache entry from `get_cache_entry()` for the same, unchanged
+          input, or `None`.
+        @param parent
+          A model of the whole input, if `lines` are from the middle of it.
+          Column names and types are taken from the parent.
+        @param max_rows
+          The maximum number of rows to keep in memory, or `None` for no
+          limit.
+        @param types
+          Column types to use instead of guessing them, or `None`.
+        @param read_ahead
+          Number of rows to read beyond those requested.
         """
         num_sample = max(num_sample, 2)
+        if parent is not None:
+            has_header = False
+            delim = parent.delimiter
+
+        options = (has_header, comment_prefix, delim)
+        if cached is not None and cached.get("options") != options:
+            # The entry was made with different parsing options.
+            cached = None
+
+        self.__source = lines
+        self.__num_sample = num_sample
+        self.__parent = parent
+        self.__comment_prefix = comment_prefix
+        self.__options = options
+        self.__max_rows = max_rows
+        self.__read_ahead = read_ahead
+        # Byte offsets of rows, if the input provides offsets of lines and
+        # can seek to them.
+        self.__offsets = (
+            array.array("q") 
+            if hasattr(lines, "line_offset") and lines.seekable else None)
 
         # Clean up the incoming lines.
-        lines = ( self.clean_line(l) for l in lines )
-
-        self.__lines = lines
-        self.__comment_prefix = comment_prefix
+        self.__lines = self.__read_lines(lines)
 
         sample_lines, title_comments = self.__read_sample_lines(num_sample)
-        self.title_lines = title_comments
+        # Comments in the middle of the input aren't titles.
+        self.title_lines = title_comments if parent is None else []
         if len(sample_lines) == 0:
             raise EOFError("no data") 
 
-        if delim is None:
-            delim = guess_delimiter(sample_lines)
+        if cached is not None:
+            delim = cached["delimiter"]
+        elif delim is None:
+            delim = guess_delimiter([ l for _, l in sample_lines ])
 
-        # Now that we have a delimiter, sanitize the sample rows.
-        sample_rows = _make_csv_reader(
-            sample_lines, delimiter=delim, quotechar=QUOTE_CHAR)
-        self.__rows = [ self.clean_row(r) for r in sample_rows ]
+        # Now that we have a delimiter, sanitize the sample rows.  Until we know
+        # the types, don't intern any columns.
+        self.__intern = Interner([])
+        rows = list(self.__parse(sample_lines, delim, self.__offsets))
 
         # Set up to read additional rows.
-        more_lines = ( l for l in lines if not self.__is_comment(l) )
-        more_rows = _make_csv_reader(
-            more_lines, delimiter=delim, quotechar=QUOTE_CHAR)
-        self.__more_rows = ( self.clean_row(r) for r in more_rows )
+        self.__more_rows = self.__parse(
+            self.__skip_comments(self.__lines), delim, self.__offsets)
 
         self.delimiter = delim
         self.done = False
         self.filename = filename
-
-        if has_header:
-            self.names = tuple(self.__rows[0])
+        # The index in the whole input of the first row, and whether it's
+        # exact, for a model of part of the input.
+        self.__base_row = 0
+        self.__base_exact = parent is None
+        # Estimates of rows in the input, and its background indexer, for
+        # reading from the middle.
+        self.__density = None
+        self.__indexer = None
+
+        if parent is not None:
+            self.names = parent.names
+            self.num_cols = parent.num_cols
+        elif has_header:
+            self.names = tuple(rows[0])
             self.num_cols = len(self.names)
-            self.__rows = self.__rows[1 :]
+            rows = rows[1 :]
+            if self.__offsets is not None:
+                del self.__offsets[0]
         else:
-            self.num_cols = len(self.__rows[0])
+            self.num_cols = len(rows[0])
             self.names = tuple( 
                 "col{}".format(i + 1) for i in range(self.num_cols) )
 
-        # Transpose the sample lines into columns.
-        cols = tuple(zip(*self.__rows))
-        # Guess the types for each.
-        self.types, self.converts = zip(*[ guess_type(c) for c in cols ])
+        if cached is not None:
+            self.types = cached["types"]
+            self.converts = tuple( 
+                TYPE_CONVERTERS.get(t, t) for t in self.types )
+            self.__formatters = cached["formatters"]
+            # Use the cached index to read rows by offset.
+            self.__index = cached["offsets"]
+            self.__reader = lines.reopen()
+            self.__rows = RowStore(
+                max_rows, self.__read_rows, num_rows=len(self.__index))
+            self.done = True
+        elif parent is not None:
+            self.types = parent.types
+            self.converts = parent.converts
+            self.__formatters = None
+            self.__index = None
+        elif types is not None:
+            self.types = tuple(types)
+            self.converts = tuple( 
+                TYPE_CONVERTERS.get(t, t) for t in self.types )
+            self.__formatters = None
+            self.__index = None
+        else:
+            # Transpose the sample lines into columns.
+            cols = tuple(zip(*rows))
+            # Guess the types for each.
+            self.types, self.converts = zip(*[ 
+                guess_type(c, n) for c, n in zip(cols, self.names) ])
+            self.__formatters = None
+            self.__index = None
+        # Share string values among rows.
+        self.__intern = Interner(
+            [ c for c, t in enumerate(self.types) if t is str ])
+        if cached is None:
+            # Evicted rows are read again by offset, if possible.
+            self.__reader = None
+            self.__rows = RowStore(
+                max_rows, self.__read_rows if self.__seekable else None)
+            self.__rows.extend( self.__intern(list(r)) for r in rows )
+        # Column arrays, once loaded in parallel.
+        self.__table = None
 
 
     def get_default_formatters(self, cfg={}):
-        cols = tuple(zip(*self.__rows))
+        if self.__formatters is not None:
+            # Cached formatters; show times in the configured time zone.
+            return [
+                f.changing(tz=cfg["time_zone"]) if hasattr(f, "tz") else f
+                for f in self.__formatters
+                ]
+        cols = tuple(zip(*self.__rows.get_range(0, self.__num_sample)))
         return [ 
-            get_default_formatter(t, [ cv(v) for v in col ], cfg) 
-            for t, cv, col in zip(self.types, self.converts, cols) 
+            get_default_formatter(t, as_array(t, col), cfg) 
+            for t, col in zip(self.types, cols) 
             ]
 
 
+    def get_column_stats(self):
+        """
+        Computes stats for each column over the rows read so far.
+
+        @rtype
+          Sequence of `ColumnStats`.
+        """
+        stats = [ ColumnStats(t) for t in self.types ]
+        if self.__table is not None:
+            for c, s in enumerate(stats):
+                for chunk in self.__table.get_chunks(c):
+                    s.update(chunk)
+            return stats
+        for start in range(0, len(self.__rows), STATS_CHUNK):
+            cols = zip(*self.__rows.get_range(start, start + STATS_CHUNK))
+            for s, col in zip(stats, cols):
+                s.update(as_array(s.type, col))
+        return stats
+
+
+    def get_cache_entry(self, cfg={}):
+        """
+        Returns a cache entry for the input, if it has been read completely.
+
+        @return
+          A dict for `cache.SidecarCache.store()`, or `None` if the input
+          hasn't been fully read or doesn't provide offsets.
+        """
+        if not self.done or self.__offsets is None or self.__index is not None:
+            return None
+        return dict(
+            options     =self.__options,
+            delimiter   =self.delimiter,
+            types       =self.types,
+            formatters  =self.get_default_formatters(cfg),
+            stats       =[ s.as_dict() for s in self.get_column_stats() ],
+            offsets     =self.__offsets,
+            )
+
+
+    def load_parallel(self, num_workers=None):
+        """
+        Reads the entire input in parallel worker processes.
+
+        Afterward, rows are served from column arrays.  The input must be a
+        seekable file with offsets, such as a `LineReader` on a named file.
+
+        @param num_workers
+          The number of worker processes; if `None`, the number of CPUs.
+        """
+        # Imported here, as the parallel module depends on this one.
+        from .parallel import parse_file
+
+        if self.done or len(self.__rows) == 0:
+            return
+        if (self.__offsets is None or self.__source.name is None
+            or not self.__source.seekable):
+            raise IOError("can't load in parallel: {}".format(self.filename))
+
+        types, table, offsets = parse_file(
+            self.__source.name, self.__offsets[0], self.delimiter, self.types,
+            comment_prefix  =self.__comment_prefix,
+            encoding        =self.__source.encoding,
+            num_workers     =num_workers)
+        self.types = types
+        self.converts = tuple( TYPE_CONVERTERS.get(t, t) for t in types )
+        self.__table = table
+        self.__offsets = offsets
+        self.done = True
+
+
     def __is_comment(self, line):
         return (
             self.__comment_prefix is not None 
             and line.startswith(self.__comment_prefix))
 
 
+    def __read_lines(self, lines):
+        """
+        Generates cleaned lines with the byte offset of each, or `None`.
+        """
+        if hasattr(lines, "line_offset"):
+            for line in lines:
+                yield lines.line_offset, self.clean_line(line)
+        else:
+            for line in lines:
+                yield None, self.clean_line(line)
+
+
+    def __skip_comments(self, lines):
+        return ( (o, l) for o, l in lines if not self.__is_comment(l) )
+
+
+    def __parse(self, lines, delim, offsets):
+        """
+        Generates cleaned rows parsed from lines.
+
+        @param lines
+          Iterable of byte offset and line pairs.
+        @param offsets
+          An array to which to append the offset of each row, or `None`.
+        """
+        # The offsets of lines consumed by the CSV reader for the current row.
+        line_offsets = []
+
+        def get_lines():
+            for offset, line in lines:
+                line_offsets.append(offset)
+                yield line
+
+        rows = _make_csv_reader(
+            get_lines(), delimiter=delim, quotechar=QUOTE_CHAR)
+        for row in rows:
+            if offsets is not None:
+                offsets.append(line_offsets[0])
+            del line_offsets[:]
+            yield self.__intern(self.clean_row(row))
+
+
     def __read_sample_lines(self, max_lines):
         """
         Returns samples lines and comment lines before the first useful line.
 
         @param max_lines
           The number of sample lines to read.
+        @return
+          Sample lines as byte offset and line pairs, and comment lines.
         """
         if max_lines == 0:
             return [], []
@@ -372,24 +783,24 @@ class DelimitedFileModel:
         count = 0
 
         # Read comments from the top.
-        line = next(self.__lines)
+        offset, line = next(self.__lines)
         while len(line) > 0 and self.__is_comment(line):
             comments.append(line)
-            line = self.__read_line()
+            offset, line = next(self.__lines, (None, ""))
 
         # Handle the remaining line from above.
         if len(line) > 0:
-            lines.append(line)
+            lines.append((offset, line))
             if not self.__is_comment(line):
                 count += 1
 
         # Keep reading.
         while count < max_lines:
             try:
-                line = next(self.__lines)
+                offset, line = next(self.__lines)
             except StopIteration:
                 break
-            lines.append(line)
+            lines.append((offset, line))
             if not self.__is_comment(line):
                 count += 1
 
@@ -398,36 +809,359 @@ class DelimitedFileModel:
 
     @property
     def num_rows(self):
-        return len(self.__rows)
+        if self.__table is not None:
+            return self.__table.num_rows
+        else:
+            return len(self.__rows)
+
+
+    @property
+    def __root(self):
+        """
+        The model of the whole input.
+        """
+        return self if self.__parent is None else self.__parent
+
+
+    @property
+    def __seekable(self):
+        """
+        True if this model reads a seekable file, so that it can read rows
+        from the middle.
+        """
+        source = self.__source
+        return (
+            self.__offsets is not None and len(self.__offsets) > 0
+            and source.name is not None and source.seekable
+            and source.size is not None)
+
+
+    def __get_density(self):
+        # Imported here, as the index module depends on this one.
+        from .index import RowDensity
+
+        if self.__density is None:
+            with open(self.__source.name, "rb") as file:
+                self.__density = RowDensity(
+                    file, self.__offsets[0], self.__source.size)
+        return self.__density
+
+
+    def __get_indexer(self):
+        """
+        Returns the background indexer, starting it if necessary.
+        """
+        from .index import RowIndexer
+
+        if self.__indexer is None:
+            self.__indexer = RowIndexer(
+                self.__source.name, self.__offsets[0], self.__comment_prefix)
+            self.__indexer.start()
+        return self.__indexer
+
+
+    def __rows_before(self, offset):
+        """
+        Returns the number of rows that start before an offset.
+
+        Exact for the part of the input that's been read or indexed;
+        otherwise, estimated from sampled row sizes.
+
+        @return
+          The number of rows, and true if it's exact.
+        """
+        source = self.__source
+        if offset <= source.offset:
+            return bisect.bisect_left(self.__offsets, offset), True
+        if self.__indexer is not None:
+            rows = self.__indexer.rows_before(offset)
+            if rows is not None:
+                return rows, True
+        rows = self.__get_density().rows_between(source.offset, offset)
+        return self.num_rows + int(round(rows)), False
+
+
+    @property
+    def __row_size(self):
+        """
+        The average size in bytes of rows read so far, or `None`.
+        """
+        source = self.__source
+        if (getattr(source, "size", None) is None 
+            or self.__offsets is None or len(self.__offsets) == 0):
+            return None
+        row_size = (source.offset - self.__offsets[0]) / len(self.__offsets)
+        return row_size if row_size > 0 else None
+
+
+    def __update_base_row(self):
+        """
+        Replaces an estimated base row with an exact one, once indexed.
+        """
+        if not self.__base_exact:
+            indexer = self.__parent.__indexer
+            rows = (
+                None if indexer is None 
+                else indexer.rows_before(self.__offsets[0]))
+            if rows is not None:
+                self.__base_row, self.__base_exact = rows, True
+
+
+    @property
+    def base_row(self):
+        """
+        The index in the whole input of the first row.
+
+        For a model of part of the input, this may be an estimate; see
+        `approximate`.
+        """
+        self.__update_base_row()
+        return self.__base_row
+
+
+    @property
+    def approximate(self):
+        """
+        True if row numbers are estimated.
+        """
+        self.__update_base_row()
+        return not self.__base_exact
+
+
+    @property
+    def estimated_rows(self):
+        """
+        The estimated number of rows in the whole input.
+
+        Until the input is read completely, counts the rows read so far, and
+        estimates the rest from the sizes of rows sampled across the file or,
+        if the input isn't seekable, from the average size of rows read.
+
+        @return
+          The number of rows, or `None` if it can't be estimated.
+        """
+        if self.done:
+            return self.base_row + self.num_rows
+        root = self.__root
+        if root.__seekable:
+            indexer = root.__indexer
+            if indexer is not None and indexer.done:
+                return indexer.num_rows
+            rows, _ = root.__rows_before(root.__source.size)
+            return rows
+        row_size = self.__row_size
+        if row_size is None:
+            return None
+        source = self.__source
+        remaining = max(source.size - source.offset, 0) / row_size
+        return self.num_rows + int(round(remaining))
+
+
+    def get_model_at(self, fraction):
+        """
+        Returns a model of the input starting at a fraction of its size.
+
+        Seeks to the corresponding byte offset and reads from the next
+        record, without reading the input before it.
+
+        @param fraction
+          The fraction of the input's data at which to start, between 0 and 1.
+        @return
+          The model, or `None` if the input isn't a seekable file.
+        """
+        root = self.__root
+        if not root.__seekable:
+            return None
+        start = root.__offsets[0]
+        offset = start + int(
+            clip(0, fraction, 1) * (root.__source.size - start))
+        return root.__get_model_at_offset(
+            offset, u"{} @{:.0f}%".format(root.filename, 100 * fraction))
+
+
+    def get_model_at_row(self, row):
+        """
+        Returns a model of the input starting at a row.
+
+        Once the input is indexed as far as the row, it is found exactly;
+        until then, its offset is estimated from sampled row sizes.
+
+        @return
+          The model, or `None` if the input isn't a seekable file.
+        """
+        root = self.__root
+        if not root.__seekable:
+            return None
+        offset = root.__get_indexer().find_row(row)
+        if offset is None:
+            if row < len(root.__offsets):
+                offset = root.__offsets[row]
+            else:
+                offset = root.__get_density().find_offset(
+                    root.__source.offset, row - len(root.__offsets))
+        return root.__get_model_at_offset(
+            offset, u"{} @row {}".format(root.filename, row))
+
 
+    def __get_model_at_offset(self, offset, filename):
+        """
+        Returns a model of the input starting at the first record at or after
+        `offset`, or `None` if there is none.
+        """
+        from .index import find_record_start
+
+        source = self.__source
+        start = self.__get_indexer().find_record_start(offset)
+        if start is None:
+            with open(source.name, "rb") as file:
+                start = find_record_start(
+                    file, offset, self.delimiter, self.num_cols,
+                    self.__comment_prefix, source.encoding)
+            if start is None:
+                return None
+
+        reader = source.reopen()
+        reader.seek(start)
+        try:
+            model = self.__class__(
+                reader, False, self.__num_sample, None, 
+                self.__comment_prefix, filename, parent=self, 
+                max_rows=self.__max_rows, read_ahead=self.__read_ahead)
+        except EOFError:
+            return None
+        model.__base_row, model.__base_exact = self.__rows_before(
+            model.__offsets[0])
+        return model
+
+
+    @property
+    def memory_size(self):
+        """
+        Estimated size in bytes of the data held in memory.
+        """
+        size = self.__rows.memory_size
+        if self.__offsets is not None:
+            size += len(self.__offsets) * 8
+        if self.__table is not None:
+            size += self.__table.nbytes
+        return int(size)
 
-    def get_row(self, idx):
+
+    def __read_rows(self, start, num):
+        """
+        Reads rows again by offset.
+        """
+        if self.__reader is None:
+            self.__reader = self.__source.reopen()
+        offsets = self.__offsets if self.__index is None else self.__index
+        self.__reader.seek(offsets[start])
+        lines = self.__skip_comments(self.__read_lines(self.__reader))
+        rows = self.__parse(lines, self.delimiter, None)
+        return list(itertools.islice(rows, num))
+
+
+    def get_row(self, idx, cols=None):
+        """
+        @param cols
+          Indices of the columns to return, or `None` for all.  Other columns
+          aren't converted.
+        """
+        if self.__table is not None:
+            # Values are already converted.
+            return self.__table.get_row(idx, cols)
         row = self.__rows[idx]
-        row = [ c(v) for c, v in zip(self.converts, row) ]
-        return row
+        converts = self.converts
+        if cols is None:
+            return [ c(v) for c, v in zip(converts, row) ]
+        else:
+            return [ converts[c](row[c]) for c in cols ]
+
+
+    def get_columns(self, cols, start, stop):
+        """
+        Returns converted values of columns for a range of rows.
+
+        @param cols
+          Indices of the columns.
+        @return
+          An array for each column.
+        """
+        if self.__table is not None:
+            return [ self.__table.get_column(c, start, stop) for c in cols ]
+        rows = self.__rows.get_range(start, stop)
+        return [ as_array(self.types[c], [ r[c] for r in rows ]) for c in cols ]
+
+
+    def get_codes(self, col, start, stop):
+        """
+        Returns codes of a dictionary-encoded column for a range of rows.
+
+        @return
+          The codes, and the dictionary of values; or `None` if the column
+          isn't encoded.
+        """
+        if self.__table is None:
+            return None
+        return self.__table.get_codes(col, start, stop)
 
 
     def ensure_rows(self, max_row):
-        if not self.done:
-            while self.num_rows < max_row + SAMPLELINES:
-                try:
-                    row = next(self.__more_rows)
-                except StopIteration:
-                    self.done = True
-                    break
-                else:
-                    self.__rows.append(row)
+        source = self.__source
+        num = min(max_row + self.__read_ahead, sys.maxsize) - self.num_rows
+        while not self.done and num > 0:
+            # Read only lines a live source has already received, without
+            # waiting for more.
+            pending = getattr(source, "pending", None)
+            count = num if pending is None else min(num, pending)
+            if count == 0:
+                break
+            added = self.__rows.extend(itertools.islice(self.__more_rows, count))
+            if added < count:
+                self.done = True
+            num -= added
             # FIXME: Check that the new values fit in existing types; adjust
             # types otherwise.
         return min(max_row, self.num_rows)
 
 
+    def close(self):
+        """
+        Stops background indexing, and closes the input and the files opened
+        to read from it.
+        """
+        if self.__indexer is not None:
+            self.__indexer.close()
+            self.__indexer = None
+        if self.__reader is not None:
+            self.__reader.close()
+            self.__reader = None
+        self.__rows.close()
+        close = getattr(self.__source, "close", None)
+        if close is not None:
+            close()
+
+
+
 
 #-------------------------------------------------------------------------------
 
+def _to_array(values):
+    """
+    Returns the values of a Pandas series or index as an array.
+
+    Times with a time zone are UTC `datetime64` values, rather than objects.
+    """
+    arr = values.values
+    return arr if isinstance(arr, np.ndarray) else np.asarray(arr)
+
+
 class DataFrameModel:
     """
     Data model backed by a Pandas `DataFrame`.
+
+    The leading columns are the levels of the index.  Labels of a hierarchical
+    index or columns are looked up by their codes as needed, rather than
+    materialized for the whole frame.
     """
 
     # We don't load incrementally.
@@ -439,6 +1173,22 @@ class DataFrameModel:
     def __init__(self, df, filename=None):
         self.__df = df
         self.__filename = filename
+        index = df.index
+        # Number of leading columns that are levels of the index.
+        self.num_index_cols = index.nlevels
+        # For a hierarchical index, the labels and codes of each level.
+        if hasattr(index, "codes"):
+            self.__levels = [ _to_array(l) for l in index.levels ]
+            self.__codes = [ np.asarray(c) for c in index.codes ]
+        else:
+            self.__levels = self.__codes = None
+        # Likewise for hierarchical columns.
+        columns = df.columns
+        if hasattr(columns, "codes"):
+            self.__col_levels = [ np.asarray(l) for l in columns.levels ]
+            self.__col_codes = [ np.asarray(c) for c in columns.codes ]
+        else:
+            self.__col_levels = self.__col_codes = None
 
 
     @property
@@ -446,8 +1196,93 @@ class DataFrameModel:
         return len(self.__df)
 
 
-    def get_row(self, idx):
-        return (self.__df.index[idx], ) + tuple(self.__df.iloc[idx])
+    def __get_level(self, level, start, stop):
+        """
+        Returns labels of an index level for a range of rows.
+        """
+        if self.__codes is None:
+            return _to_array(self.__df.index[start : stop])
+        codes = self.__codes[level][start : stop]
+        labels = self.__levels[level][codes]
+        missing = codes < 0
+        if missing.any():
+            labels = labels.astype(object)
+            labels[missing] = None
+        return labels
+
+
+    def get_row(self, idx, cols=None):
+        """
+        @param cols
+          Indices of the columns to return, or `None` for all.  The leading
+          columns are the index levels.  Other columns aren't accessed.
+        """
+        df = self.__df
+        num_index = self.num_index_cols
+        if cols is None:
+            return tuple( 
+                self.__get_level(l, idx, idx + 1)[0] 
+                for l in range(num_index) 
+                ) + tuple(df.iloc[idx])
+        else:
+            return [ 
+                self.__get_level(c, idx, idx + 1)[0] if c < num_index
+                else df.iat[idx, c - num_index] 
+                for c in cols 
+                ]
+
+
+    def get_columns(self, cols, start, stop):
+        """
+        Returns values of columns for a range of rows.
+
+        @param cols
+          Indices of the columns.  The leading columns are the index levels.
+        @return
+          An array for each column.
+        """
+        df = self.__df
+        num_index = self.num_index_cols
+        return [
+            self.__get_level(c, start, stop) if c < num_index
+            else _to_array(df.iloc[start : stop, c - num_index])
+            for c in cols
+            ]
+
+
+    def get_codes(self, col, start, stop):
+        """
+        Returns codes of a level of a hierarchical index for a range of rows.
+
+        @return
+          The codes, and the labels of the level; or `None` if the column
+          isn't an index level, or some labels are missing.
+        """
+        if self.__codes is None or col >= self.num_index_cols:
+            return None
+        codes = self.__codes[col][start : stop]
+        if (codes < 0).any():
+            return None
+        return codes, self.__levels[col]
+
+
+    def get_repeated(self, col, start, stop):
+        """
+        Returns which labels of an index level repeat those of the row before,
+        along with the labels of all outer levels.
+
+        @return
+          A boolean array for the range of rows, or `None` if the column isn't
+          a level of a hierarchical index.
+        """
+        if self.__codes is None or col >= self.num_index_cols:
+            return None
+        codes = [ c[start : stop] for c in self.__codes[: col + 1] ]
+        repeated = np.zeros(len(codes[0]), dtype=bool)
+        if len(repeated) > 1:
+            repeated[1 :] = np.logical_and.reduce(
+                [ c[1 :] == c[: -1] for c in codes ])
+        return repeated
 
 
     def ensure_rows(self, max_row):
@@ -457,12 +1292,43 @@ class DataFrameModel:
 
     @property
     def num_cols(self):
-        return 1 + len(self.__df.columns)
+        return self.num_index_cols + len(self.__df.columns)
+
+
+    @property
+    def memory_size(self):
+        """
+        Size in bytes of the dataframe.
+        """
+        return int(self.__df.memory_usage(index=True).sum())
 
 
     @property
     def names(self):
-        return (self.__df.index.name, ) + tuple(self.__df.columns)
+        return tuple(self.__df.index.names) + tuple(self.__df.columns)
+
+
+    def get_header(self, col):
+        """
+        Returns the header labels of a column, one for each level of the
+        columns.
+
+        The labels of an index level are its name, under the names of the
+        column levels.
+        """
+        columns = self.__df.columns
+        num_index = self.num_index_cols
+        if col < num_index:
+            return tuple(
+                columns.names[l] if col == num_index - 1 else None
+                for l in range(columns.nlevels - 1)
+                ) + (self.__df.index.names[col], )
+        elif self.__col_codes is None:
+            return (columns[col - num_index], )
+        else:
+            return tuple(
+                None if c[col - num_index] < 0 else l[c[col - num_index]]
+                for l, c in zip(self.__col_levels, self.__col_codes) )
 
 
     @property
@@ -482,15 +1348,252 @@ class DataFrameModel:
 
 
     def get_default_formatters(self, cfg={}):
-        series = (self.__df.index, ) \
-            + tuple( self.__df[n] for n in self.__df.columns )
+        df = self.__df
+        # Size index levels by their distinct labels.
+        levels = (
+            [ _to_array(df.index) ] if self.__levels is None else self.__levels)
+        values = levels + [
+            _to_array(df.iloc[:, i]) for i in range(len(df.columns)) ]
         return tuple(
-            get_default_formatter(
-                self.TYPE_MAP[s.dtype.kind],
-                s.values,
-                cfg)
-            for s in series )
-        
+            get_default_formatter(self.TYPE_MAP[v.dtype.kind], v, cfg)
+            for v in values )
+
+
+
+class ArrayModel:
+    """
+    Data model backed by a NumPy array, read in place.
+
+    The columns are the fields of a structured array, or the columns of a 2-D
+    array.  Rows and columns are read as views of the array, so that a
+    `np.memmap` is paged in only as its rows are shown.
+    """
+
+    # The array is all there.
+    done = True
+
+    # No title lines available.
+    title_lines = []
+
+    def __init__(self, arr, filename=None):
+        """
+        @param arr
+          A structured array, or a 1-D or 2-D array.
+        @param filename
+          The name to show, or `None` for that of a memmap's file.
+        @raise ValueError
+          The array has more than two dimensions.
+        """
+        if arr.dtype.names is not None:
+            if arr.ndim != 1:
+                raise ValueError("structured array must be 1-D")
+            self.names = arr.dtype.names
+        else:
+            if arr.ndim == 1:
+                arr = arr[:, np.newaxis]
+            elif arr.ndim != 2:
+                raise ValueError(
+                    "can't show a {}-D array".format(arr.ndim))
+            self.names = tuple( str(i) for i in range(arr.shape[1]) )
+        self.__arr = arr
+        self.__structured = arr.dtype.names is not None
+        if filename is None:
+            filename = getattr(arr, "filename", None)
+        self.__filename = "" if filename is None else filename
+
+
+    @property
+    def num_rows(self):
+        return len(self.__arr)
+
+
+    @property
+    def num_cols(self):
+        return len(self.names)
+
+
+    def __get_column(self, col):
+        """
+        Returns a view of the values of a column.
+        """
+        arr = self.__arr
+        return arr[self.names[col]] if self.__structured else arr[:, col]
+
+
+    @staticmethod
+    def __decode(values):
+        """
+        Decodes an array of bytes to strings, as Latin-1, for display.
+        """
+        return (
+            np.char.decode(values, "latin-1") if values.dtype.kind == "S"
+            else values)
+
+
+    def get_row(self, idx, cols=None):
+        row = self.__arr[idx]
+        if cols is None:
+            cols = range(self.num_cols)
+        if self.__structured:
+            values = [ row[self.names[c]] for c in cols ]
+        else:
+            values = [ row[c] for c in cols ]
+        return [
+            v.decode("latin-1") if isinstance(v, bytes) else v
+            for v in values ]
+
+
+    def get_columns(self, cols, start, stop):
+        """
+        Returns values of columns for a range of rows, as views of the array.
+        Bytes are decoded, for the range only.
+        """
+        return [
+            self.__decode(self.__get_column(c)[start : stop]) for c in cols ]
+
+
+    def ensure_rows(self, max_row):
+        # All rows are available; nothing to do.
+        return len(self.__arr)
+
+
+    @property
+    def memory_size(self):
+        """
+        Size in bytes of the array, unless it's mapped from a file.
+        """
+        arr = self.__arr
+        return 0 if isinstance(arr, np.memmap) else int(arr.nbytes)
+
+
+    @property
+    def filename(self):
+        return self.__filename
+
+
+    # Mapping from dtype kind to dtype.  Other kinds, such as complex numbers
+    # and timedeltas, are shown as strings.
+    TYPE_MAP = dict(DataFrameModel.TYPE_MAP, S=str, U=str)
+
+
+    def get_default_formatters(self, cfg={}):
+        # Sample rows from the start and end, so that only a few pages of a
+        # memmap are read.
+        arr = self.__arr
+        num = SAMPLELINES // 2
+        sample = arr if len(arr) <= 2 * num else np.concatenate(
+            (arr[: num], arr[-num :]))
+        formatters = []
+        for c, name in enumerate(self.names):
+            values = sample[name] if self.__structured else sample[:, c]
+            type = self.TYPE_MAP.get(values.dtype.kind)
+            if type is None:
+                # Size by the values as shown, one at a time.
+                type = str
+                values = np.array([ str(v) for v in values ])
+            formatters.append(
+                get_default_formatter(type, self.__decode(values), cfg))
+        return formatters
+
+
+
+#-------------------------------------------------------------------------------
+
+class ColumnMap:
+    """
+    Maps display positions to model columns.
+
+    Keeps the display order of all columns and the set of hidden columns.
+    `cols` gives the model index of the column shown at each position.
+    """
+
+    def __init__(self, num_cols):
+        self.__order    = list(range(num_cols))
+        self.__hidden   = set()
+        self.cols       = list(self.__order)
+
+
+    def __update(self):
+        self.cols = [ c for c in self.__order if c not in self.__hidden ]
+
+
+    def __len__(self):
+        return len(self.cols)
+
+
+    def __getitem__(self, pos):
+        return self.cols[pos]
+
+
+    @property
+    def hidden(self):
+        return frozenset(self.__hidden)
+
+
+    def hide(self, pos):
+        """
+        Hides the column at a position.  The last shown column can't be hidden.
+        """
+        if len(self.cols) > 1:
+            self.__hidden.add(self.cols[pos])
+            self.__update()
+
+
+    def show(self, col):
+        """
+        Shows a hidden model column, at its place in the order.
+        """
+        self.__hidden.discard(col)
+        self.__update()
+
+
+    def show_all(self):
+        self.__hidden.clear()
+        self.__update()
+
+
+    def move(self, pos, dp):
+        """
+        Moves the column at a position by `dp` positions among shown columns.
+
+        @return
+          The new position.
+        """
+        new_pos = clip(0, pos + dp, len(self.cols) - 1)
+        if new_pos != pos:
+            order = self.__order
+            col = self.cols[pos]
+            order.remove(col)
+            order.insert(order.index(self.cols[new_pos]) + (new_pos > pos), col)
+            self.__update()
+        return new_pos
+
+
+    def find(self, names, name):
+        """
+        Finds a column by name, showing it if it's hidden.
+
+        Prefers an exact match, then a prefix, then a substring, ignoring
+        case.
+
+        @param names
+          The names of the model columns.
+        @return
+          The display position of the column, or `None` if none matches.
+        """
+        name = name.lower()
+        names = [ "" if n is None else six.text_type(n).lower() for n in names ]
+        for match in (
+            lambda n: n == name, 
+            lambda n: n.startswith(name), 
+            lambda n: name in n,
+            ):
+            for col in self.__order:
+                if match(names[col]):
+                    self.show(col)
+                    return self.cols.index(col)
+        return None
+
 
 
 #-------------------------------------------------------------------------------
@@ -500,16 +1603,31 @@ class GridView:
     View (and controller) for tabular data models.
     """
 
-    def __init__(self, model, cfg={}, num_frozen=0):
+    def __init__(self, model, cfg={}, num_frozen=0, timer=None,
+                 input_loop=None):
         """
         @param num_frozen
           The number of frozen columns on the left.
+        @param timer
+          A `FrameTimer` with which to time frames, or `None`.
+        @param input_loop
+          A `feed.InputLoop` that reads the model's live input, if any, while
+          waiting for keys.
         """
         self.__model = model
         self.__cfg = cfg
         self.__formatters = list(model.get_default_formatters(cfg))
-
-        self.__num_frozen = num_frozen
+        self.__timer = timer
+        self.__input_loop = input_loop
+        # If true, move to the end as rows arrive.
+        self.__follow = False
+        # The export in progress, if any.
+        self.__exporter = None
+
+        self.__columns = ColumnMap(model.num_cols)
+        # Column summaries, and the number of rows each covers, by column.
+        self.__summaries = {}
+        self.__num_frozen = min(num_frozen, model.num_cols)
 
         self.__col0 = self.__num_frozen
         self.__idx0 = 0
@@ -546,12 +1664,14 @@ class GridView:
             curses.KEY_RIGHT: lambda: self.__move(0, +1),
 
             ord('G')        : lambda: self.__move_to_end(),
+            ord('%')        : lambda: self.__jump_to_percent(),
+            ord(':')        : lambda: self.__jump_to_row(),
             curses.KEY_END  : lambda: self.__move("bottom", 0),
             curses.KEY_SELECT:lambda: self.__move("bottom", 0),
 
-          # FIXME: Search currently not working.
-          # ord('F')        : lambda: self.__tail(),
+            ord('T')        : lambda: self.__tail(),
 
+          # FIXME: Search currently not working.
           # ord('/')        : lambda: self.__do_search(1),
           # ord('?')        : lambda: self.__do_search(-1),
           # ord('n')        : lambda: self._nextSearchOccurrence(+1),
@@ -571,23 +1691,67 @@ class GridView:
             ord('<')        : lambda: self.__change_precision(-1),
             ord('>')        : lambda: self.__change_precision(+1),
 
+            ord('D')        : lambda: self.__cycle_datetime_format(),
+
+            ord('-')        : lambda: self.__hide_col(),
+            ord('+')        : lambda: self.__show_cols(),
+            ord('[')        : lambda: self.__move_col(-1),
+            ord(']')        : lambda: self.__move_col(+1),
+            ord('J')        : lambda: self.__jump_to_col(),
+
+            ord('f')        : lambda: self.__show_summary(),
+            ord('A')        : lambda: self.__group_by(),
+            ord('o')        : lambda: self.__open_group(),
+
+            ord('t')        : lambda: self.__toggle_timing(),
+
+            ord('S')        : lambda: self.__export(),
+
             curses.KEY_RESIZE:lambda: self.__set_geometry() # Window resize
             }
 
         self.__set_geometry()
 
 
-    def set_screen(self, scr, encoding):
+    def set_screen(self, scr, encoding, attrs=None):
+        """
+        @param scr
+          A curses window, or an object with the same interface.
+        @param attrs
+          Attributes for color pairs 1 through 8; if `None`, the curses color
+          pairs.
+        """
+        if attrs is None:
+            attrs = [ curses.color_pair(i) for i in range(1, 9) ]
+
         self.__screen = scr
         self.__encoding = encoding
+        self.__attrs = attrs
+        self.__set_geometry()
+
+
+    def __get_header(self, col):
+        """
+        Returns the header labels of a model column, one for each header line.
+        """
+        get_header = getattr(self.__model, "get_header", None)
+        if get_header is None:
+            return (self.__model.names[col], )
+        return get_header(col)
 
 
     def __set_geometry(self):
-        self.__screen_width, self.__screen_height = get_terminal_size()
+        if self.__screen is None:
+            self.__screen_width, self.__screen_height = get_terminal_size()
+        else:
+            self.__screen_height, self.__screen_width = \
+                self.__screen.getmaxyx()
 
         xtra = 0
         if as_bool(self.__cfg["show_header"]):
-            xtra += 1 + len(self.__model.title_lines)
+            num_header = (
+                len(self.__get_header(0)) if self.__model.num_cols > 0 else 1)
+            xtra += num_header + len(self.__model.title_lines)
         if as_bool(self.__cfg["show_footer"]):
             xtra += 1
 
@@ -598,13 +1762,15 @@ class GridView:
 
     def __get_last_col(self):
         sep = len(self.__cfg["separator"])
-        x = sum( f.width + sep for f in self.__formatters[: self.__num_frozen] )
-        for c in range(self.__col0, self.__model.num_cols):
-            x += self.__formatters[c].width + sep
+        cols = self.__columns
+        fmts = self.__formatters
+        x = sum( fmts[c].width + sep for c in cols[: self.__num_frozen] )
+        for p in range(self.__col0, len(cols)):
+            x += fmts[cols[p]].width + sep
             if x > self.__screen_width:
-                return c - 1
+                return p - 1
         else:
-            return self.__model.num_cols - 1
+            return len(cols) - 1
 
 
     def __move(self, dr, dc):
@@ -615,7 +1781,7 @@ class GridView:
             elif dr == "bottom":
                 dr = self.__model.num_rows - 1 - r
             r = clip(0, r + dr, self.__model.num_rows - 1)
-            c = clip(0, c + dc, self.__model.num_cols - 1)
+            c = clip(0, c + dc, len(self.__columns) - 1)
             if r < self.__idx0:
                 self.__move_by(r - self.__idx0)
             elif r >= self.__idx1:
@@ -650,11 +1816,306 @@ class GridView:
 
 
     def __move_to_col(self, col):
-        self.__col0 = clip(self.__num_frozen, col, self.__model.num_cols - 1)
+        num_frozen = self.__num_frozen
+        self.__col0 = clip(
+            num_frozen, col, max(num_frozen, len(self.__columns) - 1))
         col1 = self.__get_last_col()
         self.__cursor[1] = clip(self.__col0, self.__cursor[1], col1)
 
 
+    def __scroll_to_col(self, pos):
+        """
+        Scrolls horizontally as needed to show the column at a position.
+        """
+        if pos >= self.__num_frozen:
+            if pos < self.__col0:
+                self.__move_to_col(pos)
+            # Stop at the column itself, in case it's wider than the screen.
+            while self.__get_last_col() < pos and self.__col0 < pos:
+                self.__move_to_col(self.__col0 + 1)
+
+
+    def __get_cursor_col(self):
+        """
+        Returns the model column at the cursor.
+        """
+        return self.__columns[self.__cursor[1]]
+
+
+    def __hide_col(self):
+        if self.__show_cursor:
+            pos = self.__cursor[1]
+            num_cols = len(self.__columns)
+            self.__columns.hide(pos)
+            if len(self.__columns) < num_cols:
+                # Positions to the right shift left.
+                if pos < self.__num_frozen:
+                    self.__num_frozen -= 1
+                if pos < self.__col0:
+                    self.__col0 -= 1
+            self.__move_to_col(self.__col0)
+            self.__cursor[1] = clip(0, pos, len(self.__columns) - 1)
+
+
+    def __show_cols(self):
+        # Keep the same column at the cursor.
+        col = self.__get_cursor_col()
+        self.__columns.show_all()
+        self.__cursor[1] = self.__columns.cols.index(col)
+        self.__move_to_col(self.__col0)
+
+
+    def __move_col(self, dp):
+        if self.__show_cursor:
+            pos = self.__columns.move(self.__cursor[1], dp)
+            self.__scroll_to_col(pos)
+            self.__cursor[1] = pos
+
+
+    def __jump_to_col(self):
+        name = self.__prompt("column: ")
+        if name is None or len(name) == 0:
+            return
+        pos = self.__columns.find(self.__model.names, name)
+        if pos is None:
+            self.flash = "No column matches {}".format(name)
+        else:
+            self.__scroll_to_col(pos)
+            self.__cursor[1] = pos
+
+
+    def __show_sub_view(self, model, at_end=False, close=False):
+        """
+        Shows another model in a view on the same screen, until it exits.
+
+        @param at_end
+          If true, start at the end of the model.
+        @param close
+          If true, close the model once the view exits.
+        """
+        view = GridView(
+            model, self.__cfg, num_frozen=1, timer=self.__timer,
+            input_loop=self.__input_loop)
+        view.set_screen(self.__screen, self.__encoding, self.__attrs)
+        if at_end:
+            view.__move_to_end()
+        try:
+            view.show()
+        finally:
+            if close and hasattr(model, "close"):
+                model.close()
+        self.__set_geometry()
+
+
+    def __group_by(self):
+        """
+        Shows aggregates of columns, grouped by the column at the cursor.
+        """
+        from .groupby import GroupByModel
+
+        if not self.__show_cursor:
+            self.flash = "Turn on the cursor to choose a column to group by"
+            return
+        names = self.__prompt("aggregate (blank for all numeric): ")
+        if names is None:
+            return
+        # Look up value columns by name, without changing our column map.
+        columns = ColumnMap(self.__model.num_cols)
+        value_cols = []
+        for name in ( n.strip() for n in names.split(",") ):
+            if len(name) > 0:
+                pos = columns.find(self.__model.names, name)
+                if pos is None:
+                    self.flash = "No column matches {}".format(name)
+                    return
+                value_cols.append(columns[pos])
+        model = GroupByModel(self.__model, self.__get_cursor_col(), value_cols)
+        self.__show_sub_view(model)
+
+
+    def __open_group(self):
+        """
+        Shows the source rows of the group at the cursor, in a grouped view.
+        """
+        try:
+            get_group_model = self.__model.get_group_model
+        except AttributeError:
+            return
+        idx = self.__cursor[0] if self.__show_cursor else self.__idx0
+        if idx < self.__model.num_rows:
+            self.__show_sub_view(get_group_model(idx))
+
+
+    def __update_summary(self, col, deadline):
+        """
+        Accumulates the summary of a column over more loaded rows, until done
+        or until `deadline`.
+
+        @return
+          The summary, and the number of rows it covers.
+        """
+        from .groupby import get_columns
+
+        summary, num_rows = self.__summaries.get(col, (None, 0))
+        while num_rows < self.__model.num_rows and time.time() < deadline:
+            stop = min(num_rows + STATS_CHUNK, self.__model.num_rows)
+            values, = get_columns(self.__model, [col], num_rows, stop)
+            if summary is None:
+                summary = make_summary(values)
+            summary.update(values)
+            num_rows = stop
+        self.__summaries[col] = summary, num_rows
+        return summary, num_rows
+
+
+    def __format_summary(self, col, summary, height):
+        """
+        Formats labels and counts of a summary, for at most `height` lines.
+        """
+        fmt = self.__formatters[col]
+        if hasattr(summary, "bins"):
+            bins = summary.bins(height)
+            if summary.kind == "i":
+                labels = [
+                    fmt(lo).strip() if lo == hi 
+                    else u"[{}, {}]".format(fmt(lo).strip(), fmt(hi).strip())
+                    for lo, hi, _ in bins ]
+            else:
+                labels = [
+                    u"[{}, {}{}".format(
+                        fmt(lo).strip(), fmt(hi).strip(),
+                        "]" if i == len(bins) - 1 else ")")
+                    for i, (lo, hi, _) in enumerate(bins) ]
+            counts = [ c for _, _, c in bins ]
+        else:
+            top = summary.top(height)
+            other = summary.count - sum( c for _, c in top )
+            if other > 0:
+                # Make room for the rest.
+                top = summary.top(height - 1)
+                other = summary.count - sum( c for _, c in top )
+            labels = [ fmt(v).strip() for v, _ in top ]
+            counts = [ c for _, c in top ]
+            if other > 0:
+                labels.append("(other)")
+                counts.append(other)
+        if summary.missing > 0 and len(labels) < height:
+            labels.append("(missing)")
+            counts.append(summary.missing)
+        return labels, counts
+
+
+    def __show_summary(self):
+        """
+        Shows a histogram or the most frequent values of the column at the
+        cursor, computed over the rows loaded so far.
+        """
+        if not self.__show_cursor:
+            self.flash = "Turn on the cursor to choose a column to summarize"
+            return
+        if self.__model.num_rows == 0:
+            self.flash = "No rows"
+            return
+
+        col = self.__get_cursor_col()
+        name = self.__model.names[col]
+        scr = self.__screen
+        attrs = self.__attrs
+        try:
+            while True:
+                summary, num_rows = self.__update_summary(
+                    col, time.time() + SUMMARY_SECS)
+                width = self.__screen_width
+                height = self.__screen_height
+                labels, counts = self.__format_summary(
+                    col, summary, height - 3)
+
+                scr.erase()
+                title = u"{}: {} of {} rows".format(
+                    "" if name is None else name,
+                    "histogram" if hasattr(summary, "bins") 
+                    else "most frequent values",
+                    num_rows)
+                if num_rows < self.__model.num_rows or not self.__model.done:
+                    title += " read so far"
+                if getattr(summary, "error", 0) > 0:
+                    title += u"; counts may be low by {}".format(summary.error)
+                scr.addnstr(
+                    0, 0, title.encode(self.__encoding), width, 
+                    attrs[0] | curses.A_BOLD)
+
+                label_width = min(
+                    max([ len(l) for l in labels ] + [1]), width // 3)
+                count_width = len(str(max(counts + [0])))
+                bar_width = max(width - label_width - count_width - 12, 1)
+                max_count = max(counts + [1])
+                for i, (label, count) in enumerate(zip(labels, counts)):
+                    label = text.palide(
+                        label, label_width, ellipsis=self.__cfg["ellipsis"])
+                    line = u"{} {:>{}d} {:5.1f}% ".format(
+                        label, count, count_width, 100 * count / num_rows)
+                    eighths = int(round(8 * bar_width * count / max_count))
+                    if count > 0:
+                        eighths = max(eighths, 1)
+                    bar = BAR_BLOCKS[-1] * (eighths // 8)
+                    if eighths % 8 > 0:
+                        bar += BAR_BLOCKS[eighths % 8]
+                    scr.addnstr(
+                        i + 2, 0, line.encode(self.__encoding), width, 
+                        attrs[0])
+                    if len(line) < width - 1:
+                        scr.addnstr(
+                            i + 2, len(line), bar.encode(self.__encoding), 
+                            width - len(line) - 1, attrs[1])
+
+                status = text.pad("Press any key when done.", width - 1)
+                scr.addnstr(
+                    height - 1, 0, status.encode(self.__encoding), width - 1, 
+                    attrs[3] | curses.A_REVERSE)
+
+                # Keep refining while waiting for a key, until caught up.
+                if num_rows < self.__model.num_rows:
+                    scr.timeout(0)
+                    c = scr.getch()
+                    scr.timeout(-1)
+                else:
+                    # Live input also ends the wait, to refine further.
+                    c = self.__getch()
+                if c == curses.KEY_RESIZE:
+                    self.__set_geometry()
+                elif c != -1:
+                    break
+        finally:
+            scr.timeout(-1)
+
+
+    def __prompt(self, prompt):
+        """
+        Reads a line of text entered in the bottom line.
+
+        @return
+          The text, or `None` if cancelled with escape.
+        """
+        y = self.__screen_height - 1
+        width = self.__screen_width - 1
+        result = ""
+        while True:
+            line = text.pad(prompt + result, width)[: width]
+            self.__screen.addnstr(
+                y, 0, line.encode(self.__encoding), width, 
+                self.__attrs[3] | curses.A_REVERSE)
+            c = self.__getch()
+            if c in (ord("\n"), ord("\r"), curses.KEY_ENTER):
+                return result
+            elif c == 27:
+                # Escape.
+                return None
+            elif c in (curses.KEY_BACKSPACE, 127, 8):
+                result = result[: -1]
+            elif 32 <= c < 127:
+                result += chr(c)
+
+
     def __toggle_cursor(self):
         self.__show_cursor = not self.__show_cursor
 
@@ -678,9 +2139,16 @@ class GridView:
         self.__set_geometry()
 
 
+    def __toggle_timing(self):
+        if self.__timer is None:
+            self.__timer = FrameTimer()
+        else:
+            self.__timer.show = not self.__timer.show
+
+
     def __change_size(self, dw):
         if self.__show_cursor:
-            _, col = self.__cursor
+            col = self.__get_cursor_col()
             formatter = self.__formatters[col]
             try:
                 size = formatter.size
@@ -693,7 +2161,7 @@ class GridView:
 
     def __change_precision(self, dp):
         if self.__show_cursor:
-            _, col = self.__cursor
+            col = self.__get_cursor_col()
             formatter = self.__formatters[col]
             try:
                 precision = formatter.precision
@@ -705,26 +2173,156 @@ class GridView:
                 self.__formatters[col] = formatter.changing(precision=precision)
 
 
+    def __cycle_datetime_format(self):
+        if self.__show_cursor:
+            col = self.__get_cursor_col()
+            formatter = self.__formatters[col]
+            try:
+                spec = formatter.spec
+            except AttributeError:
+                pass
+            else:
+                cycle = formatters.DATETIME_CYCLE
+                i = cycle.index(spec) if spec in cycle else -1
+                spec = cycle[(i + 1) % len(cycle)]
+                self.__formatters[col] = formatter.changing(spec=spec)
+
+
     def show(self):
+        if self.__timer is not None:
+            self.__timer.start_frame()
         while True:
             if self.__idx1 >= self.__model.num_rows:
-                self.__idx1 = self.__model.ensure_rows(self.__idx1)
+                self.__idx1 = self.__ensure_rows(self.__idx1)
                 self.__idx0 = min(self.__idx0, self.__idx1 - 1)
 
             self.__print()
+            if self.__timer is not None:
+                self.__timer.end_frame()
 
             self.lastChar = self._processKeyboard()
             if self.lastChar == ord('q') or self.lastChar == ord('Q'):
                 break
 
+        if self.__exporter is not None:
+            # Finish the export before leaving.
+            self.__exporter.run()
+
 
     def _processKeyboard(self):
-        c = self.__screen.getch()
+        c = self.__getch()
+        # The next frame starts once we have a key.
+        if self.__timer is not None:
+            self.__timer.start_frame()
         if c in self.keymap:
             self.keymap[c]()
         return c
 
 
+    def __getch(self):
+        """
+        Waits for a key.
+
+        While waiting, reads rows from the model's live input, if any, as they
+        arrive.
+
+        @return
+          The key, or -1 if rows arrived first.
+        """
+        scr = self.__screen
+        if self.__exporter is not None:
+            return self.__getch_exporting()
+        if self.__input_loop is None or self.__model.done:
+            return scr.getch()
+        while True:
+            # Curses may have buffered keys, so check before waiting.
+            scr.timeout(0)
+            try:
+                c = scr.getch()
+            finally:
+                scr.timeout(-1)
+            if c != -1:
+                return c
+            # Redraw for arriving input at most max_fps times a second.
+            if not self.__input_loop.wait(1 / float(self.__cfg["max_fps"])):
+                self.__ensure_rows(sys.maxsize)
+                if self.__follow:
+                    self.__move_to_end()
+                else:
+                    # Fill the screen, if it wasn't.
+                    self.__move_to(self.__idx0)
+                return -1
+
+
+    def __getch_exporting(self):
+        """
+        Exports rows until a key is ready, or for a while.
+
+        @return
+          The key, or -1 to redraw with the export's progress.
+        """
+        scr = self.__screen
+        exporter = self.__exporter
+        deadline = time.time() + EXPORT_SECS
+        scr.timeout(0)
+        try:
+            c = scr.getch()
+        finally:
+            scr.timeout(-1)
+        if c != -1:
+            return c
+        try:
+            while not exporter.step() and time.time() < deadline:
+                pass
+        except (IOError, OSError, ValueError) as exc:
+            exporter.close()
+            self.flash = "Export failed: {}".format(exc)
+            self.__exporter = None
+        else:
+            if exporter.done:
+                self.flash = "Exported {} rows to {}".format(
+                    exporter.num_rows, exporter.path)
+                self.__exporter = None
+        return -1
+
+
+    def __export(self):
+        """
+        Exports the model's rows, with the shown columns in order, to a file.
+        The export proceeds between keys.
+        """
+        from .export import Exporter
+
+        if self.__exporter is not None:
+            self.flash = "Already exporting to {}".format(self.__exporter.path)
+            return
+        path = self.__prompt("export to (.csv, .parquet, .feather): ")
+        if path is None or len(path.strip()) == 0:
+            return
+        try:
+            self.__exporter = Exporter(
+                self.__model, list(self.__columns), 
+                os.path.expanduser(path.strip()))
+        except (IOError, OSError, ValueError, ImportError) as exc:
+            self.flash = "Can't export: {}".format(exc)
+
+
+    def __ensure_rows(self, max_row):
+        """
+        Calls the model's `ensure_rows()`, timing it if enabled.
+        """
+        timer = self.__timer
+        if timer is None:
+            return self.__model.ensure_rows(max_row)
+
+        num_rows = self.__model.num_rows
+        start = timer.clock()
+        result = self.__model.ensure_rows(max_row)
+        timer.add("ensure_rows", timer.clock() - start)
+        timer.add_rows(self.__model.num_rows - num_rows)
+        return result
+
+
     def __do_search(self, dir):
         self.__screen.addstr(
             self.__screen_height - 1, 0, 
@@ -774,12 +2372,86 @@ class GridView:
 
 
     def __move_to_end(self):
-        idx = self.__model.ensure_rows(sys.maxsize)
+        model = self.__model
+        get_end_model = getattr(model, "get_end_model", None)
+        if get_end_model is not None and not model.done:
+            # Show the end without reading everything before it.
+            sub_model = get_end_model()
+            if sub_model is not None:
+                self.__show_sub_view(sub_model, at_end=True, close=True)
+                return
+        idx = self.__ensure_rows(sys.maxsize)
         self.__move_to(idx - self.__num_rows)
 
 
+    def __jump_to_percent(self):
+        percent = self.__prompt("jump to percent: ")
+        if percent is None or len(percent) == 0:
+            return
+        try:
+            fraction = clip(0, float(percent.rstrip("%")) / 100, 1)
+        except ValueError:
+            self.flash = "Not a percentage: {}".format(percent)
+            return
+
+        model = self.__model
+        total = getattr(model, "estimated_rows", None)
+        if model.done or total is None:
+            total = getattr(model, "base_row", 0) + (
+                model.num_rows if model.done else self.__ensure_rows(sys.maxsize))
+        self.__jump(
+            int(fraction * total), 
+            lambda: getattr(model, "get_model_at", lambda f: None)(fraction))
+
+
+    def __jump_to_row(self):
+        row = self.__prompt("jump to row: ")
+        if row is None or len(row) == 0:
+            return
+        try:
+            row = int(row)
+        except ValueError:
+            self.flash = "Not a row number: {}".format(row)
+            return
+
+        model = self.__model
+        self.__jump(
+            max(row, 0),
+            lambda: getattr(model, "get_model_at_row", lambda r: None)(row))
+
+
+    def __jump(self, row, get_sub_model):
+        """
+        Jumps to a row of the input.
+
+        If the row is past the rows read so far, and the input can be read
+        from the middle, shows a view from there instead of reading up to it.
+
+        @param row
+          The row index in the whole input.
+        @param get_sub_model
+          Function that returns a model of the input from the row, or `None`.
+        """
+        idx = row - getattr(self.__model, "base_row", 0)
+        if 0 <= idx < self.__model.num_rows:
+            self.__move_to(idx)
+            return
+        sub_model = None if self.__model.done else get_sub_model()
+        if sub_model is None:
+            # Read up to it.
+            self.__move_to(idx)
+        else:
+            self.__show_sub_view(sub_model, close=True)
+
+
     def __tail(self):
-        raise NotImplementedError("tail")
+        """
+        Toggles following rows, like "tail -f", as they arrive.
+        """
+        self.__follow = not self.__follow
+        if self.__follow:
+            self.__move_to_end()
+            self.flash = "Following new rows; press T to stop"
 
 
     def __print(self):
@@ -789,6 +2461,11 @@ class GridView:
         @param y
           The disply y position.
         """
+        timer   = self.__timer
+        clock   = time.time
+        start   = clock()
+        fetch_time = format_time = 0
+
         self.__screen.erase()
 
         width   = self.__screen_width
@@ -796,82 +2473,153 @@ class GridView:
         x       = 0
         y       = 0
         blank   = " " * width
-        attrs   = [ curses.color_pair(i) for i in range(1, 8) ]
+        attrs   = self.__attrs
+        is_ascii = text.is_ascii
 
         def write(string, attr):
+            # Clip by display width, so as not to split a wide character.
             length = width - x - (1 if y == height - 1 else 0)
-            self.__screen.addnstr(
-                y, x, string.encode(self.__encoding), length, attr)
-            return len(string)
+            string_width = (
+                len(string) if is_ascii(string) else text.width(string))
+            if string_width > length:
+                string = text.clip(string, length)
+            string = string.encode(self.__encoding)
+            self.__screen.addnstr(y, x, string, len(string), attr)
+            return string_width
 
         num_frozen  = self.__num_frozen
         col0        = self.__col0
-        num_cols    = len(self.__model.names)
+        columns     = self.__columns
+        num_cols    = len(columns)
         cursor      = self.__cursor
         
         show_cursor = self.__show_cursor
         sep         = self.__cfg["separator"]
         ellipsis    = self.__cfg["ellipsis"]
+        formatters  = self.__formatters
+
+        # Positions of the frozen columns, then those that fit at least
+        # partially, and the model columns shown at them.
+        positions = (
+            list(range(num_frozen)) 
+            + list(range(col0, min(self.__get_last_col() + 2, num_cols))))
+        cols = [ columns[p] for p in positions ]
 
         # Print title lines first.
         for line in self.__model.title_lines:
-            x = write(line)
+            x = 0
+            write(line, attrs[0])
             y += 1
 
-        # The header.
+        # The header, a line for each level of hierarchical columns.
         if as_bool(self.__cfg["show_header"]):
-            x = 0
-            for c in list(range(num_frozen)) + list(range(col0, num_cols)):
-                frozen = c < num_frozen
-                at_cursor = show_cursor and c == cursor[1]
-
-                col = self.__model.names[c]
-                col = "" if col is None else col
-                fmt = self.__formatters[c]
-                col = text.palide(
-                    col, fmt.width,
-                    ellipsis=ellipsis[: fmt.width], position=0.7, 
-                    left=True)
-
-                attr = (
-                    attrs[6] if frozen and at_cursor
-                    else attrs[4] if at_cursor
-                    else attrs[1] if frozen
-                    else attrs[0])
-                attr |= curses.A_UNDERLINE | curses.A_BOLD
-                x += write(col, attr)
-                if x >= width:
-                    break
-
-                x += write(sep, attrs[2])
-                if x >= width:
-                    break
-
-            # Next line.
-            y += 1
+            headers = [ self.__get_header(c) for c in cols ]
+            num_header = len(headers[0]) if len(headers) > 0 else 1
+            for l in range(num_header):
+                last = l == num_header - 1
+                x = 0
+                def grouped(j):
+                    # Whether a column is in the same group as the one before.
+                    return (
+                        not last and j > 0 
+                        and positions[j - 1] == positions[j] - 1
+                        and headers[j - 1][: l + 1] == headers[j][: l + 1])
+
+                for j, (p, c) in enumerate(zip(positions, cols)):
+                    if grouped(j):
+                        # Covered by the group's label.
+                        continue
+                    frozen = p < num_frozen
+                    at_cursor = show_cursor and p == cursor[1]
+
+                    # A group label spans the adjacent columns in the group.
+                    col_width = self.__formatters[c].width
+                    k = j + 1
+                    while k < len(cols) and grouped(k):
+                        col_width += len(sep) + self.__formatters[cols[k]].width
+                        k += 1
+                    col = headers[j][l]
+                    col = "" if col is None else six.text_type(col)
+                    col = text.palide(
+                        col, col_width,
+                        ellipsis=ellipsis[: col_width], position=0.7, 
+                        left=True)
+
+                    attr = (
+                        attrs[6] if frozen and at_cursor
+                        else attrs[4] if at_cursor
+                        else attrs[1] if frozen
+                        else attrs[0])
+                    attr |= curses.A_BOLD
+                    if last:
+                        attr |= curses.A_UNDERLINE
+                    x += write(col, attr)
+                    if x >= width:
+                        break
+
+                    x += write(sep, attrs[2])
+                    if x >= width:
+                        break
+
+                # Next line.
+                y += 1
+
+        # Data.  Fetch the rows, then format each column as a block.
+        time0 = clock()
+        idx1 = min(self.__idx0 + self.__num_rows, self.__model.num_rows)
+        rows = [ 
+            self.__model.get_row(i, cols) for i in range(self.__idx0, idx1) ]
+        time1 = clock()
+        # Format dictionary-encoded columns by their codes.
+        get_codes = getattr(self.__model, "get_codes", None)
+        blocks = []
+        for j, c in enumerate(cols):
+            encoded = (
+                None if get_codes is None 
+                else get_codes(c, self.__idx0, idx1))
+            blocks.append(
+                format_cells(formatters[c], [ r[j] for r in rows ])
+                if encoded is None
+                else format_codes(formatters[c], *encoded))
+        # Blank labels of a hierarchical index that repeat the row before.
+        get_repeated = getattr(self.__model, "get_repeated", None)
+        for j, c in enumerate(cols):
+            repeated = (
+                None if get_repeated is None
+                else get_repeated(c, self.__idx0, idx1))
+            if repeated is not None:
+                blank = " " * formatters[c].width
+                blocks[j] = [ 
+                    blank if r else b for r, b in zip(repeated, blocks[j]) ]
+        # Cells the model highlights, such as changed values.
+        get_highlighted = getattr(self.__model, "get_highlighted", None)
+        highlighted = [
+            set() if get_highlighted is None else get_highlighted(i)
+            for i in range(self.__idx0, idx1) ]
+        time2 = clock()
+        fetch_time += time1 - time0
+        format_time += time2 - time1
 
-        # Data.
         for i in range(self.__num_rows):
             x   = 0
             idx = self.__idx0 + i
-            row = (
-                self.__model.get_row(idx) 
-                if idx < self.__model.num_rows 
-                else None)
-            for c in list(range(num_frozen)) + list(range(col0, num_cols)):
-                frozen = c < num_frozen
-                at_cursor = show_cursor and (idx == cursor[0] or c == cursor[1])
-                at_select = show_cursor and (idx == cursor[0] and c == cursor[1])
-
-                if row is None:
-                    col = "~" if c == 0 else ""
-                else:
-                    col = self.__formatters[c](row[c])
+            if i < len(rows):
+                cells = [ b[i] for b in blocks ]
+                highlight = highlighted[i]
+            else:
+                cells = [ "~" if p == 0 else "" for p in positions ]
+                highlight = ()
+
+            for p, c, col in zip(positions, cols, cells):
+                frozen = p < num_frozen
+                at_cursor = show_cursor and (idx == cursor[0] or p == cursor[1])
+                at_select = show_cursor and (idx == cursor[0] and p == cursor[1])
 
                 attr = (
                     attrs[5] if at_select
                     else attrs[6] if frozen and at_cursor
                     else attrs[4] if at_cursor
+                    else attrs[7] if c in highlight
                     else attrs[1] if frozen
                     else attrs[0])
                 x += write(col, attr)
@@ -890,36 +2638,77 @@ class GridView:
         # Footer.
         if as_bool(self.__cfg["show_footer"]):
             x = 0
+            # Shown after the status; the filename is cut to leave room.
+            overlay = ""
+            if timer is not None and timer.show:
+                overlay = "  [{}]".format(timer.format_overlay(
+                    getattr(self.__model, "memory_size", None)))
             if self.flash is not None:
                 status = self.flash
                 self.flash = None
             else:
                 filename = six.text_type(self.__model.filename)
-                max_len = width - 40
+                max_len = width - 40 - len(overlay)
                 if len(filename) > max_len:
-                    filename = "..." + filename[-max_len + 3 :]
-                status = u("{}{}lines {}-{}/{}").format(
+                    filename = (
+                        "..." + filename[len(filename) - max_len + 3 :]
+                        if max_len > 3 else "")
+                # Models of part of an input may number rows approximately.
+                model = self.__model
+                base = getattr(model, "base_row", 0)
+                approx = "~" if getattr(model, "approximate", False) else ""
+                total = getattr(model, "estimated_rows", None)
+                if model.done:
+                    total = base + model.num_rows
+                    total_str = approx + str(total)
+                elif total is not None:
+                    total_str = "~{}".format(total)
+                else:
+                    total_str = "{}+".format(model.num_rows)
+                status = u("{}{}lines {}{}-{}/{}").format(
                     filename,
                     " " if len(filename) > 0 else "",
-                    self.__idx0,
-                    self.__idx1,
-                    self.__model.num_rows)
-                if self.__model.done:
-                    frac = self.__idx1 / self.__model.num_rows
-                    status += " {:.0f}%".format(100 * frac)
-                else:
-                    status += "+"
-            if self.__show_cursor:
+                    approx,
+                    base + self.__idx0,
+                    base + self.__idx1,
+                    total_str)
+                if total is not None:
+                    frac = (base + self.__idx1) / max(total, 1)
+                    status += " {:.0f}%".format(100 * min(frac, 1))
+            exporter = self.__exporter
+            if exporter is not None:
+                total = exporter.total
+                progress = (
+                    "{} rows".format(exporter.num_rows) if not total
+                    else "{:.0f}%".format(
+                        100 * min(exporter.num_rows / total, 1)))
+                # Elide the path to the room left.
+                room = (
+                    width - len(status) - len(overlay) - len(progress)
+                    - len("  [exporting  ]") - 1)
+                path = (
+                    text.elide(exporter.path, room, ellipsis=ellipsis)
+                    if room >= text.width(ellipsis) else "")
+                status += "  [exporting {}{}]".format(
+                    path + " " if len(path) > 0 else "", progress)
+            status += overlay
+            # Show the value at the cursor, if there's room.
+            room = width - len(status) - 4
+            if self.__show_cursor and room >= text.width(ellipsis):
                 r, c = self.__cursor
-                value = str(self.__model.get_row(r)[c])
-                value = text.elide(
-                    value, width - len(status) - 4, 
-                    ellipsis=self.__cfg["ellipsis"])
+                value = self.__model.get_row(r, [columns[c]])[0]
+                value = "" if value is None else str(value)
+                value = text.elide(value, room, ellipsis=ellipsis)
             else:
                 value = ""
             status += " " * (width - len(status) - len(value) - 1) + value
             x += write(status, attrs[3] | curses.A_REVERSE)
 
+        if timer is not None:
+            timer.add("fetch", fetch_time)
+            timer.add("format", format_time)
+            timer.add("output", clock() - start - fetch_time - format_time)
+
 
     def __show_help(self):
         bar = "-" * self.__screen_width
@@ -944,7 +2733,9 @@ class GridView:
             "  P                  Jump to first row and column",
             "  G                  Jump to last row of file",
             "  END                Jump to last row read so far",
-          # "  F                  Forward forever; like \"tail -f\" (not implemented)",
+            "  %                  Jump to a percentage of the way through the file",
+            "  :                  Jump to a row number",
+            "  T                  Toggle following new rows, like \"tail -f\"",
             "",
             bar,
             "",
@@ -959,6 +2750,21 @@ class GridView:
             "  .                  Decrease width of column at cursor",
             "  <                  Increase precision of column at cursor",
             "  >                  Decrease precision of column at cursor",
+            "  D                  Cycle datetime format of column at cursor",
+            "",
+            "  -                  Hide column at cursor",
+            "  +                  Show all hidden columns",
+            "  [                  Move column at cursor left",
+            "  ]                  Move column at cursor right",
+            "  J                  Jump to column by name",
+            "",
+            "  f                  Show histogram or top values of column at cursor",
+            "  A                  Aggregate by column at cursor",
+            "  o                  Show rows of group at cursor",
+            "",
+            "  t                  Toggle frame timing overlay",
+            "",
+            "  S                  Export rows and shown columns to a file",
             "",
           # "*                             SEARCHING",
           # "",
@@ -986,28 +2792,43 @@ class GridView:
                 width = self.__screen_width if i < self.__screen_height-1 else self.__screen_width - 1
                 self.__screen.addstr(i, 0, line[:width], mode)
 
-            if self.__screen.getch() == curses.KEY_RESIZE:
+            c = self.__getch()
+            if c == curses.KEY_RESIZE:
                 self.__set_geometry()
                 self.__screen.getch() # extra -1
-            else:
+            elif c != -1:
                 break
 
 
 
 #-------------------------------------------------------------------------------
 
-def show_model(model, cfg={}, num_frozen=0):
+def show_model(model, cfg={}, num_frozen=0, screen=None, timer=None,
+               input_loop=None):
     """
     Shows an interactive view of the model on a connected TTY.
 
     @type model
       A model instance from this module.
+    @param screen
+      A screen to use instead of the TTY, such as a `screen.VirtualScreen`.
+    @param timer
+      A `timing.FrameTimer` with which to time frames, or `None`.
+    @param input_loop
+      A `feed.InputLoop` that reads the model's live input, or `None`.
     """
     full_cfg = dict(DEFAULT_CFG)
     full_cfg.update(cfg)
     cfg = full_cfg
 
-    view = GridView(model, cfg, num_frozen=num_frozen)
+    view = GridView(
+        model, cfg, num_frozen=num_frozen, timer=timer, input_loop=input_loop)
+    if screen is not None:
+        attrs = [ screen.color_pair(i) for i in range(1, 9) ]
+        view.set_screen(screen, screen.encoding, attrs=attrs)
+        view.show()
+        return
+
     scr = curses.initscr()
 
     curses.start_color()
@@ -1019,6 +2840,7 @@ def show_model(model, cfg={}, num_frozen=0):
     curses.init_pair(5, curses.COLOR_BLACK, curses.COLOR_WHITE)     # cursor
     curses.init_pair(6, curses.COLOR_WHITE, curses.COLOR_BLUE)      # selection
     curses.init_pair(7, curses.COLOR_BLUE,  curses.COLOR_WHITE)     # frz sel
+    curses.init_pair(8, curses.COLOR_BLACK, curses.COLOR_YELLOW)    # highlight
 
     try:
         curses.noecho()
@@ -1038,6 +2860,20 @@ def show_dataframe(df, cfg={}, filename=None, **kw_args):
     Shows an interactive view of the dataframe on a connected TTY.
     """
     model = DataFrameModel(df, filename=filename)
+    # Freeze the index levels.
+    kw_args.setdefault("num_frozen", model.num_index_cols)
+    show_model(model, cfg, **kw_args)
+
+
+def show_array(arr, cfg={}, filename=None, **kw_args):
+    """
+    Shows an interactive view of a NumPy array on a connected TTY, without
+    copying it.
+
+    @param arr
+      A structured array, or a 1-D or 2-D array, possibly a `np.memmap`.
+    """
+    model = ArrayModel(arr, filename=filename)
     show_model(model, cfg, **kw_args)
 
 
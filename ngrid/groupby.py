@@ -0,0 +1,531 @@
+"""
+Models of groups of rows of another model, and of the rows in a group.
+"""
+
+#-------------------------------------------------------------------------------
+
+from   __future__ import absolute_import, division
+
+from   datetime import datetime
+import six
+
+import numpy as np
+
+from   . import grid
+
+#-------------------------------------------------------------------------------
+
+# Number of source rows to aggregate at once.
+AGG_CHUNK = 65536
+
+# Types of values in arrays, by dtype kind.
+KIND_TYPES = {
+    "b": bool,
+    "f": float,
+    "i": int,
+    "M": datetime,
+    "u": int,
+    }
+
+# Aggregates for each type of value column.
+AGGREGATES = {
+    int     : ("sum", "mean", "min", "max"),
+    float   : ("sum", "mean", "min", "max"),
+    datetime: ("min", "max"),
+    }
+
+# Values to choose formatters from, when there are no groups.
+EMPTY_VALUES = {
+    bool    : [False],
+    datetime: [np.datetime64("NaT", "ns")],
+    float   : [float("nan")],
+    int     : [0],
+    str     : [""],
+    }
+
+INT64_MIN = np.iinfo(np.int64).min
+INT64_MAX = np.iinfo(np.int64).max
+
+def _get_type(arr):
+    return KIND_TYPES.get(arr.dtype.kind, str)
+
+
+def get_columns(model, cols, start, stop):
+    """
+    Returns values of columns of a model for a range of rows.
+
+    Uses the model's `get_columns()` if it has one, and otherwise gets the rows
+    one at a time.
+
+    @return
+      An array for each column.
+    """
+    try:
+        get_columns = model.get_columns
+    except AttributeError:
+        rows = [ model.get_row(i, cols) for i in range(start, stop) ]
+        return [ np.array([ r[j] for r in rows ]) for j in range(len(cols)) ]
+    else:
+        return get_columns(cols, start, stop)
+
+
+def _get_key(value):
+    """
+    Returns a dict key for a key value.
+    """
+    # All NaNs are in the same group.
+    return None if value != value else value
+
+
+class _Aggregate:
+    """
+    Running aggregates of a value column, by group.
+    """
+
+    def __init__(self, type):
+        self.type = type
+        if type is float:
+            self.__dtype = np.float64
+            self.__lo, self.__hi = np.inf, -np.inf
+        else:
+            # Ints, bools, and datetimes as nanoseconds.
+            self.__dtype = np.int64
+            self.__lo, self.__hi = INT64_MAX, INT64_MIN
+        self.count  = np.zeros(0, dtype=np.int64)
+        self.sum    = np.zeros(0, dtype=self.__dtype)
+        self.min    = np.zeros(0, dtype=self.__dtype)
+        self.max    = np.zeros(0, dtype=self.__dtype)
+
+
+    def grow(self, num_groups):
+        """
+        Adds empty groups, up to `num_groups` in all.
+        """
+        num = num_groups - len(self.count)
+        if num > 0:
+            self.count  = np.concatenate([self.count, np.zeros(num, np.int64)])
+            self.sum    = np.concatenate(
+                [self.sum, np.zeros(num, self.__dtype)])
+            self.min    = np.concatenate(
+                [self.min, np.full(num, self.__lo, self.__dtype)])
+            self.max    = np.concatenate(
+                [self.max, np.full(num, self.__hi, self.__dtype)])
+
+
+    def update(self, groups, starts, values):
+        """
+        Accumulates values sorted by group.
+
+        @param groups
+          The distinct groups, in order.
+        @param starts
+          The index in `values` at which each group starts.
+        @param values
+          Values, sorted by group.
+        """
+        if self.type is datetime:
+            values = values.astype("datetime64[ns]").view(np.int64)
+            valid = values != INT64_MIN
+        elif self.type is float:
+            values = values.astype(np.float64)
+            valid = ~np.isnan(values)
+        else:
+            values = values.astype(np.int64)
+            valid = None
+
+        if valid is None:
+            self.count[groups] += np.diff(np.append(starts, len(values)))
+            lo = hi = total = values
+        else:
+            self.count[groups] += np.add.reduceat(valid.astype(np.int64), starts)
+            total = np.where(valid, values, 0)
+            lo = np.where(valid, values, self.__lo)
+            hi = np.where(valid, values, self.__hi)
+        if self.type is not datetime:
+            self.sum[groups] += np.add.reduceat(total, starts)
+        self.min[groups] = np.minimum(
+            self.min[groups], np.minimum.reduceat(lo, starts))
+        self.max[groups] = np.maximum(
+            self.max[groups], np.maximum.reduceat(hi, starts))
+
+
+    def get(self, name, group):
+        """
+        Returns an aggregate value for a group.
+        """
+        count = self.count[group]
+        if name == "sum":
+            return self.sum[group]
+        elif name == "mean":
+            return self.sum[group] / count if count > 0 else grid.NAN
+        elif count == 0:
+            return np.datetime64("NaT", "ns") if self.type is datetime \
+                   else grid.NAN
+        else:
+            value = (self.min if name == "min" else self.max)[group]
+            return value.view("datetime64[ns]") if self.type is datetime \
+                   else value
+
+
+
+class GroupByModel:
+    """
+    Data model of groups of rows of another model, by values of a key column.
+
+    Shows a row for each group, with the key, the number of rows, and
+    aggregates of each value column: sum, mean, min, and max of numbers, and
+    min and max of datetimes.  Missing values are ignored.  Groups appear in
+    the order their keys are first seen.
+
+    Aggregates the source rows in chunks, as it loads them.  Until the source
+    is read completely, the aggregates cover only the rows read so far.
+    """
+
+    title_lines = []
+
+    def __init__(self, model, key_col, value_cols=None):
+        """
+        @param model
+          The source model.
+        @param key_col
+          The index of the column to group by.
+        @param value_cols
+          Indices of columns to aggregate; if `None`, all numeric columns
+          other than the index columns of a dataframe.
+        """
+        if value_cols is None or len(value_cols) == 0:
+            sample = get_columns(
+                model, range(model.num_cols), 0, min(model.num_rows, 1))
+            num_index = getattr(model, "num_index_cols", 0)
+            value_cols = [
+                c for c, a in enumerate(sample)
+                if c != key_col and c >= num_index
+                and _get_type(a) in (bool, int, float) ]
+
+        self.__model        = model
+        self.__key_col      = key_col
+        self.__value_cols   = list(value_cols)
+        # Map from key to group index.
+        self.__groups       = {}
+        self.__keys         = []
+        self.__count        = np.zeros(0, dtype=np.int64)
+        self.__aggs         = None
+        # The group of each aggregated source row, as (start, groups) chunks.
+        self.__row_groups   = []
+        self.__num_aggregated = 0
+        self.__key_type     = None
+
+        self.filename = u"{} by {}".format(
+            model.filename, model.names[key_col])
+        self.done = False
+        self.aggregate(model.num_rows)
+
+
+    @property
+    def source(self):
+        return self.__model
+
+
+    @property
+    def key_col(self):
+        return self.__key_col
+
+
+    @property
+    def num_aggregated(self):
+        """
+        The number of source rows aggregated so far.
+        """
+        return self.__num_aggregated
+
+
+    def aggregate(self, max_row):
+        """
+        Aggregates source rows, loading them as needed, up to `max_row`.
+        """
+        model = self.__model
+        while self.__num_aggregated < max_row:
+            start = self.__num_aggregated
+            stop = min(start + AGG_CHUNK, max_row)
+            if stop > model.num_rows:
+                model.ensure_rows(stop)
+                stop = min(stop, model.num_rows)
+            if stop <= start:
+                break
+            self.__aggregate_chunk(start, stop)
+        self.done = model.done and self.__num_aggregated == model.num_rows
+
+
+    def __aggregate_chunk(self, start, stop):
+        cols = [self.__key_col] + self.__value_cols
+        arrays = get_columns(self.__model, cols, start, stop)
+        keys, values = arrays[0], arrays[1 :]
+        if self.__aggs is None:
+            # Bools are aggregated as ints.
+            types = [ _get_type(a) for a in values ]
+            self.__key_type = _get_type(keys)
+            self.__aggs = [
+                (_Aggregate(int if t is bool else t), c)
+                for t, c in zip(types, self.__value_cols)
+                ]
+
+        # Hash the distinct keys in this chunk.
+        if keys.dtype.kind == "O":
+            # Objects, such as strings mixed with missing values, may not be
+            # comparable, so hash them without sorting.
+            distinct = {}
+            inverse = np.fromiter(
+                ( distinct.setdefault(_get_key(k), len(distinct))
+                  for k in keys.tolist() ),
+                dtype=np.int64, count=len(keys))
+            uniq = np.empty(len(distinct), dtype=object)
+            uniq[:] = list(distinct)
+        else:
+            uniq, index, inverse = np.unique(
+                keys, return_index=True, return_inverse=True)
+            # Put the distinct keys in the order first seen.
+            seen = np.argsort(index, kind="stable")
+            rank = np.empty(len(seen), dtype=np.int64)
+            rank[seen] = np.arange(len(seen))
+            uniq = uniq[seen]
+            inverse = rank[inverse.ravel()]
+        groups = self.__groups
+        num_groups = len(groups)
+        ids = np.fromiter(
+            ( groups.setdefault(_get_key(k), len(groups)) 
+              for k in uniq.tolist() ),
+            dtype=np.int64, count=len(uniq))
+        # Keep the keys of new groups.  Several NaNs may map to one group.
+        new_ids, first = np.unique(ids, return_index=True)
+        self.__keys.extend(uniq[first[new_ids >= num_groups]])
+        row_groups = ids[inverse]
+        self.__row_groups.append((start, row_groups))
+
+        num_groups = len(self.__keys)
+        self.__count = np.concatenate([
+            self.__count,
+            np.zeros(num_groups - len(self.__count), dtype=np.int64)])
+        # Sort rows by group, to aggregate each group with `reduceat()`.
+        order = np.argsort(row_groups, kind="stable")
+        sorted_groups = row_groups[order]
+        starts = np.flatnonzero(np.diff(sorted_groups, prepend=-1))
+        chunk_groups = sorted_groups[starts]
+        self.__count[chunk_groups] += np.diff(
+            np.append(starts, len(sorted_groups)))
+        for (agg, _), vals in zip(self.__aggs, values):
+            if agg.type in AGGREGATES:
+                agg.grow(num_groups)
+                agg.update(chunk_groups, starts, vals[order])
+
+        self.__num_aggregated = stop
+
+
+    def find_rows(self, group, start=0):
+        """
+        Returns indices of aggregated source rows in a group.
+
+        @param start
+          The first source row to consider.
+        """
+        found = [
+            np.flatnonzero(g) + s
+            for s, g in (
+                (s, g == group) for s, g in self.__row_groups
+                if s + len(g) > start)
+            ]
+        found = (
+            np.concatenate(found) if len(found) > 0
+            else np.zeros(0, dtype=np.int64))
+        return found[found >= start]
+
+
+    def get_group_model(self, group):
+        """
+        Returns a model of the source rows in a group.
+        """
+        return FilteredModel(self, group)
+
+
+    def get_key(self, group):
+        return self.__keys[group]
+
+
+    @property
+    def __columns(self):
+        """
+        The aggregate, value column, and aggregate name of each column after
+        the key and count.
+        """
+        return [
+            (a, c, n)
+            for a, c in (self.__aggs or [])
+            for n in AGGREGATES.get(a.type, ())
+            ]
+
+
+    @property
+    def num_rows(self):
+        return len(self.__keys)
+
+
+    @property
+    def num_cols(self):
+        return 2 + len(self.__columns)
+
+
+    @property
+    def names(self):
+        names = self.__model.names
+        return (
+            (names[self.__key_col], "count")
+            + tuple( u"{} {}".format(names[c], n) for _, c, n in self.__columns ))
+
+
+    @property
+    def memory_size(self):
+        size = self.__count.nbytes + sum( g.nbytes for _, g in self.__row_groups )
+        for a, _ in self.__aggs or []:
+            size += a.count.nbytes + a.sum.nbytes + a.min.nbytes + a.max.nbytes
+        return size
+
+
+    def get_row(self, idx, cols=None):
+        """
+        @param cols
+          Indices of the columns to return, or `None` for all.
+        """
+        columns = self.__columns
+        if cols is None:
+            cols = range(self.num_cols)
+        return [
+            self.__keys[idx] if c == 0
+            else self.__count[idx] if c == 1
+            else columns[c - 2][0].get(columns[c - 2][2], idx)
+            for c in cols
+            ]
+
+
+    def ensure_rows(self, max_row):
+        # Aggregate rows the source has already loaded, then load more until
+        # there are enough groups.
+        model = self.__model
+        self.aggregate(model.num_rows)
+        while not self.done and self.num_rows <= max_row:
+            num_aggregated = self.__num_aggregated
+            self.aggregate(num_aggregated + AGG_CHUNK)
+            if self.__num_aggregated == num_aggregated:
+                # A live source has no more rows yet.
+                break
+        return min(max_row, self.num_rows)
+
+
+    def get_default_formatters(self, cfg={}):
+        columns = self.__columns
+        types = (
+            [self.__key_type or str, int]
+            + [ float if n == "mean" else a.type for a, _, n in columns ])
+        rows = [ self.get_row(i) for i in range(self.num_rows) ]
+        return [
+            grid.get_default_formatter(
+                t,
+                [ r[c] for r in rows ] if len(rows) > 0 else EMPTY_VALUES[t],
+                cfg)
+            for c, t in enumerate(types)
+            ]
+
+
+
+class FilteredModel:
+    """
+    Data model of the source rows in one group of a `GroupByModel`.
+    """
+
+    title_lines = []
+
+    def __init__(self, groups, group):
+        self.__groups   = groups
+        self.__group    = group
+        self.__model    = groups.source
+        self.__rows     = groups.find_rows(group)
+        self.__scanned  = groups.num_aggregated
+        self.done       = groups.done
+
+        key = groups.get_key(group)
+        self.filename   = u"{} {}={}".format(
+            self.__model.filename,
+            self.__model.names[groups.key_col],
+            six.text_type(key))
+
+
+    @property
+    def num_rows(self):
+        return len(self.__rows)
+
+
+    @property
+    def num_cols(self):
+        return self.__model.num_cols
+
+
+    @property
+    def names(self):
+        return self.__model.names
+
+
+    @property
+    def memory_size(self):
+        return self.__rows.nbytes
+
+
+    def get_row(self, idx, cols=None):
+        return self.__model.get_row(int(self.__rows[idx]), cols)
+
+
+    def get_columns(self, cols, start, stop):
+        """
+        Returns values of columns for a range of rows.
+
+        Gets the source rows from runs of at most `AGG_CHUNK` source rows at a
+        time.
+
+        @return
+          An array for each column.
+        """
+        rows = self.__rows[start : stop]
+        parts = []
+        i = 0
+        while i < len(rows):
+            lo = rows[i]
+            j = np.searchsorted(rows, lo + AGG_CHUNK)
+            arrays = get_columns(self.__model, cols, lo, rows[j - 1] + 1)
+            parts.append([ a[rows[i : j] - lo] for a in arrays ])
+            i = j
+        if len(parts) == 0:
+            return get_columns(self.__model, cols, 0, 0)
+        return [ np.concatenate(a) for a in zip(*parts) ]
+
+
+    def ensure_rows(self, max_row):
+        groups = self.__groups
+        while True:
+            if groups.num_aggregated > self.__scanned:
+                # Pick up rows in the group aggregated since.
+                rows = groups.find_rows(self.__group, self.__scanned)
+                self.__rows = np.concatenate([self.__rows, rows])
+                self.__scanned = groups.num_aggregated
+            self.done = groups.done
+            if self.done or len(self.__rows) > max_row:
+                break
+            num_aggregated = groups.num_aggregated
+            groups.aggregate(num_aggregated + AGG_CHUNK)
+            if groups.num_aggregated == num_aggregated:
+                # A live source has no more rows yet.
+                break
+        return min(max_row, self.num_rows)
+
+
+    def get_default_formatters(self, cfg={}):
+        return self.__model.get_default_formatters(cfg)
+
+
+
@@ -0,0 +1,361 @@
+"""
+Random access to rows of large delimited files, by byte offset.
+
+Jumping into the middle of a file seeks to a byte offset, then resyncs to the
+start of the next record.  Row numbers there are estimated from the sizes of
+rows sampled across the file, until a background indexer, which counts records
+from the start of the file, reaches that point and provides exact numbers.
+"""
+
+#-------------------------------------------------------------------------------
+
+from   __future__ import absolute_import, division
+
+import bisect
+import csv
+import mmap
+import os
+import threading
+
+import numpy as np
+
+from   . import grid
+
+#-------------------------------------------------------------------------------
+
+# Bytes to read after an offset when resyncing to a record boundary.
+RESYNC_BYTES = 1 << 16
+
+# Number of records to parse when resyncing.
+RESYNC_ROWS = 16
+
+# Number and size of samples from which to estimate row sizes.
+NUM_SAMPLES = 16
+SAMPLE_BYTES = 1 << 16
+
+# Size of chunks in which the indexer counts records.
+INDEX_CHUNK = 16 << 20
+
+#-------------------------------------------------------------------------------
+
+def find_record_start(file, offset, delimiter, num_cols, comment_prefix=None,
+                      encoding="utf-8", quotechar=grid.QUOTE_CHAR):
+    """
+    Finds the start of the first record at or after a byte offset.
+
+    Without reading from the start of the file, we don't know whether
+    `offset` is inside a quoted field.  A newline ends a record if the number
+    of quotes before it, plus one if `offset` is inside quotes, is even.  Tries
+    both cases, splits the following bytes into records accordingly, and takes
+    the case in which more records parse to a single row of `num_cols` fields.
+
+    @param file
+      A seekable file open in binary mode.
+    @return
+      The offset of the record start, or `None` if there is no line start
+      after `offset`.
+    """
+    if offset <= 0:
+        return 0
+    start = offset - 1
+    file.seek(start)
+    data = file.read(RESYNC_BYTES)
+    # Unless we're at the end of the file, the last line may be cut off.
+    end = len(data) if len(data) < RESYNC_BYTES else data.rfind(b"\n") + 1
+    quote = quotechar.encode("ascii")
+
+    # Newlines, and the number of quotes before each.
+    newlines = []
+    quotes = 0
+    pos = data.find(b"\n", 0, end)
+    while pos >= 0:
+        quotes += data.count(quote, newlines[-1][0] if newlines else 0, pos)
+        newlines.append((pos, quotes))
+        pos = data.find(b"\n", pos + 1, end)
+    if len(newlines) == 0 or newlines[0][0] + 1 >= len(data):
+        return None
+
+    def parses(record):
+        lines = [
+            l for l in (
+                grid.DelimitedFileModel.clean_line(l)
+                for l in record.decode(encoding, "replace").splitlines() )
+            if comment_prefix is None or not l.startswith(comment_prefix) ]
+        if len(lines) == 0:
+            return None
+        try:
+            rows = list(grid._make_csv_reader(lines, delimiter, quotechar))
+        except csv.Error:
+            return False
+        return len(rows) == 1 and len(rows[0]) == num_cols
+
+    best = None
+    for inside in (0, 1):
+        ends = [ p for p, q in newlines if (q + inside) % 2 == 0 ]
+        if len(ends) == 0:
+            continue
+        records = (
+            data[a + 1 : b + 1] 
+            for a, b in zip(ends[: RESYNC_ROWS], ends[1 : RESYNC_ROWS + 1]) )
+        score = sum( parses(r) is True for r in records )
+        if best is None or score > best[0]:
+            best = score, ends[0] + 1
+    # If neither case parses, take the next line.
+    return start + (newlines[0][0] + 1 if best is None else best[1])
+
+
+class RowDensity:
+    """
+    Estimates the number of rows in parts of a file, from samples of the sizes
+    of its rows.
+
+    Splits the data into `NUM_SAMPLES` equal segments, and reads a sample from
+    the start of each to estimate its average row size.
+    """
+
+    def __init__(self, file, start, size, num_samples=NUM_SAMPLES,
+                 sample_bytes=SAMPLE_BYTES):
+        """
+        @param file
+          A seekable file open in binary mode.
+        @param start
+          The offset of the first row.
+        @param size
+          The size of the file.
+        """
+        num_samples = max(1, min(num_samples, size - start))
+        self.bounds = [
+            start + (size - start) * i // num_samples
+            for i in range(num_samples + 1) ]
+        self.row_sizes = []
+        for lo, hi in zip(self.bounds[: -1], self.bounds[1 :]):
+            file.seek(lo)
+            data = file.read(min(sample_bytes, hi - lo))
+            self.row_sizes.append(len(data) / max(data.count(b"\n"), 1))
+
+
+    def rows_between(self, lo, hi):
+        """
+        Returns the estimated number of rows between two offsets.
+        """
+        rows = 0
+        for (a, b), row_size in zip(
+                zip(self.bounds[: -1], self.bounds[1 :]), self.row_sizes):
+            overlap = min(b, hi) - max(a, lo)
+            if overlap > 0:
+                rows += overlap / row_size
+        return rows
+
+
+    def find_offset(self, lo, rows):
+        """
+        Returns the estimated offset of the row `rows` rows after `lo`.
+        """
+        for (a, b), row_size in zip(
+                zip(self.bounds[: -1], self.bounds[1 :]), self.row_sizes):
+            if b <= lo:
+                continue
+            span = (b - max(a, lo)) / row_size
+            if rows <= span:
+                return int(max(a, lo) + rows * row_size)
+            rows -= span
+        return self.bounds[-1]
+
+
+
+class RowIndexer(threading.Thread):
+    """
+    Counts records in a file in the background, to number rows exactly.
+
+    A newline ends a record if the number of quote characters before it is
+    even.  Lines that start with the comment prefix aren't rows.  Every
+    `INDEX_CHUNK` bytes, records a checkpoint of the offset, the number of
+    rows before it, and the parity of quotes before it.  From a checkpoint,
+    rows up to any offset are counted by scanning at most one chunk.
+
+    Row numbers and offsets are available only up to `indexed`, the offset
+    through which the file has been scanned so far.
+    """
+
+    def __init__(self, path, start, comment_prefix=None,
+                 quotechar=grid.QUOTE_CHAR):
+        """
+        @param start
+          The offset of the first row.
+        """
+        threading.Thread.__init__(self, name="ngrid indexer")
+        self.daemon = True
+
+        self.__file     = open(path, "rb")
+        self.__size     = os.fstat(self.__file.fileno()).st_size
+        self.__buf      = (
+            mmap.mmap(self.__file.fileno(), 0, access=mmap.ACCESS_READ)
+            if self.__size > 0 else b"")
+        self.__start    = start
+        self.__prefix   = (
+            None if comment_prefix is None
+            else comment_prefix.encode("utf-8"))
+        self.__quote    = quotechar.encode("ascii")
+        self.__stop     = threading.Event()
+        self.__lock     = threading.Lock()
+        # Checkpoints: offsets, numbers of rows that start before them, and
+        # parities of quotes before them.
+        self.__offsets  = [start]
+        self.__rows     = [0]
+        self.__parities = [0]
+        self.indexed    = start
+        self.done       = start >= self.__size
+
+
+    @property
+    def num_rows(self):
+        """
+        The number of rows in the file, once done, else `None`.
+        """
+        if not self.done:
+            return None
+        return self.__rows[-1] + (1 if self.__size > self.__start else 0)
+
+
+    def __record_ends(self, lo, hi, parity):
+        """
+        Finds newlines that end records and precede rows.
+
+        @return
+          Offsets of the newlines in `[lo, hi)`, and the parity of quotes
+          before `hi`.
+        """
+        data = self.__buf[lo : hi]
+        num_quotes = data.count(self.__quote)
+        if num_quotes == 0 and parity == 1:
+            # All inside a quoted field.
+            ends = np.zeros(0, dtype=np.int64)
+        else:
+            arr = np.frombuffer(data, dtype=np.uint8)
+            ends = np.flatnonzero(arr == ord("\n"))
+            if num_quotes > 0:
+                quotes = np.flatnonzero(arr == ord(self.__quote))
+                ends = ends[(np.searchsorted(quotes, ends) + parity) % 2 == 0]
+            ends += lo
+        # The last newline in the file precedes no row.
+        ends = ends[ends + 1 < self.__size]
+        if self.__prefix is not None and len(ends) > 0:
+            # Don't count newlines followed by comment lines.
+            buf = np.frombuffer(
+                self.__buf[lo : hi + len(self.__prefix) + 1], dtype=np.uint8)
+            comment = np.ones(len(ends), dtype=bool)
+            for i, c in enumerate(bytearray(self.__prefix)):
+                pos = ends - lo + 1 + i
+                valid = pos < len(buf)
+                comment &= valid
+                comment[valid] &= buf[pos[valid]] == c
+            ends = ends[~comment]
+        return ends, (parity + num_quotes) % 2
+
+
+    def __count(self, lo, hi, parity):
+        """
+        Counts record ends in `[lo, hi)`, as `__record_ends()`.
+        """
+        if self.__prefix is None and parity == 0:
+            data = self.__buf[lo : hi]
+            num_quotes = data.count(self.__quote)
+            if num_quotes == 0:
+                # Fast path: every newline ends a record.
+                count = data.count(b"\n")
+                if hi >= self.__size and self.__size > 0 \
+                   and self.__buf[self.__size - 1 : self.__size] == b"\n":
+                    count -= 1
+                return count, 0
+        ends, parity = self.__record_ends(lo, hi, parity)
+        return len(ends), parity
+
+
+    def run(self):
+        lo = self.__start
+        rows, parity = 0, 0
+        while lo < self.__size and not self.__stop.is_set():
+            hi = min(lo + INDEX_CHUNK, self.__size)
+            count, parity = self.__count(lo, hi, parity)
+            rows += count
+            with self.__lock:
+                self.__offsets.append(hi)
+                self.__rows.append(rows)
+                self.__parities.append(parity)
+                self.indexed = hi
+            lo = hi
+        self.done = lo >= self.__size
+
+
+    def stop(self):
+        self.__stop.set()
+
+
+    def close(self):
+        """
+        Stops indexing, and releases the file.  The indexer can't be used
+        afterward.
+        """
+        self.stop()
+        if self.ident is not None:
+            self.join()
+        if not isinstance(self.__buf, bytes):
+            self.__buf.close()
+        self.__buf = b""
+        self.__file.close()
+
+
+    def __get_checkpoint(self, offset):
+        with self.__lock:
+            i = bisect.bisect_right(self.__offsets, offset) - 1
+            return self.__offsets[i], self.__rows[i], self.__parities[i]
+
+
+    def rows_before(self, offset):
+        """
+        Returns the number of rows that start before `offset`, or `None` if
+        the file isn't indexed that far.
+        """
+        if offset <= self.__start:
+            return 0
+        if offset > self.indexed:
+            return None
+        # Count newlines before the last byte before the offset.
+        lo, rows, parity = self.__get_checkpoint(offset - 1)
+        count, _ = self.__count(lo, offset - 1, parity)
+        return 1 + rows + count
+
+
+    def find_row(self, row):
+        """
+        Returns the offset of row number `row`, or `None` if the file isn't
+        indexed that far.
+        """
+        if row == 0:
+            return self.__start
+        with self.__lock:
+            # The last checkpoint with fewer rows before it.
+            i = bisect.bisect_left(self.__rows, row) - 1
+            if i + 1 >= len(self.__offsets):
+                return None
+            lo, rows, parity = (
+                self.__offsets[i], self.__rows[i], self.__parities[i])
+            hi = self.__offsets[i + 1]
+        ends, _ = self.__record_ends(lo, hi, parity)
+        return int(ends[row - rows - 1]) + 1
+
+
+    def find_record_start(self, offset):
+        """
+        Returns the offset of the first row that starts at or after `offset`,
+        or `None` if the file isn't indexed that far.
+        """
+        if offset <= self.__start:
+            return self.__start
+        rows = self.rows_before(offset)
+        if rows is None:
+            return None
+        return self.find_row(rows)
+
+
+
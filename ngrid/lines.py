@@ -0,0 +1,180 @@
+"""
+Line-oriented input with byte offsets.
+"""
+
+#-------------------------------------------------------------------------------
+
+from   __future__ import absolute_import
+
+import codecs
+import os
+
+#-------------------------------------------------------------------------------
+
+# Number of bytes from the start of the input to examine for its encoding.
+SAMPLE_BYTES = 65536
+
+def read_sample(file, size=SAMPLE_BYTES):
+    """
+    Returns bytes from the start of a binary file, without consuming them.
+
+    Reads a seekable file and seeks back.  Peeks an unseekable buffered file,
+    such as a terminal, which returns only the bytes buffered so far.
+
+    @return
+      Up to `size` bytes.
+    """
+    try:
+        seekable = file.seekable()
+    except (AttributeError, IOError, OSError, ValueError):
+        seekable = False
+    if seekable:
+        offset = file.tell()
+        sample = file.read(size)
+        file.seek(offset)
+        return sample
+    peek = getattr(file, "peek", None)
+    return b"" if peek is None else peek(size)[: size]
+
+
+def detect_encoding(sample, default=None):
+    """
+    Guesses the encoding of input from a sample of its bytes.
+
+    A UTF-8 byte order mark identifies UTF-8, which is skipped when decoding.
+    Otherwise, a sample that is valid UTF-8, possibly ending in the middle of
+    a character, is UTF-8.  Otherwise, the default encoding is used if it
+    decodes the sample; failing that, Latin-1, which decodes any bytes.
+
+    @param default
+      The encoding to try for input that isn't UTF-8, such as the locale's,
+      or `None`.
+    """
+    if sample.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+    except UnicodeDecodeError:
+        pass
+    else:
+        return "utf-8"
+    if default is not None and codecs.lookup(default).name != "utf-8":
+        try:
+            sample.decode(default)
+        except UnicodeDecodeError:
+            pass
+        else:
+            return default
+    return "latin-1"
+
+
+class LineReader:
+    """
+    Reads lines from a binary file, decoding them and tracking byte offsets.
+
+    Iterating produces decoded lines.  After each line, `line_offset` is the
+    byte offset at which that line started, and `offset` is the byte offset of
+    the next line.
+    """
+
+    def __init__(self, file, encoding="utf-8", errors="replace"):
+        """
+        @param file
+          A file object open in binary mode.
+        """
+        try:
+            offset = file.tell()
+        except (AttributeError, IOError, OSError):
+            offset = 0
+
+        self.__file         = file
+        self.__encoding     = encoding
+        self.__errors       = errors
+        self.offset         = offset
+        self.line_offset    = None
+
+
+    @property
+    def name(self):
+        return getattr(self.__file, "name", None)
+
+
+    @property
+    def encoding(self):
+        return self.__encoding
+
+
+    @property
+    def seekable(self):
+        """
+        True if the underlying file supports random access.
+        """
+        try:
+            return self.__file.seekable()
+        except AttributeError:
+            # Python 2 file objects don't have seekable().
+            try:
+                self.__file.seek(self.__file.tell())
+            except (IOError, OSError):
+                return False
+            else:
+                return True
+        except (IOError, OSError, ValueError):
+            return False
+
+
+    @property
+    def size(self):
+        """
+        The size of the underlying file in bytes, or `None` if unknown.
+        """
+        try:
+            return os.fstat(self.__file.fileno()).st_size or None
+        except (AttributeError, IOError, OSError, ValueError):
+            return None
+
+
+    def __iter__(self):
+        return self
+
+
+    def __next__(self):
+        line = self.__file.readline()
+        if len(line) == 0:
+            raise StopIteration
+        self.line_offset = self.offset
+        self.offset += len(line)
+        return line.decode(self.__encoding, self.__errors)
+
+
+    next = __next__
+
+
+    def seek(self, offset):
+        """
+        Repositions the reader so that the next line starts at `offset`.
+        """
+        self.__file.seek(offset)
+        self.offset = offset
+        self.line_offset = None
+
+
+    def reopen(self):
+        """
+        Opens an independent reader on the same file, for random access.
+
+        @raise IOError
+          The file is not a seekable named file.
+        """
+        if self.name is None or not self.seekable:
+            raise IOError("not a seekable file: {}".format(self.name))
+        reader = self.__class__(
+            open(self.name, "rb"), self.__encoding, self.__errors)
+        return reader
+
+
+    def close(self):
+        self.__file.close()
+
+
+
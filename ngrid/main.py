@@ -5,11 +5,33 @@ from   contextlib import closing
 import locale
 import optparse
 import os
+import stat
 import sys
 
 import six
 
 from   . import grid
+from   .cache import DEFAULT_MAX_SIZE, SidecarCache
+from   .config import load_config
+from   .lines import LineReader, detect_encoding, read_sample
+from   .timing import FrameTimer
+
+# Modules needed only by some options, such as `.diff`, `.multi`, and
+# `pstats`, are imported where they're used, to start up faster.
+
+#-------------------------------------------------------------------------------
+
+# Numeric display parameters: the type of each, and whether it must be
+# positive, rather than not negative.
+NUMERIC_CFG = {
+    "max_fps"           : (float, True),
+    "precision_max"     : (int, False),
+    "precision_min"     : (int, False),
+    "scientific_max"    : (float, False),
+    "scientific_min"    : (float, False),
+    "str_width_max"     : (int, True),
+    "str_width_min"     : (int, True),
+    }
 
 #-------------------------------------------------------------------------------
 
@@ -37,6 +59,49 @@ class OutputSaver:
 
 
 
+def apply_settings(parser, settings):
+    """
+    Sets defaults of command line options from config settings.
+
+    @param settings
+      Dict of settings, by option long name or display parameter.
+    @return
+      Dict of the display parameters among the settings.
+    @raise ValueError
+      A setting is unknown, or its value is invalid.
+    """
+    settings = dict(settings)
+    for option in parser.option_list:
+        name = option.get_opt_string()[2 :]
+        if name not in settings or option.dest is None:
+            continue
+        value = settings.pop(name)
+        if option.action == "store_true":
+            value = grid.as_bool(value)
+        elif option.action == "store_false":
+            value = not grid.as_bool(value)
+        else:
+            try:
+                value = option.check_value("--" + name, value)
+            except optparse.OptionValueError as exc:
+                raise ValueError(str(exc))
+        parser.set_defaults(**{option.dest: value})
+    for name, value in settings.items():
+        if name not in grid.DEFAULT_CFG:
+            raise ValueError("unknown setting: {}".format(name))
+        if name in NUMERIC_CFG:
+            type, positive = NUMERIC_CFG[name]
+            try:
+                number = type(value)
+            except ValueError:
+                number = None
+            if number is None or not (number > 0 if positive else number >= 0):
+                raise ValueError("invalid {}: {}".format(name, value))
+        elif name.startswith("show_"):
+            grid.as_bool(value)
+    return settings
+
+
 #-------------------------------------------------------------------------------
 
 def main():
@@ -64,6 +129,20 @@ def main():
         action="store", type="int", dest="bufferSize",
         help=("read NROWS rows to guess data types [default: 100]"))
 
+    parser.set_defaults(maxRows=grid.MAX_ROWS)
+    parser.add_option(
+        "--max_rows", metavar="NROWS",
+        action="store", type="int", dest="maxRows",
+        help=("keep at most about NROWS rows in memory, or 0 for no limit "
+              "[default: {}]".format(grid.MAX_ROWS)))
+
+    parser.set_defaults(readAhead=grid.READ_AHEAD)
+    parser.add_option(
+        "--read_ahead", metavar="NROWS",
+        action="store", type="int", dest="readAhead",
+        help=("read NROWS rows ahead of those shown [default: {}]"
+              .format(grid.READ_AHEAD)))
+
     parser.add_option(
         "-d", "--delimiter", metavar="CHAR",
         action="store", type="string", dest="delim",
@@ -74,54 +153,272 @@ def main():
         action="store", type="string", dest="commentString",
         help=("treat lines starting with PREFIX as comments"))
 
+    parser.add_option(
+        "-e", "--encoding", metavar="NAME",
+        action="store", type="string", dest="encoding", default=None,
+        help=("decode input with encoding NAME [default: detect UTF-8, else "
+              "the locale encoding or Latin-1]"))
+
     parser.add_option(
         "-D", "--dataframe",
         action="store_true", dest="dataframe", default=False,
         help=("load input into dataframe"))
 
+    parser.add_option(
+        "-z", "--time_zone", metavar="TZ",
+        action="store", type="string", dest="timeZone", default=None,
+        help=("show times in time zone TZ [default: UTC]"))
+
+    parser.add_option(
+        "-j", "--jobs", metavar="NPROC",
+        action="store", type="int", dest="jobs", default=None,
+        help=("parse the whole file in NPROC parallel processes"))
+
+    parser.add_option(
+        "--listen", metavar="ADDR",
+        action="store", type="string", dest="listen", default=None,
+        help=("read rows from connections to ADDR, a HOST:PORT or the path of "
+              "a Unix socket"))
+
+    parser.add_option(
+        "--diff",
+        action="store_true", dest="diff", default=False,
+        help=("compare two input files side by side, highlighting changes"))
+
+    parser.add_option(
+        "--key", metavar="COL",
+        action="store", type="string", dest="key", default=None,
+        help=("with --diff, align rows by values of column COL, rather than "
+              "by position"))
+
+    parser.add_option(
+        "--rtol", metavar="TOL",
+        action="store", type="float", dest="rtol", default=0,
+        help=("with --diff, treat numbers within relative tolerance TOL as "
+              "the same [default: 0]"))
+
+    parser.add_option(
+        "--atol", metavar="TOL",
+        action="store", type="float", dest="atol", default=0,
+        help=("with --diff, treat numbers within absolute tolerance TOL as "
+              "the same [default: 0]"))
+
+    parser.add_option(
+        "--changes_only",
+        action="store_true", dest="changesOnly", default=False,
+        help=("with --diff, show only rows that differ"))
+
+    parser.add_option(
+        "--cache",
+        action="store_true", dest="cache", default=False,
+        help=("cache the file index and display parameters, to reopen the "
+              "same file faster"))
+
+    parser.set_defaults(cacheSize=DEFAULT_MAX_SIZE >> 20)
+    parser.add_option(
+        "--cache_size", metavar="MB",
+        action="store", type="int", dest="cacheSize",
+        help=("limit the --cache directory to MB megabytes [default: {}]"
+              .format(DEFAULT_MAX_SIZE >> 20)))
+
+    parser.add_option(
+        "--timing",
+        action="store_true", dest="timing", default=False,
+        help=("show frame timings in the footer, and print a summary on exit"))
+
+    parser.add_option(
+        "--profile", metavar="FILE",
+        action="store", type="string", dest="profile", default=None,
+        help=("profile with cProfile, and write stats to FILE on exit"))
+
+    options, args = parser.parse_args()
+    # Settings from the config file, including profiles that match the first
+    # input file, are defaults for options not given on the command line.
+    try:
+        settings = apply_settings(
+            parser, load_config(args[0] if len(args) > 0 else None))
+    except ValueError as exc:
+        parser.error("config: {}".format(exc))
     options, args = parser.parse_args()
 
-    # Use the locale encoding to decode input files.
-    encoding = locale.getpreferredencoding()
-    if encoding.lower() == "utf-8":
+    # Expand globs that the shell didn't, such as quoted ones.
+    paths = []
+    for arg in args:
+        if any( c in arg for c in "*?[" ) and not os.path.exists(arg):
+            import glob
+            matches = sorted(glob.glob(arg))
+            if len(matches) == 0:
+                parser.error("no files match {}".format(arg))
+            paths.extend(matches)
+        else:
+            paths.append(arg)
+    args = paths
+    if options.dataframe and len(args) > 1:
+        parser.error("--dataframe requires a single input file")
+    if options.diff and (len(args) != 2 or options.dataframe):
+        parser.error("--diff requires two input files, and no --dataframe")
+    if not options.diff and (
+            options.key is not None or options.changesOnly
+            or options.rtol or options.atol):
+        parser.error(
+            "--key, --rtol, --atol, and --changes_only require --diff")
+    if options.listen is not None and (
+            len(args) > 0 or options.dataframe or not six.PY3):
+        parser.error(
+            "--listen requires Python 3, and no input file or --dataframe")
+
+    if options.encoding is not None:
+        try:
+            codecs.lookup(options.encoding)
+        except LookupError:
+            parser.error("unknown encoding: {}".format(options.encoding))
+
+    cfg = dict(grid.DEFAULT_CFG)
+    cfg.update(settings)
+    if options.timeZone is not None:
+        cfg["time_zone"] = options.timeZone
+
+    def get_encoding(file=None):
+        # Unless given, detect the encoding of each input file from its start.
+        if options.encoding is not None:
+            return options.encoding
+        elif file is not None:
+            return detect_encoding(
+                read_sample(file), default=locale.getpreferredencoding())
+        # Live input can't be examined in advance, so use the locale encoding.
+        encoding = locale.getpreferredencoding()
         # Force utf-8-sig to skip BOM.
-        encoding = "utf-8-sig"
+        return "utf-8-sig" if encoding.lower() == "utf-8" else encoding
 
     # Prepare the input file.
-    if len(args) < 1:
+    input_loop = None
+    if options.listen is not None:
+        from .feed import InputLoop
+        # Curses reads keys from fd 0.
+        input_loop = InputLoop(key_fd=0)
+        file = input_loop.listen(
+            options.listen, get_encoding(), skip_headers=options.hasHeader)
+        filename = options.listen
+        cache = None
+    elif len(args) < 1:
         # Read from stdin.
-        if six.PY2:
-            file = os.fdopen(os.dup(0), 'r')
-            file = codecs.getreader(encoding)(file)
-        else:
-            file = os.fdopen(os.dup(0), 'r', encoding=encoding)
+        file = os.fdopen(os.dup(0), 'rb')
         os.close(0)
         # Attach stdin to tty for interactive input.
         sys.stdin = os.open("/dev/tty", os.O_RDONLY)
         filename = "(stdin)"
+        cache = None
     else:
         # Open an input file.
         filename = args[0]
-        if six.PY2:
-            file = open(filename, "rb")
-            file = codecs.getreader(encoding)(file)
-        else:
-            file = open(filename, encoding=encoding)
+        file = open(filename, "rb")
+        cache = (
+            SidecarCache(max_size=options.cacheSize << 20) if options.cache 
+            else None)
+
+    # Read a pipe as it's written to, while showing the grid.
+    if (input_loop is None and not options.dataframe and six.PY3
+        and stat.S_ISFIFO(os.fstat(file.fileno()).st_mode)):
+        from .feed import InputLoop
+        input_loop = InputLoop(key_fd=0)
 
     with closing(file):
+        # A live feed reads the pipe directly, so don't buffer any of it.
+        encoding = get_encoding(None if input_loop is not None else file)
         if options.dataframe:
             import pandas
-            df = pandas.read_csv(file)
+            df = pandas.read_csv(file, encoding=encoding)
             model = grid.DataFrameModel(df, filename=filename)
         else:
+            cached = None if cache is None else cache.load(filename)
+            if options.listen is not None:
+                lines = file
+            elif input_loop is not None:
+                lines = input_loop.open_pipe(file, encoding)
+            else:
+                lines = LineReader(file, encoding)
             model = grid.DelimitedFileModel(
-                file, options.hasHeader, options.bufferSize, options.delim,
-                options.commentString, filename=filename)
+                lines, options.hasHeader, 
+                options.bufferSize, options.delim, options.commentString, 
+                filename=filename, cached=cached, 
+                max_rows=options.maxRows or None, 
+                read_ahead=options.readAhead)
+            if options.jobs is not None and len(args) > 0 and cached is None:
+                model.load_parallel(options.jobs)
+
+            if len(args) > 1:
+                def open_model(path, types):
+                    # Opens each further file as it's needed.
+                    cached = None if cache is None else cache.load(path)
+                    file = open(path, "rb")
+                    try:
+                        model = grid.DelimitedFileModel(
+                            LineReader(file, get_encoding(file)), 
+                            options.hasHeader, options.bufferSize, 
+                            options.delim, options.commentString, 
+                            filename=path, cached=cached, 
+                            max_rows=options.maxRows or None, types=types,
+                            read_ahead=options.readAhead)
+                    except EOFError:
+                        file.close()
+                        raise
+                    if options.jobs is not None and cached is None:
+                        model.load_parallel(options.jobs)
+                    return model
+
+                if options.diff:
+                    from .diff import DiffModel
+                    model = DiffModel(
+                        model, open_model(args[1], None), key=options.key,
+                        rtol=options.rtol, atol=options.atol,
+                        changes_only=options.changesOnly)
+                else:
+                    from .multi import ConcatModel, FileSet
+                    model = ConcatModel(
+                        FileSet(args, open_model), first=model)
 
         # Show the grid.  But while we're in ncurses, capture stdout and stderr
         # for debugging, and show it at the end.
+        timer = FrameTimer() if options.timing else None
+        if options.profile is None:
+            profiler = None
+        else:
+            import cProfile
+            profiler = cProfile.Profile()
+        # Also freeze the status column of a diff.
+        num_frozen = options.frozenCols + (1 if options.diff else 0)
+
         with closing(OutputSaver()):
-            grid.show_model(model, num_frozen=options.frozenCols)
+            if profiler is not None:
+                profiler.enable()
+            try:
+                grid.show_model(
+                    model, cfg, num_frozen=num_frozen, timer=timer,
+                    input_loop=input_loop)
+            finally:
+                if profiler is not None:
+                    profiler.disable()
+                if input_loop is not None:
+                    input_loop.close()
+
+            if timer is not None:
+                six.print_(timer.format_summary())
+            if profiler is not None:
+                profiler.dump_stats(options.profile)
+                import pstats
+                stats = pstats.Stats(profiler, stream=sys.stdout)
+                stats.sort_stats("cumulative").print_stats(20)
+
+        if cache is not None:
+            for path, file_model in (
+                    model.files if len(args) > 1 else [(filename, model)]):
+                entry = file_model.get_cache_entry(cfg)
+                if entry is not None:
+                    cache.store(path, entry)
+
+        if hasattr(model, "close"):
+            # Stop background indexing, and close the files.
+            model.close()
 
 
 if __name__ == '__main__':
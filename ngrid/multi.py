@@ -0,0 +1,466 @@
+"""
+Several delimited files with the same columns, shown as one table.
+
+Files are opened only when rows are needed from them: in order, as the view
+scrolls, or directly, when jumping to a row, a percentage, or the end.  Each
+file's row count is recorded once it has been read completely; until then,
+row numbers past it are estimated from file sizes.
+
+Only the most recently used files are kept open.  Others that have been read
+completely are closed, and opened again when their rows are needed.
+"""
+
+#-------------------------------------------------------------------------------
+
+from   __future__ import absolute_import, division
+
+import bisect
+from   collections import OrderedDict
+import os
+import six
+
+import numpy as np
+
+#-------------------------------------------------------------------------------
+
+# Most files read completely to keep open, besides the first and last.
+MAX_OPEN = 4
+
+# Placeholder for the model of a file that's been closed.
+_CLOSED = object()
+
+#-------------------------------------------------------------------------------
+
+class FileSet:
+    """
+    The files to concatenate, and what's known about them.
+    """
+
+    def __init__(self, paths, open_model):
+        """
+        @param paths
+          Paths of the files, in order.
+        @param open_model
+          Function that takes a path and a sequence of column types or `None`,
+          and returns a model of the file.  If types are given, the model
+          should use them rather than guessing.
+        """
+        self.paths = list(paths)
+        self.sizes = [ os.path.getsize(p) for p in self.paths ]
+        # Row counts of files read completely, or `None`.
+        self.counts = [None] * len(self.paths)
+        self.name = (
+            six.text_type(self.paths[0]) if len(self.paths) == 1
+            else u"{} (+{} more)".format(self.paths[0], len(self.paths) - 1))
+        self.__open_model = open_model
+        self.__names = None
+        self.__types = None
+        # Bytes per row of the first file opened, for estimates.
+        self.__row_size = None
+
+
+    def __len__(self):
+        return len(self.paths)
+
+
+    def open(self, i):
+        """
+        Opens a model of file `i`.
+
+        @return
+          The model, or `None` if the file has no data.
+        @raise IOError
+          The file's columns don't match those of the first file opened.
+        """
+        try:
+            model = self.__open_model(self.paths[i], self.__types)
+        except EOFError:
+            self.counts[i] = 0
+            return None
+        self.check(i, model)
+        return model
+
+
+    def check(self, i, model):
+        """
+        Checks that the columns of a model of file `i` match those of the
+        first file opened.
+
+        @raise IOError
+          The columns don't match.
+        """
+        if self.__names is None:
+            self.__names = tuple(model.names)
+            self.__types = tuple(model.types)
+            rows = getattr(model, "estimated_rows", None)
+            if rows:
+                self.__row_size = self.sizes[i] / rows
+        elif tuple(model.names) != self.__names:
+            raise IOError(
+                "columns of {} don't match: {}".format(
+                    self.paths[i], ", ".join( str(n) for n in model.names )))
+
+
+    def update(self, i, model):
+        """
+        Records the row count of file `i`, if `model` has read it completely.
+        """
+        if model is None:
+            self.counts[i] = 0
+        elif model.done and not getattr(model, "approximate", False):
+            self.counts[i] = getattr(model, "base_row", 0) + model.num_rows
+
+
+    @property
+    def row_size(self):
+        """
+        The estimated average size in bytes of rows.
+        """
+        known = [ (s, c) for s, c in zip(self.sizes, self.counts) if c ]
+        if len(known) > 0:
+            return sum( s for s, _ in known ) / sum( c for _, c in known )
+        else:
+            return self.__row_size
+
+
+    def __get_counts(self):
+        """
+        Returns the row count of each file, estimating unknown counts, and
+        whether each is exact.
+        """
+        row_size = self.row_size
+        return [
+            (c, True) if c is not None
+            else (0 if row_size is None else int(round(s / row_size)), False)
+            for s, c in zip(self.sizes, self.counts)
+            ]
+
+
+    def rows_before(self, i):
+        """
+        Returns the number of rows in files before file `i`, and whether it's
+        exact.
+        """
+        counts = self.__get_counts()[: i]
+        return sum( c for c, _ in counts ), all( e for _, e in counts )
+
+
+    def find_row(self, row):
+        """
+        Finds the file containing a row.
+
+        @return
+          The index of the file, and the index of the row in the file.
+        """
+        for i, (count, _) in enumerate(self.__get_counts()):
+            if row < count or i == len(self.paths) - 1:
+                return i, row
+            row -= count
+
+
+    def find_offset(self, fraction):
+        """
+        Finds the file containing a fraction of the total size.
+
+        @return
+          The index of the file, and the fraction of its size.
+        """
+        offset = fraction * sum(self.sizes)
+        for i, size in enumerate(self.sizes):
+            if offset < size or i == len(self.sizes) - 1:
+                return i, min(offset / size, 1) if size > 0 else 0
+            offset -= size
+
+
+
+class ConcatModel:
+    """
+    Data model that concatenates the models of files in a `FileSet`.
+
+    Starts at one file, possibly partway through it, and reads through the
+    following files in order.
+    """
+
+    def __init__(self, files, index=0, first=None, filename=None,
+                 max_open=MAX_OPEN):
+        """
+        @param index
+          The index of the file at which to start.
+        @param first
+          A model of that file, if already open, which may start partway
+          through it.
+        @param max_open
+          The most files read completely to keep open, besides the first and
+          last.  Others are closed, and opened again when needed.
+        """
+        if first is None:
+            first = files.open(index)
+            # Skip files with no data.
+            while first is None and index < len(files) - 1:
+                index += 1
+                first = files.open(index)
+            if first is None:
+                raise EOFError("no data")
+        else:
+            files.check(index, first)
+
+        self.__files = files
+        self.__index = index
+        # Models of files read so far, and the index of each one's first row.
+        self.__models = [first]
+        self.__starts = [0]
+        # Positions in `__models` of open models that may be closed, from
+        # least to most recently used.
+        self.__open = OrderedDict()
+        self.__max_open = max_open
+        # A model of the whole file, if the first model is from partway
+        # through it, to close with this one.
+        self.__parent = None
+        self.filename = files.name if filename is None else filename
+        self.names = first.names
+        self.num_cols = first.num_cols
+        self.types = first.types
+        self.title_lines = first.title_lines
+        self.delimiter = getattr(first, "delimiter", None)
+
+
+    @property
+    def files(self):
+        """
+        Pairs of path and model for files opened so far.
+        """
+        return [
+            (self.__files.paths[self.__index + i], m)
+            for i, m in enumerate(self.__models)
+            if m is not None and m is not _CLOSED
+            ]
+
+
+    @property
+    def num_rows(self):
+        last = self.__models[-1]
+        return self.__starts[-1] + (0 if last is None else last.num_rows)
+
+
+    @property
+    def done(self):
+        last = self.__models[-1]
+        return (
+            self.__index + len(self.__models) == len(self.__files)
+            and (last is None or last.done))
+
+
+    @property
+    def base_row(self):
+        """
+        The index in the whole input of the first row.
+        """
+        rows, _ = self.__files.rows_before(self.__index)
+        return rows + getattr(self.__models[0], "base_row", 0)
+
+
+    @property
+    def approximate(self):
+        """
+        True if row numbers are estimated.
+        """
+        _, exact = self.__files.rows_before(self.__index)
+        return not exact or getattr(self.__models[0], "approximate", False)
+
+
+    @property
+    def estimated_rows(self):
+        """
+        The estimated number of rows in the whole input.
+        """
+        if self.done:
+            return self.base_row + self.num_rows
+        rows, _ = self.__files.rows_before(len(self.__files))
+        return max(rows, self.base_row + self.num_rows)
+
+
+    @property
+    def memory_size(self):
+        return sum(
+            getattr(m, "memory_size", 0) or 0
+            for m in self.__models if m is not None and m is not _CLOSED )
+
+
+    def get_default_formatters(self, cfg={}):
+        return self.__models[0].get_default_formatters(cfg)
+
+
+    def __open_next(self):
+        """
+        Opens the next file, once the last one has been read.
+        """
+        files = self.__files
+        i = self.__index + len(self.__models)
+        files.update(i - 1, self.__models[-1])
+        self.__starts.append(self.num_rows)
+        self.__models.append(files.open(i))
+        # The file before, if any, may now be closed.
+        self.__use(len(self.__models) - 2)
+
+
+    def __use(self, i):
+        """
+        Marks model `i` as most recently used, and closes the least recently
+        used models beyond `max_open`.  The first and last models are always
+        kept open.
+        """
+        if i == 0 or i == len(self.__models) - 1 or self.__models[i] is None:
+            return
+        opened = self.__open
+        opened.pop(i, None)
+        opened[i] = True
+        while len(opened) > self.__max_open:
+            j, _ = opened.popitem(last=False)
+            model = self.__models[j]
+            if hasattr(model, "close"):
+                model.close()
+            self.__models[j] = _CLOSED
+
+
+    def __get_model(self, i, stop):
+        """
+        Returns model `i`, with at least `stop` rows read, reopening it if it
+        has been closed.
+        """
+        model = self.__models[i]
+        if model is _CLOSED:
+            # The file's row count is already recorded.
+            model = self.__models[i] = self.__files.open(self.__index + i)
+        if i < len(self.__models) - 1:
+            self.__use(i)
+            model.ensure_rows(stop)
+        return model
+
+
+    def ensure_rows(self, max_row):
+        while self.num_rows < max_row and not self.done:
+            model = self.__models[-1]
+            if model is None or model.done:
+                self.__open_next()
+                continue
+            model.ensure_rows(max_row - self.__starts[-1])
+            if not model.done:
+                # Enough rows, or no more yet.
+                break
+        if self.done:
+            self.__files.update(
+                self.__index + len(self.__models) - 1, self.__models[-1])
+        return min(max_row, self.num_rows)
+
+
+    def __find(self, idx):
+        """
+        Returns the model containing a row, and the row's index in it.
+        """
+        i = bisect.bisect_right(self.__starts, idx) - 1
+        idx -= self.__starts[i]
+        return self.__get_model(i, idx + 1), idx
+
+
+    def get_row(self, idx, cols=None):
+        model, idx = self.__find(idx)
+        return model.get_row(idx, cols)
+
+
+    def get_columns(self, cols, start, stop):
+        """
+        Returns values of columns for a range of rows.
+
+        @return
+          An array for each column.
+        """
+        parts = []
+        starts = self.__starts
+        for i in range(bisect.bisect_right(starts, start) - 1, len(starts)):
+            if starts[i] >= stop:
+                break
+            end = starts[i + 1] if i + 1 < len(starts) else self.num_rows
+            lo = max(start - starts[i], 0)
+            hi = min(stop, end) - starts[i]
+            if hi > lo:
+                model = self.__get_model(i, hi)
+                parts.append(model.get_columns(cols, lo, hi))
+        if len(parts) == 0:
+            return self.__models[0].get_columns(cols, 0, 0)
+        elif len(parts) == 1:
+            return parts[0]
+        else:
+            return [ np.concatenate(a) for a in zip(*parts) ]
+
+
+    def __get_model_at(self, i, get_sub_model, filename):
+        """
+        Returns a model starting in file `i`.
+
+        @param get_sub_model
+          Function that takes a model of the file, and returns a model from
+          partway through it, or `None` to start at the beginning.
+        """
+        files = self.__files
+        model = files.open(i)
+        if model is None:
+            return None
+        sub_model = get_sub_model(model)
+        if sub_model is None:
+            return self.__class__(files, i, model, filename, self.__max_open)
+        concat = self.__class__(files, i, sub_model, filename, self.__max_open)
+        concat.__parent = model
+        return concat
+
+
+    def get_model_at(self, fraction):
+        """
+        Returns a model of the input starting at a fraction of its total size,
+        without reading the files before it.
+        """
+        i, inner = self.__files.find_offset(fraction)
+        return self.__get_model_at(
+            i,
+            lambda m:
+                getattr(m, "get_model_at", lambda f: None)(inner)
+                if inner > 0 else None,
+            u"{} @{:.0f}%".format(self.__files.name, 100 * fraction))
+
+
+    def get_model_at_row(self, row):
+        """
+        Returns a model of the input starting at a row, without reading the
+        files before it.  Unless their row counts are known, the row is
+        found approximately.
+        """
+        i, inner = self.__files.find_row(row)
+        return self.__get_model_at(
+            i,
+            lambda m:
+                getattr(m, "get_model_at_row", lambda r: None)(inner)
+                if inner > 0 else None,
+            u"{} @row {}".format(self.__files.name, row))
+
+
+    def get_end_model(self):
+        """
+        Returns a model of the last file, without reading the files before it,
+        or `None` if this model already starts there.
+        """
+        i = len(self.__files) - 1
+        if self.__index >= i:
+            return None
+        return self.__get_model_at(
+            i, lambda m: None, u"{} @end".format(self.__files.name))
+
+
+    def close(self):
+        """
+        Closes the models of files that are open.
+        """
+        for model in self.__models + [self.__parent]:
+            if model is not _CLOSED and hasattr(model, "close"):
+                model.close()
+
+
+
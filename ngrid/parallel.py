@@ -0,0 +1,508 @@
+"""
+Parallel parsing of delimited files.
+
+The file is split into byte ranges at record boundaries, and each range is
+parsed in a worker process into typed column arrays.  Workers write their
+arrays to `.npy` files, which the parent maps into memory rather than
+unpickling, and the ranges are stitched together in order without copying.
+
+String columns with few distinct values are dictionary-encoded, as integer
+codes into a dictionary of the distinct values shared by all ranges.
+
+A range without quotes, in an encoding in which ASCII characters are single
+bytes, is split into fields as bytes.  Numeric columns are converted from the
+bytes directly, and string columns are decoded only once per distinct value.
+"""
+
+#-------------------------------------------------------------------------------
+
+from   __future__ import absolute_import
+
+import bisect
+from   concurrent.futures import ProcessPoolExecutor
+import mmap
+import os
+import shutil
+import six
+import tempfile
+
+import numpy as np
+
+from   . import grid
+from   .lines import LineReader
+
+#-------------------------------------------------------------------------------
+
+# Size of chunks in which to scan for quotes.
+SCAN_BYTES = 16 << 20
+
+# Dictionary-encode a string column if at most this fraction of its values
+# are distinct.
+DICT_RATIO = 0.1
+
+#-------------------------------------------------------------------------------
+
+def _count(buf, start, stop, char):
+    """
+    Counts occurrences of `char` in `buf[start : stop]`, in chunks.
+    """
+    count = 0
+    for i in range(start, stop, SCAN_BYTES):
+        count += buf[i : min(i + SCAN_BYTES, stop)].count(char)
+    return count
+
+
+def split_ranges(path, start, num_ranges, quotechar=grid.QUOTE_CHAR):
+    """
+    Splits a file into byte ranges that begin and end at record boundaries.
+
+    A newline is a record boundary if it isn't inside a quoted field, which is
+    the case if the number of quote characters before it is even.  Doubled
+    quotes inside quoted fields don't change this.
+
+    @param start
+      The offset of the first record.
+    @return
+      A sequence of `(start, stop)` pairs covering the file from `start`.
+    """
+    quote = quotechar.encode("ascii")
+    with open(path, "rb") as file:
+        size = os.fstat(file.fileno()).st_size
+        if size <= start:
+            return []
+        buf = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            bounds = [start]
+            # Number of quotes between the last boundary and `pos`.
+            quotes = 0
+            pos = start
+            for i in range(1, num_ranges):
+                target = start + (size - start) * i // num_ranges
+                if target <= pos:
+                    continue
+                quotes += _count(buf, pos, target, quote)
+                pos = target
+                # Find the next newline outside quotes.
+                while True:
+                    nl = buf.find(b"\n", pos)
+                    if nl < 0:
+                        pos = size
+                        break
+                    quotes += _count(buf, pos, nl, quote)
+                    pos = nl + 1
+                    if quotes % 2 == 0:
+                        break
+                if pos >= size:
+                    break
+                bounds.append(pos)
+                quotes = 0
+        finally:
+            buf.close()
+
+    bounds.append(size)
+    return list(zip(bounds[: -1], bounds[1 :]))
+
+
+def _encode(arr):
+    """
+    Dictionary-encodes an array, if few of its values are distinct.
+
+    @return
+      Integer codes and the dictionary of distinct values, or `None`.
+    """
+    if len(arr) == 0:
+        return None
+    dictionary, codes = np.unique(arr, return_inverse=True)
+    if len(dictionary) > DICT_RATIO * len(arr):
+        return None
+    return codes.ravel().astype(np.min_scalar_type(len(dictionary))), dictionary
+
+
+def splits_as_bytes(encoding):
+    """
+    Returns true if text in an encoding can be split at ASCII characters, such
+    as delimiters and newlines, without decoding it.
+
+    This is so for UTF-8 and single-byte encodings, in which each byte of
+    another character is outside ASCII, but not for UTF-16 or multibyte East
+    Asian encodings.
+    """
+    chars = bytes(bytearray(range(256))).decode(encoding, "replace")
+    return (
+        len(chars) == 256 
+        and all( ord(c) == i for i, c in enumerate(chars[: 128]) ))
+
+
+# ASCII characters that `str.strip()` strips as whitespace, but
+# `bytes.strip()` doesn't.
+_SEPARATORS = b"\x1c\x1d\x1e\x1f"
+
+def _split_bytes(data, start, delim, comment_prefix, encoding):
+    """
+    Splits records without quotes into fields, as bytes.
+
+    @param data
+      The bytes of the records.
+    @param start
+      The offset of `data` in the file.
+    @param delim
+      The encoded delimiter.
+    @param comment_prefix
+      The encoded comment prefix, or `None`.
+    @return
+      The rows of cleaned fields, and the offset of each; or `None` if a line
+      starts or ends with whitespace that only decoding would strip.
+    """
+    rows = []
+    offsets = []
+    offset = start
+    for line in data.split(b"\n"):
+        line_offset = offset
+        offset += len(line) + 1
+        line = line.replace(b"\0", b"").strip()
+        if len(line) == 0 or (
+                comment_prefix is not None and line.startswith(comment_prefix)):
+            continue
+        if (line[: 1] >= b"\x80" or line[-1 :] >= b"\x80"
+            or line[: 1] in _SEPARATORS or line[-1 :] in _SEPARATORS):
+            # Check for Unicode whitespace, such as a no-break space.
+            text = line.decode(encoding, "replace")
+            if text.strip() != text:
+                return None
+        rows.append(
+            [ v.strip(b" ") for v in line.split(delim) ] if b" " in line
+            else line.split(delim))
+        offsets.append(line_offset)
+    return rows, offsets
+
+
+def _split_csv(file, stop, delim, comment_prefix, encoding):
+    """
+    Parses records up to an offset with the CSV reader, decoding them.
+
+    @return
+      The rows of cleaned fields, and the offset of each.
+    """
+    clean_line = grid.DelimitedFileModel.clean_line
+    clean_row = grid.DelimitedFileModel.clean_row
+
+    offsets = []
+    line_offsets = []
+    reader = LineReader(file, encoding)
+
+    def get_lines():
+        for line in reader:
+            if reader.line_offset >= stop:
+                break
+            line = clean_line(line)
+            if (comment_prefix is not None
+                and line.startswith(comment_prefix)):
+                continue
+            line_offsets.append(reader.line_offset)
+            yield line
+
+    rows = []
+    csv_rows = grid._make_csv_reader(
+        get_lines(), delimiter=delim, quotechar=grid.QUOTE_CHAR)
+    for row in csv_rows:
+        if len(row) > 0:
+            # Blank lines aren't records, as when splitting bytes.
+            offsets.append(line_offsets[0])
+            rows.append(clean_row(row))
+        del line_offsets[:]
+    return rows, offsets
+
+
+def _as_array_bytes(type, values, encoding):
+    """
+    Converts a sequence of encoded values to an array of `type`, as
+    `grid.as_array()` does for strings.
+
+    Ints, floats, and bools are converted from the bytes directly where
+    possible.  Strings are left encoded, as a bytes array.  Other values are
+    decoded.
+    """
+    arr = np.array(values, dtype=bytes)
+    try:
+        if type is float:
+            return np.where(arr == b"", b"nan", arr).astype(float)
+        elif type is int:
+            return arr.astype(np.int64)
+        elif type is bool:
+            # Compare the few distinct values, rather than every value.
+            distinct, codes = np.unique(arr, return_inverse=True)
+            lower = np.char.lower(distinct)
+            if ((lower == b"true") | (lower == b"false")).all():
+                return (lower == b"true")[codes.ravel()]
+        elif type is str:
+            return arr
+    except (TypeError, ValueError, OverflowError):
+        pass
+    return grid.as_array(type, [ v.decode(encoding, "replace") for v in values ])
+
+
+def _parse_range(path, start, stop, delim, types, comment_prefix, encoding,
+                 out_dir):
+    """
+    Parses the records in a byte range into column arrays.
+
+    Runs in a worker process.  Writes the arrays to `.npy` files in `out_dir`.
+
+    @return
+      The number of rows, the actual type of each column, the path of each
+      column array paired with the path of its dictionary, if encoded, and
+      the path of the array of row offsets.
+    """
+    with open(path, "rb") as file:
+        file.seek(start)
+        data = file.read(stop - start) if splits_as_bytes(encoding) else None
+        split = (
+            None if data is None or grid.QUOTE_CHAR.encode("ascii") in data
+            else _split_bytes(
+                data, start, delim.encode(encoding),
+                None if comment_prefix is None 
+                else comment_prefix.encode(encoding),
+                encoding))
+        if split is not None:
+            rows, offsets = split
+            as_array = lambda t, v: _as_array_bytes(t, v, encoding)
+        else:
+            # Quoted fields, and lines that may end in Unicode whitespace,
+            # need the CSV reader on decoded lines.
+            file.seek(start)
+            rows, offsets = _split_csv(
+                file, stop, delim, comment_prefix, encoding)
+            as_array = grid.as_array
+        del data
+
+    def decode(arr):
+        # Decodes an array of encoded strings.
+        return (
+            np.char.decode(arr, encoding, "replace") if arr.dtype.kind == "S"
+            else arr)
+
+    num_cols = len(types)
+    # Fields missing from short rows are empty.
+    empty = b"" if split is not None else u""
+    rows = [
+        r if len(r) >= num_cols else r + [empty] * (num_cols - len(r))
+        for r in rows ]
+    cols = list(zip(*rows)) if len(rows) > 0 else [ () ] * num_cols
+    types = list(types)
+    col_paths = []
+    for c in range(num_cols):
+        try:
+            arr = as_array(types[c], cols[c])
+        except (TypeError, ValueError, OverflowError):
+            # Doesn't match the type guessed from the sample.
+            types[c] = str
+            arr = as_array(str, cols[c])
+        col_path = os.path.join(out_dir, "{}-{}.npy".format(start, c))
+        dict_path = None
+        encoded = _encode(arr) if types[c] is str else None
+        if encoded is not None:
+            # Decode each distinct string once.
+            arr, dictionary = encoded
+            dict_path = os.path.join(out_dir, "{}-{}-dict.npy".format(start, c))
+            np.save(dict_path, decode(dictionary))
+        np.save(col_path, decode(arr))
+        col_paths.append((col_path, dict_path))
+
+    offsets_path = os.path.join(out_dir, "{}-offsets.npy".format(start))
+    np.save(offsets_path, np.array(offsets, dtype=np.int64))
+
+    return len(rows), types, col_paths, offsets_path
+
+
+def _merge_dictionaries(codes, dictionaries):
+    """
+    Recodes chunks of a dictionary-encoded column to a single dictionary.
+
+    @param codes
+      Codes of each chunk, into the chunk's dictionary.
+    @return
+      The codes of each chunk into the merged dictionary, and the dictionary.
+    """
+    dictionary = np.unique(np.concatenate(dictionaries))
+    dtype = np.min_scalar_type(len(dictionary))
+    codes = [
+        np.searchsorted(dictionary, d).astype(dtype)[c]
+        for c, d in zip(codes, dictionaries) ]
+    return codes, dictionary
+
+
+class ChunkedTable:
+    """
+    Columns stored as sequences of arrays, concatenated without copying.
+
+    A column may be dictionary-encoded: its arrays are integer codes into a
+    dictionary array of the values.  Values are decoded as they're read.
+    """
+
+    def __init__(self, columns, dictionaries=None):
+        """
+        @param columns
+          For each column, a sequence of arrays.  All columns must have the
+          same number of chunks with corresponding lengths.
+        @param dictionaries
+          For each column, the dictionary array if it's encoded, or `None`.
+        """
+        lengths = [ len(a) for a in columns[0] ] if len(columns) > 0 else []
+        self.columns = columns
+        self.dictionaries = (
+            [None] * len(columns) if dictionaries is None else dictionaries)
+        self.__starts = np.cumsum([0] + lengths)
+
+
+    @property
+    def num_rows(self):
+        return int(self.__starts[-1])
+
+
+    @property
+    def nbytes(self):
+        return (
+            sum( a.nbytes for c in self.columns for a in c )
+            + sum( d.nbytes for d in self.dictionaries if d is not None ))
+
+
+    def get_chunks(self, col):
+        """
+        Generates the values of a column, a chunk at a time.
+        """
+        dictionary = self.dictionaries[col]
+        for chunk in self.columns[col]:
+            yield chunk if dictionary is None else dictionary[chunk]
+
+
+    def get_codes(self, col, start, stop):
+        """
+        Returns the codes of a dictionary-encoded column for a range of rows,
+        and the dictionary.
+
+        @return
+          The codes and dictionary, or `None` if the column isn't encoded.
+        """
+        dictionary = self.dictionaries[col]
+        if dictionary is None:
+            return None
+        return self.__get_chunk_range(col, start, stop), dictionary
+
+
+    def get_column(self, col, start, stop):
+        """
+        Returns the values of a column for a range of rows.
+        """
+        values = self.__get_chunk_range(col, start, stop)
+        dictionary = self.dictionaries[col]
+        return values if dictionary is None else dictionary[values]
+
+
+    def __get_chunk_range(self, col, start, stop):
+        starts = self.__starts
+        chunks = self.columns[col]
+        first = max(bisect.bisect_right(starts, start) - 1, 0)
+        parts = []
+        for i in range(first, len(chunks)):
+            if starts[i] >= stop:
+                break
+            parts.append(chunks[i][max(start - starts[i], 0) : stop - starts[i]])
+        if len(parts) == 1:
+            return parts[0]
+        elif len(parts) == 0:
+            return chunks[0][: 0] if len(chunks) > 0 else np.array([])
+        else:
+            return np.concatenate(parts)
+
+
+    def get_row(self, idx, cols=None):
+        """
+        @param cols
+          Indices of the columns to return, or `None` for all.  Other columns
+          aren't read.
+        """
+        i = bisect.bisect_right(self.__starts, idx) - 1
+        idx -= self.__starts[i]
+        columns = self.columns
+        dictionaries = self.dictionaries
+        if cols is None:
+            cols = range(len(columns))
+        return [
+            columns[c][i][idx] if dictionaries[c] is None
+            else dictionaries[c][columns[c][i][idx]]
+            for c in cols
+            ]
+
+
+
+def parse_file(path, start, delim, types, comment_prefix=None,
+               encoding="utf-8", num_workers=None):
+    """
+    Parses a delimited file in parallel.
+
+    @param start
+      The offset of the first data row.
+    @param types
+      The type of each column.  If a column's values don't all match, its type
+      is changed to `str`.
+    @param num_workers
+      The number of worker processes; if `None`, the number of CPUs.
+    @return
+      The column types, a `ChunkedTable` of column arrays, and an array of row
+      offsets.
+    """
+    if num_workers is None:
+        num_workers = os.cpu_count() if six.PY3 else 1
+    ranges = split_ranges(path, start, num_workers * 4)
+
+    out_dir = tempfile.mkdtemp(prefix="ngrid-")
+    try:
+        with ProcessPoolExecutor(num_workers) as executor:
+            futures = [
+                executor.submit(
+                    _parse_range, path, b, e, delim, tuple(types),
+                    comment_prefix, encoding, out_dir)
+                for b, e in ranges
+                ]
+            results = [ f.result() for f in futures ]
+        results = [ r for r in results if r[0] > 0 ]
+
+        # Map the arrays into memory.  On POSIX, the mappings remain valid
+        # after the files are removed.  Load dictionaries and codes.
+        num_cols = len(types)
+        columns = [
+            [ (np.load(p, mmap_mode="r"), None) if d is None
+              else (np.load(p), np.load(d))
+              for p, d in ( r[2][c] for r in results ) ]
+            for c in range(num_cols)
+            ]
+        offsets = [ np.load(r[3]) for r in results ]
+    finally:
+        shutil.rmtree(out_dir, ignore_errors=True)
+
+    types = list(types)
+    num_rows = sum( r[0] for r in results )
+    dictionaries = [None] * num_cols
+    for c in range(num_cols):
+        chunks = columns[c]
+        if (len(chunks) > 0 and all( d is not None for _, d in chunks )):
+            # Encoded in every range, so merge the dictionaries.
+            codes, dictionary = _merge_dictionaries(*zip(*chunks))
+            if len(dictionary) <= DICT_RATIO * num_rows:
+                columns[c], dictionaries[c] = codes, dictionary
+                continue
+        columns[c] = [ a if d is None else d[a] for a, d in chunks ]
+        # Widen columns to `str` if any range didn't match the type.
+        if any( r[1][c] is str for r in results ):
+            types[c] = str
+            columns[c] = [
+                a if a.dtype.kind == "U" else a.astype(six.text_type)
+                for a in columns[c]
+                ]
+
+    offsets = (
+        np.concatenate(offsets) if len(offsets) > 0
+        else np.array([], dtype=np.int64))
+    return tuple(types), ChunkedTable(columns, dictionaries), offsets
+
+
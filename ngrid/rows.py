@@ -0,0 +1,309 @@
+"""
+Row storage with bounded memory use.
+
+Rows are stored in blocks, of which only the most recently used are kept in
+memory.  An evicted block is discarded if its rows can be read again from the
+source, for instance by byte offset from a seekable file, or otherwise spilled
+to a temporary file.  Either way, it is paged back in when accessed.
+
+An `Interner` shares one string object among equal values of low-cardinality
+columns, so that rows refer to it rather than each holding a copy.
+"""
+
+#-------------------------------------------------------------------------------
+
+from   __future__ import absolute_import, division
+
+from   collections import OrderedDict
+import itertools
+import marshal
+import sys
+
+#-------------------------------------------------------------------------------
+
+# Number of rows per block.
+BLOCK_ROWS = 1024
+
+# Number of rows to sample when estimating memory use.
+SIZE_SAMPLE = 100
+
+# Most distinct values of a column to intern.
+MAX_INTERNED = 4096
+
+#-------------------------------------------------------------------------------
+
+class RowStore:
+    """
+    Sequence of rows, of which at most about `max_rows` are kept in memory.
+
+    Rows are appended in order and accessed by index.  The least recently used
+    blocks are evicted first, so that the rows around the ones most recently
+    accessed stay in memory.
+    """
+
+    def __init__(self, max_rows=None, read=None, num_rows=0):
+        """
+        @param max_rows
+          The maximum number of rows to keep in memory, or `None` for no
+          limit.  At least two blocks are kept.
+        @param read
+          A function that takes the index of a row and a number of rows, and
+          reads them again from the source.  If `None`, evicted rows are
+          spilled to a temporary file instead.
+        @param num_rows
+          The number of rows already in the source, to be read with `read`.
+          If nonzero, no more rows may be appended.
+        """
+        self.__max_blocks = (
+            None if max_rows is None
+            else max(2, -(-max_rows // BLOCK_ROWS)))
+        self.__read = read
+        self.__num_rows = num_rows
+        # Full blocks in memory, from least to most recently used.
+        self.__blocks = OrderedDict()
+        # The last block, to which rows are appended.
+        self.__tail = []
+        # Temporary file of spilled blocks, and the offset and size of each.
+        self.__spill = None
+        self.__spilled = {}
+
+
+    def __len__(self):
+        return self.__num_rows
+
+
+    def __getitem__(self, idx):
+        if idx < 0:
+            idx += self.__num_rows
+        if not 0 <= idx < self.__num_rows:
+            raise IndexError("row index out of range: {}".format(idx))
+        tail_start = self.__num_rows - len(self.__tail)
+        if idx >= tail_start:
+            return self.__tail[idx - tail_start]
+        block, i = divmod(idx, BLOCK_ROWS)
+        return self.__get_block(block)[i]
+
+
+    def get_range(self, start, stop):
+        """
+        Returns a list of the rows from `start` to `stop`.
+        """
+        start = max(start, 0)
+        stop = min(stop, self.__num_rows)
+        tail_start = self.__num_rows - len(self.__tail)
+        rows = []
+        for block in range(start // BLOCK_ROWS,
+                           (min(stop, tail_start) - 1) // BLOCK_ROWS + 1):
+            lo = block * BLOCK_ROWS
+            rows.extend(
+                self.__get_block(block)[max(start - lo, 0) : stop - lo])
+        if stop > tail_start:
+            rows.extend(
+                self.__tail[max(start - tail_start, 0) : stop - tail_start])
+        return rows
+
+
+    def extend(self, rows):
+        """
+        Appends rows.
+
+        @return
+          The number of rows appended.
+        """
+        rows = iter(rows)
+        count = 0
+        while True:
+            tail = self.__tail
+            num = len(tail)
+            tail.extend(itertools.islice(rows, BLOCK_ROWS - num))
+            num = len(tail) - num
+            self.__num_rows += num
+            count += num
+            if len(tail) < BLOCK_ROWS:
+                return count
+            # The tail block is full; start another.
+            self.__blocks[self.__num_rows // BLOCK_ROWS - 1] = tail
+            self.__tail = []
+            self.__evict()
+
+
+    def append(self, row):
+        self.extend((row, ))
+
+
+    @property
+    def num_cached(self):
+        """
+        The number of rows in memory.
+        """
+        return sum( len(b) for b in self.__blocks.values() ) + len(self.__tail)
+
+
+    @property
+    def spilled_size(self):
+        """
+        The size in bytes of spilled blocks.
+        """
+        return sum( s for _, s in self.__spilled.values() )
+
+
+    @property
+    def memory_size(self):
+        """
+        Estimated size in bytes of the rows in memory.
+        """
+        blocks = list(self.__blocks.values()) + [self.__tail]
+        sample = [ r for b in blocks[-2 :] for r in b[-SIZE_SAMPLE :] ]
+        if len(sample) == 0:
+            return 0
+        # Count values shared among sampled rows, such as interned strings,
+        # only once.
+        counts = {}
+        for r in sample:
+            for v in r:
+                counts[id(v)] = counts.get(id(v), 0) + 1
+        row_size = sum(
+            sys.getsizeof(r)
+            + sum( sys.getsizeof(v) for v in r if counts[id(v)] == 1 )
+            for r in sample ) / len(sample)
+        shared = sum(
+            sys.getsizeof(v)
+            for v in set( v for r in sample for v in r if counts[id(v)] > 1 ))
+        return int(row_size * self.num_cached + shared)
+
+
+    def close(self):
+        """
+        Discards spilled blocks.
+        """
+        if self.__spill is not None:
+            self.__spill.close()
+            self.__spill = None
+            self.__spilled.clear()
+
+
+    def __get_block(self, block):
+        blocks = self.__blocks
+        try:
+            # Mark as most recently used.
+            rows = blocks.pop(block)
+        except KeyError:
+            rows = self.__load(block)
+            blocks[block] = rows
+            self.__evict()
+        else:
+            blocks[block] = rows
+        return rows
+
+
+    def __evict(self):
+        """
+        Evicts least recently used blocks, leaving room for the tail.
+        """
+        if self.__max_blocks is None:
+            return
+        blocks = self.__blocks
+        while len(blocks) >= self.__max_blocks:
+            block, rows = blocks.popitem(last=False)
+            if self.__read is None and block not in self.__spilled:
+                self.__spill_block(block, rows)
+
+
+    def __spill_block(self, block, rows):
+        if self.__spill is None:
+            # Most inputs never spill; import only when one does.
+            import tempfile
+            self.__spill = tempfile.TemporaryFile(prefix="ngrid-")
+        # Spilled blocks are read only by this process, so marshal's compact
+        # and fast format is safe.
+        data = marshal.dumps(rows)
+        self.__spill.seek(0, 2)
+        self.__spilled[block] = self.__spill.tell(), len(data)
+        self.__spill.write(data)
+
+
+    def __load(self, block):
+        try:
+            offset, size = self.__spilled[block]
+        except KeyError:
+            start = block * BLOCK_ROWS
+            return self.__read(start, min(BLOCK_ROWS, self.__num_rows - start))
+        else:
+            self.__spill.seek(offset)
+            return marshal.loads(self.__spill.read(size))
+
+
+
+class _Pool(dict):
+    """
+    Map from each value to the shared object equal to it.
+
+    Calls `full` with the pool instead of adding a value past `max_values`.
+    """
+
+    def __init__(self, max_values, full):
+        self.__max_values = max_values
+        self.__full = full
+
+
+    def __missing__(self, value):
+        if len(self) < self.__max_values:
+            self[value] = value
+        else:
+            self.__full(self)
+        return value
+
+
+
+class Interner:
+    """
+    Replaces values in columns of rows with a single shared object for each
+    distinct value.
+
+    A column that turns out to have more than `max_values` distinct values
+    isn't interned further.
+    """
+
+    def __init__(self, cols, max_values=MAX_INTERNED):
+        """
+        @param cols
+          Indices of the columns to intern.
+        """
+        self.__pools = [ (c, _Pool(max_values, self.__drop)) for c in cols ]
+        self.__gets = [ (c, p.__getitem__) for c, p in self.__pools ]
+
+
+    @property
+    def cols(self):
+        """
+        Indices of the columns still being interned.
+        """
+        return [ c for c, _ in self.__pools ]
+
+
+    def __drop(self, pool):
+        self.__pools = [ (c, p) for c, p in self.__pools if p is not pool ]
+        self.__gets = [ (c, p.__getitem__) for c, p in self.__pools ]
+
+
+    def __call__(self, row):
+        """
+        Interns values of a row.
+
+        @param row
+          A list of values, which is modified.
+        @return
+          The row, as a tuple.
+        """
+        try:
+            for c, get in self.__gets:
+                row[c] = get(row[c])
+        except IndexError:
+            # A short row; intern the columns it has.
+            for c, get in self.__gets:
+                if c < len(row):
+                    row[c] = get(row[c])
+        return tuple(row)
+
+
+
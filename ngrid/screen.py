@@ -0,0 +1,152 @@
+"""
+In-memory screen, for running views without a terminal.
+"""
+
+#-------------------------------------------------------------------------------
+
+from   __future__ import absolute_import
+
+from   collections import deque
+import curses
+
+from   . import text
+
+#-------------------------------------------------------------------------------
+
+class VirtualScreen:
+    """
+    In-memory stand-in for a curses window.
+
+    Supports the subset of the curses window interface that `GridView` uses.
+    Input comes from a script of keys; when the script is exhausted, `getch()`
+    returns "q", which ends a session.  Each `getch()` also captures the
+    current contents as a frame, unless capture is disabled.
+    """
+
+    def __init__(self, height=25, width=80, keys=(), encoding="utf-8",
+                 capture=True):
+        """
+        @param keys
+          Key codes to return from `getch()`, in order.  Characters are
+          converted with `ord()`.
+        @param capture
+          If true, capture a frame on each `getch()`.
+        """
+        self.__height   = height
+        self.__width    = width
+        self.__keys     = deque()
+        self.encoding   = encoding
+        self.capture    = capture
+        self.frames     = []
+        self.erase()
+        self.push_keys(*keys)
+
+
+    def push_keys(self, *keys):
+        """
+        Appends keys to the input script.
+        """
+        self.__keys.extend( ord(k) if isinstance(k, str) else k for k in keys )
+
+
+    def getmaxyx(self):
+        return self.__height, self.__width
+
+
+    def resize(self, height, width):
+        """
+        Resizes the screen, and queues `KEY_RESIZE` as curses does.
+        """
+        self.__height = height
+        self.__width = width
+        self.erase()
+        self.__keys.appendleft(curses.KEY_RESIZE)
+
+
+    @staticmethod
+    def color_pair(n):
+        """
+        Returns the attribute for color pair `n`, as `curses.color_pair()`.
+        """
+        return n << 8
+
+
+    def erase(self):
+        self.__chars = [ [" "] * self.__width for _ in range(self.__height) ]
+        self.__attrs = [ [0] * self.__width for _ in range(self.__height) ]
+
+
+    clear = erase
+
+
+    def addnstr(self, y, x, string, n, attr=0):
+        if isinstance(string, bytes):
+            string = string.decode(self.encoding)
+        if not (0 <= y < self.__height and 0 <= x < self.__width):
+            raise curses.error("addnstr() out of bounds: {}, {}".format(y, x))
+        if text.is_ascii(string):
+            string = string[: max(0, min(n, self.__width - x))]
+            self.__chars[y][x : x + len(string)] = string
+            self.__attrs[y][x : x + len(string)] = [attr] * len(string)
+            return
+        string = string[: max(0, n)]
+        # Place characters by display width, as a terminal does.  A wide
+        # character's second cell is empty, and a combining character joins
+        # the cell before it.
+        chars = self.__chars[y]
+        attrs = self.__attrs[y]
+        for char in text.clip(string, self.__width - x):
+            char_width = text.char_width(char)
+            if char_width == 0:
+                if x > 0:
+                    chars[x - 1] += char
+                continue
+            chars[x] = char
+            attrs[x] = attr
+            if char_width == 2:
+                chars[x + 1] = ""
+                attrs[x + 1] = attr
+            x += char_width
+
+
+    def addstr(self, y, x, string, attr=0):
+        self.addnstr(y, x, string, self.__width, attr)
+
+
+    def getch(self):
+        if self.capture:
+            self.frames.append(self.get_text())
+        try:
+            return self.__keys.popleft()
+        except IndexError:
+            return ord("q")
+
+
+    def timeout(self, delay):
+        # Scripted keys are always ready, so there's nothing to wait for.
+        pass
+
+
+    def keypad(self, flag):
+        pass
+
+
+    def refresh(self):
+        pass
+
+
+    def get_text(self):
+        """
+        Returns the current contents, as a list of lines.
+        """
+        return [ "".join(l) for l in self.__chars ]
+
+
+    def get_attrs(self, y):
+        """
+        Returns the attributes of each character on line `y`.
+        """
+        return list(self.__attrs[y])
+
+
+
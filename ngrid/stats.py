@@ -0,0 +1,309 @@
+"""
+Summary statistics over columns of values.
+"""
+
+#-------------------------------------------------------------------------------
+
+from   __future__ import absolute_import, division
+
+from   collections import Counter
+import heapq
+from   math import ceil
+from   operator import itemgetter
+import six
+
+import numpy as np
+
+#-------------------------------------------------------------------------------
+
+class ColumnStats:
+    """
+    Accumulates summary statistics of a column, one chunk of values at a time.
+
+    For numeric and bool columns, tracks the count, min, max, and sum of
+    non-missing values.  For datetime columns, tracks the count, min, and max.
+    For other columns, tracks the count and the min and max string lengths.
+    """
+
+    def __init__(self, type):
+        self.type       = type
+        self.count      = 0
+        self.missing    = 0
+        self.min        = None
+        self.max        = None
+        self.sum        = 0
+
+
+    def update(self, values):
+        """
+        Accumulates a chunk of values.
+
+        @type values
+          `ndarray` of converted values.
+        """
+        values = np.asarray(values)
+        if self.type is float:
+            missing = np.isnan(values)
+        elif values.dtype.kind == "M":
+            missing = np.isnat(values)
+        else:
+            missing = None
+        if missing is not None:
+            self.missing += int(missing.sum())
+            values = values[~missing]
+        if len(values) == 0:
+            return
+
+        if self.type in (bool, int, float):
+            lo, hi = values.min(), values.max()
+            self.sum += values.sum()
+        elif values.dtype.kind == "M":
+            lo, hi = values.min(), values.max()
+        elif values.dtype.kind == "U":
+            lengths = np.char.str_len(values)
+            lo, hi = lengths.min(), lengths.max()
+        else:
+            lengths = np.vectorize(len, otypes=[int])(values)
+            lo, hi = lengths.min(), lengths.max()
+        self.count += len(values)
+        self.min = lo if self.min is None else min(self.min, lo)
+        self.max = hi if self.max is None else max(self.max, hi)
+
+
+    @property
+    def mean(self):
+        if self.type in (bool, int, float) and self.count > 0:
+            return self.sum / self.count
+        else:
+            return None
+
+
+    def as_dict(self):
+        return dict(
+            count   =self.count,
+            missing =self.missing,
+            min     =self.min,
+            max     =self.max,
+            mean    =self.mean,
+            )
+
+
+
+#-------------------------------------------------------------------------------
+
+def _prune(counts, capacity):
+    """
+    Reduces counts to at most `capacity` entries, as in the Misra-Gries
+    algorithm, by subtracting the `capacity + 1`-th largest count from all.
+
+    @return
+      The reduced counts, and the amount subtracted from each.
+    """
+    if len(counts) <= capacity:
+        return counts, 0
+    keys = list(counts)
+    vals = np.fromiter(six.itervalues(counts), np.int64, len(keys))
+    threshold = int(np.partition(vals, -capacity - 1)[-capacity - 1])
+    counts = dict(
+        (k, v - threshold)
+        for k, v in zip(keys, vals.tolist())
+        if v > threshold
+        )
+    return counts, threshold
+
+
+class TopValues:
+    """
+    Approximate counts of the most frequent values of a column, accumulated one
+    chunk of values at a time in bounded memory.
+
+    Keeps a Misra-Gries summary of at most `capacity` values.  Each chunk is
+    counted exactly, summarized, and merged.  A count may be low by at most
+    `error`, which is at most the number of values over `capacity + 1`; a
+    value whose frequency exceeds that is certain to be counted.
+    """
+
+    def __init__(self, capacity=1000):
+        self.capacity   = capacity
+        self.count      = 0
+        self.missing    = 0
+        self.error      = 0
+        self.__counts   = {}
+
+
+    def update(self, values):
+        """
+        Accumulates a chunk of values.
+
+        @type values
+          `ndarray` of converted values.
+        """
+        counts = Counter(np.asarray(values).tolist())
+        # None and NaN are missing.
+        for key in [ k for k in counts if k is None or k != k ]:
+            self.missing += counts.pop(key)
+        self.count += sum(six.itervalues(counts))
+
+        counts, error0 = _prune(counts, self.capacity)
+        merged = self.__counts
+        for key, count in six.iteritems(counts):
+            merged[key] = merged.get(key, 0) + count
+        self.__counts, error1 = _prune(merged, self.capacity)
+        self.error += error0 + error1
+
+
+    def top(self, num):
+        """
+        Returns the `num` most frequent values.
+
+        @return
+          A list of value, count pairs, by decreasing count.
+        """
+        return heapq.nlargest(
+            num, six.iteritems(self.__counts), key=itemgetter(1))
+
+
+
+class Histogram:
+    """
+    Histogram of a numeric or datetime column, accumulated one chunk of values
+    at a time in bounded memory.
+
+    Bins have equal widths, initially chosen from the range of the first chunk.
+    When values fall outside the bins, the range is doubled by merging pairs of
+    adjacent bins, so the number of bins stays the same.  NaN, infinite, and
+    NaT values are missing.
+    """
+
+    def __init__(self, num_bins=64):
+        """
+        @param num_bins
+          The number of bins; must be even.
+        """
+        assert num_bins % 2 == 0
+        self.num_bins   = num_bins
+        self.counts     = np.zeros(num_bins, dtype=np.int64)
+        self.count      = 0
+        self.missing    = 0
+        # The dtype kind of values: "f", "i", or "M".
+        self.kind       = None
+        self.origin     = None
+        self.width      = None
+        self.min        = None
+        self.max        = None
+
+
+    def __grow(self, lo, hi):
+        """
+        Widens bins until the range includes `lo` and `hi`.
+        """
+        half = self.num_bins // 2
+        zeros = np.zeros(half, dtype=np.int64)
+        while (lo < self.origin 
+               or hi >= self.origin + self.width * self.num_bins):
+            counts = self.counts.reshape(half, 2).sum(axis=1)
+            if lo < self.origin:
+                # Extend to the left.
+                self.origin -= self.width * self.num_bins
+                self.counts = np.concatenate([zeros, counts])
+            else:
+                self.counts = np.concatenate([counts, zeros])
+            self.width *= 2
+
+
+    def update(self, values):
+        """
+        Accumulates a chunk of values.
+
+        @type values
+          `ndarray` of converted values.
+        """
+        values = np.asarray(values)
+        num_values = len(values)
+        kind = values.dtype.kind
+        if kind == "M":
+            values = values.astype("datetime64[ns]").view(np.int64)
+            values = values[values != np.iinfo(np.int64).min]
+        elif kind == "f":
+            values = values[np.isfinite(values)]
+        else:
+            kind = "i"
+        self.missing += num_values - len(values)
+        if self.kind is None:
+            self.kind = kind
+        x = values.astype(np.float64)
+        if len(x) == 0:
+            return
+
+        lo, hi = x.min(), x.max()
+        self.min = lo if self.min is None else min(self.min, lo)
+        self.max = hi if self.max is None else max(self.max, hi)
+        if self.origin is None:
+            n = self.num_bins
+            if self.kind == "f":
+                # Slightly wider, so that the max is in the last bin.
+                width = (hi - lo) / n * (1 + 1e-9)
+                width = width or abs(lo) / n or 1.0
+            else:
+                # Bins of whole numbers.
+                width = float(max(1, int(ceil((hi - lo + 1) / n))))
+            self.origin, self.width = lo, width
+        self.__grow(lo, hi)
+
+        idx = ((x - self.origin) / self.width).astype(np.int64)
+        np.clip(idx, 0, self.num_bins - 1, out=idx)
+        self.counts += np.bincount(idx, minlength=self.num_bins)
+        self.count += len(x)
+
+
+    def bins(self, max_bins=None):
+        """
+        Returns bins, from the first to the last nonempty one.
+
+        @param max_bins
+          If not `None`, combines adjacent bins to return at most this many.
+        @return
+          A list of low edge, high edge, count triples.  For ints, and for the
+          last bin, the high edge is inclusive; otherwise, it is exclusive.
+          The outer edges are the min and max values.  For datetimes, edges
+          are `datetime64` values.
+        """
+        nonzero = np.flatnonzero(self.counts)
+        if len(nonzero) == 0:
+            return []
+        first, last = nonzero[0], nonzero[-1] + 1
+        num = last - first
+        step = 1 if max_bins is None else max(1, -(-num // max_bins))
+        counts = np.zeros(-(-num // step) * step, dtype=np.int64)
+        counts[: num] = self.counts[first : last]
+        counts = counts.reshape(-1, step).sum(axis=1)
+        edges = self.origin + self.width * (
+            first + step * np.arange(len(counts) + 1))
+        los, his = edges[: -1], edges[1 :]
+        if self.kind == "i":
+            his = his - 1
+        # The outer edges are the min and max.
+        los[0] = max(los[0], self.min)
+        his[-1] = min(his[-1], self.max)
+
+        if self.kind == "M":
+            los, his = (
+                list(e.round().astype(np.int64).view("datetime64[ns]"))
+                for e in (los, his) )
+        elif self.kind == "i":
+            los, his = ( e.round().astype(np.int64).tolist() for e in (los, his) )
+        else:
+            los, his = los.tolist(), his.tolist()
+        return list(zip(los, his, counts.tolist()))
+
+
+
+def make_summary(values):
+    """
+    Returns an empty `Histogram` for numeric or datetime values, or
+    `TopValues` for others.
+    """
+    kind = np.asarray(values).dtype.kind
+    return Histogram() if kind in "fiuM" else TopValues()
+
+
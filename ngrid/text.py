@@ -5,9 +5,97 @@ Text utilities.
 #-------------------------------------------------------------------------------
 
 import six
+import unicodedata
 
 #-------------------------------------------------------------------------------
 
+# Maximum number of non-ASCII strings whose widths to remember.
+MAX_WIDTHS = 65536
+
+_widths = {}
+
+
+def _is_ascii(string):
+    try:
+        string.encode("ascii")
+    except (UnicodeError, AttributeError):
+        return False
+    else:
+        return True
+
+
+# Whether a string is pure ASCII; `str.isascii()` where available.
+is_ascii = getattr(six.text_type, "isascii", _is_ascii)
+
+
+def char_width(char):
+    """
+    Returns the number of terminal cells a character occupies.
+
+    East Asian wide and fullwidth characters occupy two cells.  Combining
+    marks, format characters such as zero width joiners, variation selectors,
+    and emoji skin tone modifiers occupy none, as they combine with the
+    character before.
+    """
+    if (unicodedata.category(char) in ("Mn", "Me", "Cf")
+        or u"\U0001f3fb" <= char <= u"\U0001f3ff"):
+        return 0
+    elif unicodedata.east_asian_width(char) in ("W", "F"):
+        return 2
+    else:
+        return 1
+
+
+def width(string):
+    """
+    Returns the display width of a string, in terminal cells.
+
+    Pure ASCII strings take the fast path of `len()`; widths of other strings
+    are memoized.
+    """
+    if is_ascii(string):
+        return len(string)
+    try:
+        return _widths[string]
+    except KeyError:
+        if len(_widths) >= MAX_WIDTHS:
+            _widths.clear()
+        result = _widths[string] = sum( char_width(c) for c in string )
+        return result
+
+
+def clip(string, max_width):
+    """
+    Truncates a string to a maximum display width, without splitting a wide
+    character or separating combining characters from their base.
+    """
+    if is_ascii(string):
+        return string[: max_width]
+    total = 0
+    for i, c in enumerate(string):
+        total += char_width(c)
+        if total > max_width:
+            return string[: i]
+    return string
+
+
+def _clip_right(string, max_width):
+    """
+    Returns the longest suffix of a string within a maximum display width that
+    doesn't start with a combining character.
+    """
+    total = 0
+    start = len(string)
+    for i in range(len(string) - 1, -1, -1):
+        char = char_width(string[i])
+        total += char
+        if total > max_width:
+            break
+        if char > 0:
+            start = i
+    return string[start :]
+
+
 def indent(string, indent):
     """
     Indents each line of a string.
@@ -19,7 +107,7 @@ def indent(string, indent):
 
 def pad(string, length, pad=" ", left=False):
     """
-    Pads a string to achieve a minimum length.
+    Pads a string to achieve a minimum display width.
 
     @param pad
       The pad character.
@@ -29,8 +117,9 @@ def pad(string, length, pad=" ", left=False):
     if len(pad) != 1:
         raise ValueError("pad is not a character: {!r}".format(pad))
 
-    if len(string) < length:
-        pad = pad * (length - len(string))
+    string_width = width(string)
+    if string_width < length:
+        pad = pad * (length - string_width)
         return pad + string if left else string + pad
     else:
         return string
@@ -38,9 +127,10 @@ def pad(string, length, pad=" ", left=False):
 
 def elide(string, max_length, ellipsis="...", position=1.0):
     """
-    Elides characters to reduce a string to a maximum length.
+    Elides characters to reduce a string to a maximum display width.
 
-    Replaces elided characters with an ellipsis. 
+    Replaces elided characters with an ellipsis.  If wide characters don't
+    fill the maximum width exactly, the result is narrower.
 
       >>> string = "Hello, world.  This is a test."
       >>> elide(string, 24)
@@ -58,22 +148,30 @@ def elide(string, max_length, ellipsis="...", position=1.0):
       'Hello, world.  ... test.'
 
     """
-    assert max_length >= len(ellipsis)
+    assert max_length >= width(ellipsis)
     assert 0 <= position <= 1
 
     string = six.text_type(string)
-    length = len(string)
-    if length <= max_length:
+    if is_ascii(string):
+        length = len(string)
+        if length <= max_length:
+            return string
+
+        keep    = max_length - width(ellipsis)
+        left    = int(round(position * keep))
+        right   = keep - left
+        left    = string[: left] if left > 0 else ""
+        right   = string[-right :] if right > 0 else ""
+        assert len(left) + len(right) == keep
+        return left + ellipsis + right
+
+    # Measure display width, and elide whole characters.
+    if width(string) <= max_length:
         return string
-
-    keep    = max_length - len(ellipsis)
-    left    = int(round(position * keep))
-    right   = keep - left
-    left    = string[: left] if left > 0 else ""
-    right   = string[-right :] if right > 0 else ""
-    elided  = left + ellipsis + right
-    assert len(elided) == max_length
-    return elided
+    keep    = max_length - width(ellipsis)
+    left    = clip(string, int(round(position * keep)))
+    right   = _clip_right(string[len(left) :], keep - width(left))
+    return left + ellipsis + right
 
 
 def palide(string, length, ellipsis="...", pad=" ", position=1.0, left=False):
@@ -0,0 +1,146 @@
+"""
+Timing of frames drawn by views.
+"""
+
+#-------------------------------------------------------------------------------
+
+from   __future__ import absolute_import, division
+
+from   collections import deque
+import time
+
+#-------------------------------------------------------------------------------
+
+# Phases of drawing a frame.
+PHASES = ("ensure_rows", "fetch", "format", "output")
+
+def format_size(size):
+    """
+    Formats a size in bytes with a binary unit suffix.
+    """
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024:
+            break
+        size /= 1024
+    else:
+        unit = "TB"
+    return "{:.0f} {}".format(size, unit)
+
+
+class FrameTimer:
+    """
+    Records the time spent in each phase of drawing frames.
+
+    A frame runs from handling a key to finishing drawing the screen.  Between
+    `start_frame()` and `end_frame()`, callers add the time spent in each of
+    `PHASES`.  The timer also tracks how many rows the model parsed in the
+    "ensure_rows" phase, for the parse rate.
+    """
+
+    def __init__(self, max_frames=1000, show=True):
+        """
+        @param max_frames
+          The number of most recent frames to keep.
+        @param show
+          Whether the view should show the timing overlay.
+        """
+        self.show           = show
+        self.frames         = deque(maxlen=max_frames)
+        self.totals         = dict.fromkeys(PHASES, 0.0)
+        self.num_frames     = 0
+        self.rows_parsed    = 0
+        self.__frame        = None
+        self.__start        = None
+
+
+    clock = staticmethod(time.time)
+
+
+    def start_frame(self):
+        self.__frame = dict.fromkeys(PHASES, 0.0)
+        self.__start = self.clock()
+
+
+    def add(self, phase, secs):
+        """
+        Adds time spent in a phase of the current frame.
+        """
+        if self.__frame is not None:
+            self.__frame[phase] += secs
+            self.totals[phase] += secs
+
+
+    def add_rows(self, num_rows):
+        """
+        Counts rows parsed in the current frame.
+        """
+        self.rows_parsed += num_rows
+
+
+    def end_frame(self):
+        if self.__frame is None:
+            return
+        frame = self.__frame
+        frame["total"] = self.clock() - self.__start
+        self.frames.append(frame)
+        self.num_frames += 1
+        self.__frame = None
+
+
+    @property
+    def last_frame(self):
+        return self.frames[-1] if len(self.frames) > 0 else None
+
+
+    @property
+    def parse_rate(self):
+        """
+        Rows parsed per second spent parsing, or `None`.
+        """
+        secs = self.totals["ensure_rows"]
+        return self.rows_parsed / secs if secs > 0 else None
+
+
+    def format_overlay(self, memory_size=None):
+        """
+        Formats a short status of the last frame, for display.
+        """
+        frame = self.last_frame
+        parts = [
+            "frame -" if frame is None
+            else "frame {:.1f} ms".format(frame["total"] * 1e3)
+            ]
+        rate = self.parse_rate
+        if rate is not None:
+            parts.append("{:.0f} rows/s".format(rate))
+        if memory_size is not None:
+            parts.append(format_size(memory_size))
+        return " ".join(parts)
+
+
+    def format_summary(self):
+        """
+        Formats a summary of all recorded frames.
+        """
+        frames = list(self.frames)
+        lines = [
+            "frame timing: {} frames, {} rows parsed".format(
+                self.num_frames, self.rows_parsed),
+            "  {:12s} {:>10s} {:>10s} {:>10s}".format(
+                "phase", "mean ms", "max ms", "total s"),
+            ]
+        for phase in PHASES + ("total", ):
+            times = [ f[phase] for f in frames ]
+            total = sum(times)
+            lines.append("  {:12s} {:10.3f} {:10.3f} {:10.3f}".format(
+                phase,
+                1e3 * total / len(times) if len(times) > 0 else 0,
+                1e3 * max(times) if len(times) > 0 else 0,
+                total))
+        rate = self.parse_rate
+        if rate is not None:
+            lines.append("  parse rate: {:.0f} rows/s".format(rate))
+        return "\n".join(lines)
+
+
+
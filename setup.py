@@ -33,6 +33,7 @@ setup(
     install_requires=['numpy', 'pandas', 'pytz', 'six'],
     extras_require = {
         'dev': [''],
+        'export': ['pyarrow'],
         'test': [''],
     },
 
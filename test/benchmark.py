@@ -0,0 +1,458 @@
+"""
+Benchmarks for load, format, and render hot paths.
+
+Generates synthetic CSV data, times each hot path, and writes the results as
+JSON, so that runs can be compared:
+
+  python test/benchmark.py -o before.json
+  python test/benchmark.py -o after.json -c before.json
+
+Startup is timed in a fresh interpreter, with `-X importtime` to attribute the
+time to imports.
+"""
+
+#-------------------------------------------------------------------------------
+
+from   __future__ import absolute_import, division, print_function
+
+import curses
+import datetime
+import io
+import json
+import optparse
+import platform
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from   ngrid import grid, formatters, groupby, parallel, stats
+from   ngrid.lines import LineReader
+from   ngrid.screen import VirtualScreen
+
+#-------------------------------------------------------------------------------
+
+LETTERS = "abcdefghijklmnopqrstuvwxyz"
+
+def random_word():
+    length = random.randint(3, 12)
+    return "".join( random.choice(LETTERS) for _ in range(length) )
+
+
+def _make_value(kind):
+    if kind == "int":
+        return str(random.randint(-100000, 100000))
+    elif kind == "float":
+        return "{:.4f}".format(random.gauss(0, 1000))
+    elif kind == "bool":
+        return random.choice(("true", "false"))
+    elif kind == "datetime":
+        return str(
+            np.datetime64("2014-01-01T00:00:00", "ns")
+            + np.timedelta64(random.randint(0, 10 ** 15), "ns"))
+    else:
+        return random_word()
+
+
+# Column kinds for each kind of CSV.
+CSV_KINDS = {
+    "numeric"   : lambda n: [ ("int", "float")[i % 2] for i in range(n) ],
+    "string"    : lambda n: [ "str" ] * n,
+    "mixed"     : lambda n: [ ("int", "float", "str", "bool")[i % 4]
+                              for i in range(n) ],
+    "ticks"     : lambda n: [ ("datetime", "float", "int")[i % 3]
+                              for i in range(n) ],
+    }
+
+
+def make_csv(kind, num_rows, num_cols):
+    """
+    Generates CSV data.
+
+    @param kind
+      The kind of columns; a key of `CSV_KINDS`.
+    @rtype
+      `bytes`
+    """
+    random.seed(0)
+    kinds = CSV_KINDS[kind](num_cols)
+    lines = [ ",".join( "{}{}".format(k, i) for i, k in enumerate(kinds) ) ]
+    lines.extend(
+        ",".join( _make_value(k) for k in kinds )
+        for _ in range(num_rows) )
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+# Shapes of generated CSV data, as (kind, rows, cols), at scale 1.
+CSV_SHAPES = {
+    "wide"      : ("mixed",     1000,   500),
+    "long"      : ("mixed",   200000,     8),
+    "numeric"   : ("numeric",  50000,    20),
+    "string"    : ("string",   50000,    20),
+    "mixed"     : ("mixed",    50000,    20),
+    "ticks"     : ("ticks",    50000,     6),
+    }
+
+#-------------------------------------------------------------------------------
+
+def time_call(fn, number=None, min_time=0.2):
+    """
+    Times calls to `fn`.
+
+    @param number
+      The number of calls per timing; if `None`, chosen so that a timing takes
+      at least `min_time`.
+    @return
+      The best seconds per call over three timings, and the number of calls.
+    """
+    if number is None:
+        number = 1
+        while True:
+            start = time.time()
+            for _ in range(number):
+                fn()
+            if time.time() - start >= min_time:
+                break
+            number *= 4
+
+    best = None
+    for _ in range(3):
+        start = time.time()
+        for _ in range(number):
+            fn()
+        elapsed = (time.time() - start) / number
+        best = elapsed if best is None else min(best, elapsed)
+    return best, number
+
+
+def _load_model(data, max_rows=grid.MAX_ROWS):
+    return grid.DelimitedFileModel(
+        LineReader(io.BytesIO(data)), True, 100, None, None, "(bench)",
+        max_rows=max_rows)
+
+
+def bench_guess_delimiter(data):
+    lines = data.decode("utf-8").splitlines()[: grid.SAMPLELINES]
+    return lambda: grid.guess_delimiter(lines)
+
+
+def bench_guess_type(values):
+    return lambda: grid.guess_type(values)
+
+
+def bench_default_formatter(type, values):
+    cfg = dict(grid.DEFAULT_CFG)
+    return lambda: grid.get_default_formatter(type, values, cfg)
+
+
+def bench_formatter(fmt, values):
+    def run():
+        for value in values:
+            fmt(value)
+    return run
+
+
+def bench_format_values(fmt, values, block=50):
+    blocks = [ values[i : i + block] for i in range(0, len(values), block) ]
+    def run():
+        for b in blocks:
+            formatters.format_values(fmt, b)
+    return run
+
+
+def bench_ensure_rows(data, max_rows=grid.MAX_ROWS):
+    def run():
+        model = _load_model(data, max_rows)
+        model.ensure_rows(sys.maxsize)
+    return run
+
+
+def bench_parse_range(data, dir):
+    """
+    Times parsing a file into column arrays, as a worker of `--jobs` does.
+
+    @param dir
+      A directory for the file and the arrays.
+    """
+    model = _load_model(data)
+    path = os.path.join(dir, "data.csv")
+    with open(path, "wb") as file:
+        file.write(data)
+    start = data.index(b"\n") + 1
+    def run():
+        parallel._parse_range(
+            path, start, len(data), model.delimiter, model.types, None,
+            "utf-8", dir)
+    return run
+
+
+def bench_group_by(data, key_col):
+    model = _load_model(data)
+    model.ensure_rows(sys.maxsize)
+    def run():
+        groupby.GroupByModel(model, key_col).aggregate(model.num_rows)
+    return run
+
+
+def bench_summary(values, chunk=grid.STATS_CHUNK):
+    def run():
+        summary = stats.make_summary(values)
+        for i in range(0, len(values), chunk):
+            summary.update(values[i : i + chunk])
+    return run
+
+
+def bench_print(data):
+    model = _load_model(data)
+    cfg = dict(grid.DEFAULT_CFG)
+    view = grid.GridView(model, cfg, num_frozen=1)
+    view.set_screen(
+        VirtualScreen(50, 200, capture=False), "utf-8", attrs=[0] * 8)
+    model.ensure_rows(100)
+    return view._GridView__print
+
+
+def bench_session(data, keys):
+    """
+    Runs a scripted session on a virtual screen.
+    """
+    def run():
+        screen = VirtualScreen(50, 200, keys=keys, capture=False)
+        grid.show_model(_load_model(data), num_frozen=1, screen=screen)
+    return run
+
+
+# Shows a file on a virtual screen, as the command line program would.
+STARTUP_SCRIPT = """
+import sys
+from ngrid import grid, main
+from ngrid.lines import LineReader
+from ngrid.screen import VirtualScreen
+model = grid.DelimitedFileModel(
+    LineReader(open(sys.argv[1], "rb")), True, 100, None, None, sys.argv[1])
+grid.show_model(model, num_frozen=1, screen=VirtualScreen(50, 200, keys=[]))
+"""
+
+def bench_startup(path):
+    """
+    Starts a fresh interpreter that imports ngrid and shows a file.
+    """
+    command = [ sys.executable, "-c", STARTUP_SCRIPT, path ]
+    return lambda: subprocess.check_call(command)
+
+
+def get_import_times(module="ngrid.main"):
+    """
+    Imports a module in a fresh interpreter, with `-X importtime`.
+
+    @return
+      Cumulative seconds to import each module at the top three levels of
+      nesting, such as `module`, the modules it imports, and theirs, by name.
+    """
+    proc = subprocess.Popen(
+        [ sys.executable, "-X", "importtime", "-c", "import " + module ],
+        stderr=subprocess.PIPE, universal_newlines=True)
+    _, err = proc.communicate()
+    times = {}
+    for line in err.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        # Names are indented two spaces for each level of nesting.
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth <= 2 and cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative) / 1e6
+    return times
+
+
+def run(scale=1.0):
+    """
+    Runs all benchmarks.
+
+    @return
+      A mapping from benchmark name to result dict.
+    """
+    results = {}
+
+    def record(name, fn, items=1, number=None):
+        secs, number = time_call(fn, number=number)
+        results[name] = dict(
+            secs        =secs,
+            number      =number,
+            items       =items,
+            items_per_sec=items / secs if secs > 0 else None,
+            )
+        print("{:40s} {:12.6f} s {:14.0f} items/s".format(
+            name, secs, results[name]["items_per_sec"] or 0),
+            file=sys.stderr)
+
+    csvs = dict(
+        (n, make_csv(k, max(int(r * scale), 1), c))
+        for n, (k, r, c) in CSV_SHAPES.items() )
+
+    for name, data in sorted(csvs.items()):
+        record("guess_delimiter/" + name, bench_guess_delimiter(data))
+
+    random.seed(0)
+    samples = dict(
+        (k, [ _make_value(k) for _ in range(grid.SAMPLELINES) ])
+        for k in ("int", "float", "bool", "str", "datetime") )
+    for kind, values in sorted(samples.items()):
+        record("guess_type/" + kind, bench_guess_type(values), len(values))
+
+    typed = {
+        int     : [ int(v) for v in samples["int"] ],
+        float   : [ float(v) for v in samples["float"] ],
+        bool    : [ grid.as_bool(v) for v in samples["bool"] ],
+        str     : samples["str"],
+        }
+    for type, values in sorted(typed.items(), key=lambda i: i[0].__name__):
+        record(
+            "get_default_formatter/" + type.__name__,
+            bench_default_formatter(type, values), len(values))
+
+    values = typed[float] * 50
+    epoch = datetime.datetime(2014, 1, 1)
+    fmts = [
+        ("BoolFormatter",   formatters.BoolFormatter(),     typed[bool] * 50),
+        ("IntFormatter",    formatters.IntFormatter(8),     typed[int] * 50),
+        ("FloatFormatter",  formatters.FloatFormatter(6, 4), values),
+        ("EFloatFormatter", formatters.EFloatFormatter(2, 4), values),
+        ("StrFormatter",    formatters.StrFormatter(8),     typed[str] * 50),
+        # Long strings, elided with the default ellipsis.
+        ("StrFormatter/elided", 
+         formatters.StrFormatter(4, ellipsis=grid.DEFAULT_CFG["ellipsis"]),
+         typed[str] * 50),
+        ("DatetimeFormatter", formatters.DatetimeFormatter(),
+         [ epoch + datetime.timedelta(seconds=i * 7919)
+           for i in range(len(values)) ]),
+        ]
+    for name, fmt, vals in fmts:
+        record("formatter/" + name, bench_formatter(fmt, vals), len(vals))
+
+    # Format screen-sized blocks of datetime64 values.
+    times = np.datetime64("2014-01-01", "ns") + np.arange(
+        0, len(values) * 7919123456789, 7919123456789).astype("timedelta64[ns]")
+    for tz in ("UTC", "America/New_York"):
+        fmt = formatters.DatetimeFormatter(precision=9, tz=tz)
+        record(
+            "format_values/DatetimeFormatter/" + tz, 
+            bench_format_values(fmt, times), len(times))
+
+    for name, data in sorted(csvs.items()):
+        num_rows = CSV_SHAPES[name][1]
+        record(
+            "ensure_rows/" + name, bench_ensure_rows(data),
+            max(int(num_rows * scale), 1), number=1)
+    # Read a stream, keeping few rows in memory and spilling the rest.
+    record(
+        "ensure_rows/long/spill", bench_ensure_rows(csvs["long"], 4096),
+        max(int(CSV_SHAPES["long"][1] * scale), 1), number=1)
+
+    # Parse into column arrays, as for --jobs.
+    dir = tempfile.mkdtemp()
+    try:
+        for name, data in sorted(csvs.items()):
+            num_rows = CSV_SHAPES[name][1]
+            record(
+                "parse_range/" + name, bench_parse_range(data, dir),
+                max(int(num_rows * scale), 1), number=1)
+    finally:
+        shutil.rmtree(dir)
+
+    # Summaries for the histogram and top values popup.
+    num = max(int(1000000 * scale), 1)
+    record(
+        "summary/Histogram", bench_summary(np.random.normal(size=num)), num)
+    words = np.array([ random_word() for _ in range(100) ], dtype=object)
+    record(
+        "summary/TopValues", 
+        bench_summary(words[np.random.randint(0, 100, num)]), num)
+
+    # Group the long table by its first string column.
+    record(
+        "group_by/long", bench_group_by(csvs["long"], 2),
+        max(int(CSV_SHAPES["long"][1] * scale), 1), number=1)
+
+    for name, data in sorted(csvs.items()):
+        record("print/" + name, bench_print(data))
+
+    # Open, page down 1000 times, jump to the end.
+    keys = [ curses.KEY_NPAGE ] * 1000 + [ "G" ]
+    record("session/long", bench_session(csvs["long"], keys), len(keys),
+           number=1)
+
+    if sys.version_info >= (3, 7):
+        # Time from starting the interpreter to showing a small file, and
+        # imports that contribute to it.
+        with tempfile.NamedTemporaryFile(suffix=".csv") as file:
+            file.write(make_csv("mixed", 100, 10))
+            file.flush()
+            record("startup/small", bench_startup(file.name), number=3)
+        for name, secs in sorted(get_import_times().items()):
+            results["import/" + name] = dict(
+                secs=secs, number=1, items=1, items_per_sec=None)
+            print("{:40s} {:12.6f} s".format("import/" + name, secs),
+                  file=sys.stderr)
+
+    return results
+
+
+def compare(results, baseline):
+    """
+    Prints the ratio of each timing to a baseline.
+    """
+    for name in sorted(results):
+        if name in baseline:
+            ratio = results[name]["secs"] / baseline[name]["secs"]
+            print("{:40s} {:8.2f}x".format(name, ratio))
+
+
+def main():
+    parser = optparse.OptionParser()
+    parser.add_option(
+        "-s", "--scale", metavar="FACTOR",
+        action="store", type="float", dest="scale", default=1.0,
+        help="scale the number of generated rows by FACTOR [default: 1]")
+    parser.add_option(
+        "-o", "--output", metavar="FILE",
+        action="store", type="string", dest="output", default=None,
+        help="write JSON results to FILE")
+    parser.add_option(
+        "-c", "--compare", metavar="FILE",
+        action="store", type="string", dest="compare", default=None,
+        help="compare to JSON results in FILE")
+    options, _ = parser.parse_args()
+
+    results = run(options.scale)
+    output = dict(
+        timestamp   =time.time(),
+        python      =platform.python_version(),
+        numpy       =np.__version__,
+        platform    =platform.platform(),
+        scale       =options.scale,
+        results     =results,
+        )
+
+    if options.output is None:
+        json.dump(output, sys.stdout, indent=2, sort_keys=True)
+        print()
+    else:
+        with open(options.output, "w") as file:
+            json.dump(output, file, indent=2, sort_keys=True)
+
+    if options.compare is not None:
+        with open(options.compare) as file:
+            baseline = json.load(file)["results"]
+        compare(results, baseline)
+
+
+if __name__ == "__main__":
+    main()
+
+
@@ -0,0 +1,110 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from   ngrid import grid
+from   ngrid.cache import SUFFIX, SidecarCache
+from   ngrid.lines import LineReader
+
+#-------------------------------------------------------------------------------
+
+class SidecarCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.cache = SidecarCache(os.path.join(self.dir, "cache"))
+        self.path = self.write("data.csv", 100)
+
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+
+    def write(self, name, num_rows, mode="w"):
+        path = os.path.join(self.dir, name)
+        with open(path, mode) as file:
+            if mode == "w":
+                file.write("id,value\n")
+            for i in range(num_rows):
+                file.write("{},{}\n".format(i, i / 2))
+        return path
+
+
+    def open_model(self, cached=None):
+        return grid.DelimitedFileModel(
+            LineReader(open(self.path, "rb")), True, 100, None, None,
+            self.path, cached=cached)
+
+
+    def get_entries(self):
+        return sorted(
+            n for n in os.listdir(self.cache.path) if n.endswith(SUFFIX))
+
+
+    def test_store_load(self):
+        self.assertIsNone(self.cache.load(self.path))
+        model = self.open_model()
+        model.ensure_rows(sys.maxsize)
+        self.cache.store(self.path, model.get_cache_entry(grid.DEFAULT_CFG))
+
+        entry = self.cache.load(self.path)
+        self.assertEqual(model.types, entry["types"])
+        self.assertEqual(100, len(entry["offsets"]))
+        # A model from the entry reads rows by offset.
+        cached = self.open_model(entry)
+        self.assertTrue(cached.done)
+        self.assertEqual(100, cached.num_rows)
+        self.assertEqual([99, 49.5], cached.get_row(99))
+
+
+    def test_mismatch(self):
+        self.cache.store(self.path, dict(types=(int, float)))
+        self.assertIsNotNone(self.cache.load(self.path))
+        # The file changed.
+        self.write("data.csv", 10, mode="a")
+        self.assertIsNone(self.cache.load(self.path))
+        # A corrupt entry is discarded.
+        name, = self.get_entries()
+        with open(os.path.join(self.cache.path, name), "wb") as file:
+            file.write(b"not an entry")
+        self.assertIsNone(self.cache.load(self.path))
+        self.assertEqual([], self.get_entries())
+
+
+    def test_grown(self):
+        # The file grows while it's shown.
+        self.assertIsNone(self.cache.load(self.path))
+        model = self.open_model()
+        model.ensure_rows(sys.maxsize)
+        self.write("data.csv", 10, mode="a")
+        self.cache.store(self.path, model.get_cache_entry(grid.DEFAULT_CFG))
+        # The entry is for the old contents, so it isn't used.
+        self.assertIsNone(self.cache.load(self.path))
+
+
+    def test_evict(self):
+        paths = [ self.write("data{}.csv".format(i), 10) for i in range(3) ]
+        entry = dict(data=b"x" * 1000)
+        self.cache.store(paths[0], entry)
+        size = os.path.getsize(
+            os.path.join(self.cache.path, self.get_entries()[0]))
+        cache = SidecarCache(self.cache.path, max_size=2 * size)
+        cache.store(paths[1], entry)
+        for name in self.get_entries():
+            os.utime(os.path.join(self.cache.path, name), (1, 1))
+        # Loading marks the first entry as recently used.
+        self.assertIsNotNone(cache.load(paths[0]))
+        cache.store(paths[2], entry)
+        self.assertEqual(2, len(self.get_entries()))
+        self.assertIsNotNone(cache.load(paths[0]))
+        self.assertIsNone(cache.load(paths[1]))
+        self.assertIsNotNone(cache.load(paths[2]))
+
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+
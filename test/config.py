@@ -0,0 +1,101 @@
+import optparse
+import os
+import shutil
+import tempfile
+import unittest
+
+from   ngrid.config import load_config, parse_config
+from   ngrid.main import apply_settings
+
+#-------------------------------------------------------------------------------
+
+CONFIG = """
+# Defaults.
+[ngrid]
+max_rows = 1000
+precision_max = 3
+
+[*.psv]
+delimiter = |
+; Later profiles win.
+[data*.psv]
+no_header = true
+max_rows = 10
+"""
+
+class ConfigTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "config")
+        with open(self.path, "w") as file:
+            file.write(CONFIG)
+
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+
+    def test_parse(self):
+        sections = parse_config(CONFIG.splitlines())
+        self.assertEqual(
+            ["ngrid", "*.psv", "data*.psv"], [ n for n, _ in sections ])
+        self.assertEqual({"delimiter": "|"}, sections[1][1])
+        with self.assertRaises(ValueError):
+            parse_config(["max_rows = 10"])
+        with self.assertRaises(ValueError):
+            parse_config(["[ngrid]", "max_rows"])
+
+
+    def test_profiles(self):
+        self.assertEqual(
+            {"max_rows": "1000", "precision_max": "3"},
+            load_config("x.csv", self.path))
+        self.assertEqual(
+            {"max_rows": "10", "precision_max": "3", "delimiter": "|",
+             "no_header": "true"},
+            load_config("/tmp/data1.psv", self.path))
+        self.assertEqual({}, load_config("x.csv", self.path + "-missing"))
+
+
+    def test_apply(self):
+        parser = optparse.OptionParser()
+        parser.set_defaults(hasHeader=True, maxRows=5)
+        parser.add_option(
+            "-n", "--no_header", action="store_false", dest="hasHeader")
+        parser.add_option(
+            "--max_rows", action="store", type="int", dest="maxRows")
+        parser.add_option("-d", "--delimiter", action="store", dest="delim")
+        cfg = apply_settings(parser, load_config("data.psv", self.path))
+        # Display parameters are returned.
+        self.assertEqual({"precision_max": "3"}, cfg)
+        options, _ = parser.parse_args([])
+        self.assertEqual(
+            (False, 10, "|"), 
+            (options.hasHeader, options.maxRows, options.delim))
+        # The command line wins.
+        options, _ = parser.parse_args(["--max_rows", "7"])
+        self.assertEqual(7, options.maxRows)
+        with self.assertRaises(ValueError):
+            apply_settings(parser, {"max_rows": "many"})
+        with self.assertRaises(ValueError):
+            apply_settings(parser, {"colour": "blue"})
+        # Display parameters are checked.
+        self.assertEqual(
+            {"max_fps": "2.5", "precision_min": "0", "show_footer": "false"},
+            apply_settings(parser, {
+                "max_fps": "2.5", "precision_min": "0",
+                "show_footer": "false"}))
+        for name, value in (
+                ("max_fps", "0"), ("precision_max", "x"),
+                ("precision_min", "-1"), ("str_width_max", "2.5"),
+                ("scientific_max", "nan"), ("show_cursor", "maybe")):
+            with self.assertRaises(ValueError):
+                apply_settings(parser, {name: value})
+
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+
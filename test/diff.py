@@ -0,0 +1,141 @@
+import io
+import sys
+import unittest
+
+from   ngrid import diff, grid
+from   ngrid.diff import DiffModel
+from   ngrid.lines import LineReader
+from   ngrid.screen import VirtualScreen
+
+#-------------------------------------------------------------------------------
+
+def make_model(rows, filename, header="id,value,name"):
+    text = header + "\n" + "".join( ",".join(map(str, r)) + "\n" for r in rows )
+    return grid.DelimitedFileModel(
+        LineReader(io.BytesIO(text.encode())), True, 100, None, None, filename)
+
+
+def get_rows(model):
+    model.ensure_rows(sys.maxsize)
+    return [ model.get_row(i) for i in range(model.num_rows) ]
+
+
+class DiffModelTest(unittest.TestCase):
+
+    def setUp(self):
+        self.chunk = diff.DIFF_CHUNK
+        # Compare in small chunks, to cross chunk boundaries.
+        diff.DIFF_CHUNK = 3
+        self.left = [ (i, i / 2, "n{}".format(i)) for i in range(10) ]
+        self.right = [ (i, i / 2, "n{}".format(i)) for i in range(10) if i != 4 ]
+        self.right[1] = (1, 0.501, "n1")
+        self.right[6] = (7, 3.5, "seven")
+        self.right.append((12, 6.0, "n12"))
+
+
+    def tearDown(self):
+        diff.DIFF_CHUNK = self.chunk
+
+
+    def test_position(self):
+        model = DiffModel(
+            make_model(self.left[: 4], "a"), make_model(self.right[: 5], "b"))
+        self.assertEqual(
+            ("", "id <", "id >", "value <", "value >", "name <", "name >"),
+            model.names)
+        rows = get_rows(model)
+        self.assertEqual(["~", 1, 1, 0.5, 0.501, "n1", "n1"], rows[1])
+        self.assertEqual(["+", None, 5, None, 2.5, None, "n5"], rows[4])
+        self.assertEqual(set([0, 3, 4]), model.get_highlighted(1))
+        self.assertEqual(set(), model.get_highlighted(0))
+
+
+    def test_merge(self):
+        model = DiffModel(
+            make_model(self.left, "a"), make_model(self.right, "b"), key="id",
+            atol=0.01)
+        self.assertEqual(
+            ("", "id", "value <", "value >", "name <", "name >"), model.names)
+        rows = get_rows(model)
+        # In key order, with rows only on one side.
+        self.assertEqual(list(range(10)) + [12], [ r[1] for r in rows ])
+        self.assertEqual(["-", 4, 2.0, None, "n4", None], rows[4])
+        self.assertEqual(["~", 7, 3.5, 3.5, "n7", "seven"], rows[7])
+        self.assertEqual(["+", 12, None, 6.0, None, "n12"], rows[10])
+        # Within tolerance.
+        self.assertEqual("", rows[1][0])
+        self.assertEqual({"~": 1, "-": 1, "+": 1}, model.counts)
+
+
+    def test_merge_past_end(self):
+        # Several chunks on one side past the last key on the other.
+        for left, right in ((20, 4), (4, 20)):
+            model = DiffModel(
+                make_model([ (i, i, "n") for i in range(left) ], "a"),
+                make_model([ (i, i, "n") for i in range(right) ], "b"),
+                key="id")
+            rows = get_rows(model)
+            self.assertEqual(list(range(20)), [ r[1] for r in rows ])
+            self.assertEqual(
+                {"~": 0, "-": left - 4, "+": right - 4}, model.counts)
+
+
+    def test_hash_join(self):
+        right = self.right[::-1]
+        model = DiffModel(
+            make_model(self.left, "a"), make_model(right, "b"), key="id",
+            changes_only=True)
+        rows = get_rows(model)
+        # In left order, then rows only on the right.
+        self.assertEqual([1, 4, 7, 12], [ r[1] for r in rows ])
+        self.assertEqual(["~", "-", "~", "+"], [ r[0] for r in rows ])
+        self.assertEqual(set([0, 2, 3]), model.get_highlighted(0))
+
+
+    def test_key_only(self):
+        # No columns to compare, other than the key.
+        model = DiffModel(
+            make_model(self.left, "a", "id,value,name"),
+            make_model(self.right, "b", "id,x,y"), key="id")
+        self.assertEqual(("", "id"), model.names[: 2])
+        rows = get_rows(model)
+        self.assertEqual(["-", 4], rows[4][: 2])
+        self.assertEqual({"~": 0, "-": 1, "+": 1}, model.counts)
+
+
+    def test_missing_keys(self):
+        # Rows with missing keys match each other.
+        left = [(1.5, 1), ("", 2), (3.5, 3)]
+        right = [(3.5, 3), (1.5, 1), ("", 4)]
+        for key_rows in (right, sorted(right, key=lambda r: str(r[0]))):
+            model = DiffModel(
+                make_model(left, "a", "k,v"), make_model(key_rows, "b", "k,v"),
+                key="k")
+            rows = get_rows(model)
+            self.assertEqual({"~": 1, "-": 0, "+": 0}, model.counts)
+            self.assertEqual(3, len(rows))
+
+
+    def test_view(self):
+        model = DiffModel(
+            make_model(self.left, "a"), make_model(self.right, "b"), key="id")
+        screen = VirtualScreen(15, 80)
+        grid.show_model(model, num_frozen=2, screen=screen)
+        frame = screen.frames[0]
+        self.assertEqual(
+            ["-", "4", "2.0", "n4"], frame[5].split())
+        self.assertIn("a vs b: ~2 -1 +1", frame[-1])
+        # Changed cells are highlighted.
+        attrs = screen.get_attrs(8)
+        line = frame[8]
+        highlight = screen.color_pair(8)
+        self.assertEqual(highlight, attrs[line.index("n7")])
+        self.assertEqual(highlight, attrs[line.index("seven")])
+        self.assertNotEqual(highlight, attrs[line.index("3.5")])
+
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+
@@ -0,0 +1,139 @@
+import curses
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from   ngrid import export, grid
+from   ngrid.export import Exporter, format_csv_column
+from   ngrid.groupby import GroupByModel
+from   ngrid.lines import LineReader
+from   ngrid.screen import VirtualScreen
+
+#-------------------------------------------------------------------------------
+
+def make_model(num_rows=1000):
+    data = "id,value,name\n" + "".join(
+        "{},{},\"n,{}\"\n".format(i, "" if i % 7 == 0 else i / 4, i % 3)
+        for i in range(num_rows) )
+    return grid.DelimitedFileModel(
+        LineReader(io.BytesIO(data.encode("utf-8"))), True, 100, None, None,
+        "test.csv")
+
+
+class ExportTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "out.csv")
+        self.chunk = export.EXPORT_CHUNK
+        export.EXPORT_CHUNK = 100
+
+
+    def tearDown(self):
+        export.EXPORT_CHUNK = self.chunk
+        shutil.rmtree(self.dir)
+
+
+    def read(self):
+        with open(self.path) as file:
+            return file.read().splitlines()
+
+
+    def test_format_csv_column(self):
+        self.assertEqual(
+            ["1.5", ""], format_csv_column(np.array([1.5, np.nan])))
+        self.assertEqual(
+            ["a", '"b,c"', '"say ""hi"""'],
+            format_csv_column(np.array(["a", "b,c", 'say "hi"'])))
+        self.assertEqual(
+            ["2024-01-02T03:04:05.000000000", ""],
+            format_csv_column(np.array(
+                ["2024-01-02T03:04:05", "NaT"], dtype="datetime64[ns]")))
+
+
+    def test_csv(self):
+        exporter = Exporter(make_model(), [2, 0], self.path)
+        self.assertFalse(exporter.step())
+        self.assertEqual(100, exporter.num_rows)
+        exporter.run()
+        self.assertTrue(exporter.done)
+        self.assertEqual(1000, exporter.num_rows)
+        lines = self.read()
+        self.assertEqual(1001, len(lines))
+        self.assertEqual(["name,id", '"n,0",0', '"n,1",1'], lines[: 3])
+
+
+    def test_filtered(self):
+        model = make_model()
+        groups = GroupByModel(model, 2)
+        exporter = Exporter(groups.get_group_model(1), [0, 1], self.path)
+        exporter.run()
+        lines = self.read()
+        self.assertEqual(334, len(lines))
+        self.assertEqual(["id,value", "1,0.25", "4,1.0", "7,"], lines[: 4])
+
+
+    def test_format(self):
+        with self.assertRaises(ValueError):
+            Exporter(make_model(), [0], os.path.join(self.dir, "out.xls"))
+        try:
+            import pyarrow
+        except ImportError:
+            with self.assertRaises(ImportError):
+                Exporter(
+                    make_model(), [0], os.path.join(self.dir, "out.parquet"))
+        else:
+            path = os.path.join(self.dir, "out.parquet")
+            Exporter(make_model(), [0, 1], path).run()
+            import pyarrow.parquet
+            table = pyarrow.parquet.read_table(path)
+            self.assertEqual(["id", "value"], table.column_names)
+            self.assertEqual(1000, table.num_rows)
+
+
+    def test_view(self):
+        secs = grid.EXPORT_SECS
+        grid.EXPORT_SECS = 0
+        try:
+            # Hide the value column, and export.
+            keys = ["~", curses.KEY_RIGHT, "-", "S"]
+            keys += list(self.path) + ["\n", -1]
+            screen = VirtualScreen(10, 80, keys=keys)
+            grid.show_model(make_model(), num_frozen=1, screen=screen)
+        finally:
+            grid.EXPORT_SECS = secs
+        self.assertIn(
+            "[exporting {} 100 rows]".format(self.path), screen.frames[-1][-1])
+        # The export finishes on exit.
+        lines = self.read()
+        self.assertEqual(1001, len(lines))
+        self.assertEqual(["id,name", '0,"n,0"'], lines[: 2])
+
+
+    def test_long_path(self):
+        # A long path is elided to fit the footer, with the cursor value.
+        path = os.path.join(self.dir, "x" * max(60 - len(self.dir), 1) + ".csv")
+        secs = grid.EXPORT_SECS
+        grid.EXPORT_SECS = 0
+        try:
+            keys = ["~", "S"] + list(path) + ["\n", -1]
+            screen = VirtualScreen(10, 80, keys=keys)
+            grid.show_model(make_model(), num_frozen=1, screen=screen)
+        finally:
+            grid.EXPORT_SECS = secs
+        footer = screen.frames[-1][-1]
+        self.assertIn("100 rows]", footer)
+        self.assertNotIn(path, footer)
+        self.assertLessEqual(len(footer.rstrip()), 80)
+        self.assertTrue(os.path.exists(path))
+
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+
@@ -0,0 +1,84 @@
+import os
+import shutil
+import socket
+import tempfile
+import unittest
+
+from   ngrid import grid
+from   ngrid.feed import InputLoop, parse_address
+from   ngrid.screen import VirtualScreen
+
+#-------------------------------------------------------------------------------
+
+class FeedTest(unittest.TestCase):
+
+    def test_parse_address(self):
+        self.assertEqual(("localhost", 5000), parse_address(":5000"))
+        self.assertEqual(("127.0.0.1", 80), parse_address("127.0.0.1:80"))
+        self.assertEqual("/tmp/feed:x", parse_address("/tmp/feed:x"))
+
+
+    def test_listen(self):
+        dir = tempfile.mkdtemp()
+        input_loop = InputLoop()
+        try:
+            path = os.path.join(dir, "feed.sock")
+            feed = input_loop.listen(path, skip_headers=True)
+            self.assertEqual(0, feed.pending)
+
+            client = socket.socket(socket.AF_UNIX)
+            client.connect(path)
+            client.sendall(b"a,b\n1,2\n3,")
+            self.assertEqual(["a,b", "1,2"], [next(feed), next(feed)])
+            # The incomplete line isn't available yet.
+            self.assertEqual(0, feed.pending)
+            client.sendall(b"4\n")
+            client.close()
+            self.assertEqual("3,4", next(feed))
+
+            # A repeated header from another connection is skipped.
+            client = socket.socket(socket.AF_UNIX)
+            client.connect(path)
+            client.sendall(b"a,b\n5,6")
+            client.close()
+            self.assertEqual("5,6", next(feed))
+            self.assertFalse(feed.eof)
+        finally:
+            input_loop.close()
+            shutil.rmtree(dir)
+
+
+    def test_pipe(self):
+        r, w = os.pipe()
+        input_loop = InputLoop()
+        try:
+            feed = input_loop.open_pipe(os.fdopen(r, "rb"))
+            os.write(w, b"id,value\n" + b"".join(
+                "{},{}\n".format(i, i % 10).encode() for i in range(10, 15) ))
+            model = grid.DelimitedFileModel(
+                feed, True, 2, None, None, "(pipe)")
+            # More rows arrive while the view waits for a key.
+            os.write(w, b"".join(
+                "{},{}\n".format(i, i % 10).encode() for i in range(15, 100) ))
+            os.close(w)
+            w = None
+            screen = VirtualScreen(10, 40, keys=[-1, "T"])
+            grid.show_model(
+                model, num_frozen=1, screen=screen, input_loop=input_loop)
+            self.assertTrue(model.done)
+            self.assertEqual(90, model.num_rows)
+            self.assertIn("/5+", screen.frames[0][-1])
+            self.assertIn("lines 0-8/90", screen.frames[1][-1])
+            # Follow to the end.
+            self.assertEqual(["99", "9"], screen.frames[2][-2].split())
+        finally:
+            if w is not None:
+                os.close(w)
+            input_loop.close()
+
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+
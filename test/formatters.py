@@ -1,7 +1,9 @@
+import numpy as np
 import six
 import unittest
 
 from   ngrid.formatters import *
+from   ngrid import text
 
 #-------------------------------------------------------------------------------
 
@@ -298,6 +300,20 @@ class FloatFormatterTest(unittest.TestCase):
         self.assertEqual('-INFIN', fmt(NEG_INF))
 
 
+    def test_limits(self):
+        fmt = FloatFormatter(4, 2, pad="0", sign="+")
+        self.assertEqual('+0000.00', fmt(    -0.0  ))
+        self.assertEqual('-0000.00', fmt(    -1e-9 ))
+        self.assertEqual('+0003.14', fmt(     3.14159))
+        self.assertEqual('########', fmt( 12345.0  ))
+        self.assertEqual('########', fmt(   1e300  ))
+
+        fmt = FloatFormatter(4, 2)
+        self.assertEqual('    0.00', fmt(    -0.0  ))
+        self.assertEqual('   -0.00', fmt(    -1e-9 ))
+        self.assertEqual('    0.00', fmt(   5e-324 ))
+
+
 
 #-------------------------------------------------------------------------------
 
@@ -532,6 +548,101 @@ class EFloatFormatterTest(unittest.TestCase):
         self.assertEqual('-INFIN', fmt(NEG_INF))
 
 
+    def test_rounding(self):
+        fmt = EFloatFormatter(1, None)
+        self.assertEqual(' 7E-1', fmt(      0.66 ))
+        self.assertEqual('-1E+1', fmt(     -9.99 ))
+
+        fmt = EFloatFormatter(2, 1)
+        self.assertEqual(' 9.0E+96', fmt(  9.04e96 ))
+        self.assertEqual(' 1.0E+97', fmt(  9.96e96 ))
+        self.assertEqual('########', fmt(   1.7e308))
+
+
+
+class DatetimeFormatterTest(unittest.TestCase):
+
+    VALUES = np.array([
+        "2014-09-17T10:07:53.123456789", 
+        "NaT", 
+        "2014-03-09T06:59:59", 
+        "2014-03-09T07:00:00",
+        ], dtype="datetime64[ns]")
+
+    def test_default(self):
+        fmt = DatetimeFormatter()
+        self.assertEqual(20, fmt.width)
+        self.assertEqual([
+            "2014-09-17T10:07:53Z", 
+            "                 NaT", 
+            "2014-03-09T06:59:59Z", 
+            "2014-03-09T07:00:00Z",
+            ], fmt.format_array(self.VALUES))
+        self.assertEqual("2014-09-17T10:07:53Z", fmt(self.VALUES[0]))
+
+
+    def test_precision(self):
+        fmt = DatetimeFormatter("simple", precision=3)
+        self.assertEqual("2014-09-17 10:07:53.123", fmt(self.VALUES[0]))
+        fmt = fmt.changing(precision=9)
+        self.assertEqual(
+            "2014-09-17 10:07:53.123456789", fmt(self.VALUES[0]))
+
+
+    def test_tz(self):
+        fmt = DatetimeFormatter(tz="America/New_York")
+        self.assertEqual([
+            "2014-09-17T06:07:53-04:00",
+            "                      NaT",
+            "2014-03-09T01:59:59-05:00",
+            "2014-03-09T03:00:00-04:00",
+            ], fmt.format_array(self.VALUES))
+        fmt = DatetimeFormatter("ISO 8601", tz="Asia/Kolkata")
+        self.assertEqual("20140917T153753+0530", fmt(self.VALUES[0]))
+
+
+    def test_strftime(self):
+        fmt = DatetimeFormatter("%a %d %b %H:%M", tz="Europe/London")
+        self.assertEqual(
+            ["Wed 17 Sep 11:07", "             NaT"], 
+            fmt.format_array(self.VALUES[: 2]))
+
+
+
+class StrFormatterTest(unittest.TestCase):
+
+    def test_format_codes(self):
+        fmt = StrFormatter(5)
+        dictionary = np.array(["NYSE", "NASDAQ"])
+        codes = np.array([1, 0, 1], dtype=np.uint8)
+        self.assertEqual(
+            ["NA...", "NYSE ", "NA..."], fmt.format_codes(codes, dictionary))
+        self.assertEqual(
+            ["NYSE "], format_codes(fmt, codes[1 : 2], dictionary))
+        # Formatters without format_codes() format the decoded values.
+        self.assertEqual(
+            ["   1", "   0"],
+            format_codes(IntFormatter(3), codes[: 2], np.arange(2)))
+
+
+    def test_wide(self):
+        # Widths are display widths; wide characters occupy two cells.
+        fmt = StrFormatter(6)
+        self.assertEqual(u"\u6f22\u5b57  ", fmt(u"\u6f22\u5b57"))
+        self.assertEqual(u"\u6f22... ", fmt(u"\u6f22\u5b57\u30c6\u30b9\u30c8"))
+        # A wide character that doesn't fit whole is elided, and padded.
+        self.assertEqual(u"ab... ", fmt(u"ab\u6f22\u5b57\u30c6"))
+        # An ellipsis character occupies one cell.
+        self.assertEqual(
+            u"abcde\u2026", StrFormatter(6, ellipsis=u"\u2026")(u"abcdefgh"))
+        # Combining characters stay with their base.
+        self.assertEqual(u"cafe\u0301  ", fmt(u"cafe\u0301"))
+        # So do skin tone modifiers.
+        self.assertEqual(2, text.width(u"\U0001f44d\U0001f3fd"))
+        self.assertEqual(
+            u"\U0001f44d\U0001f3fd    ", fmt(u"\U0001f44d\U0001f3fd"))
+
+
 
 #-------------------------------------------------------------------------------
 
@@ -0,0 +1,550 @@
+import curses
+from   datetime import datetime
+import io
+import os
+import tempfile
+import threading
+import unittest
+
+import numpy as np
+import six
+
+from   ngrid import formatters, grid, groupby, text
+from   ngrid.lines import LineReader
+from   ngrid.screen import VirtualScreen
+from   ngrid.timing import FrameTimer
+
+#-------------------------------------------------------------------------------
+
+def make_model(num_rows=1000):
+    data = "id,value,name\n" + "".join(
+        "{},{:.2f},n{}\n".format(i, i / 4, i) for i in range(num_rows) )
+    return grid.DelimitedFileModel(
+        LineReader(io.BytesIO(data.encode("utf-8"))), True, 100, None, None,
+        "test.csv")
+
+
+class DatetimeTest(unittest.TestCase):
+
+    def test_guess_type(self):
+        self.assertIs(datetime, grid.guess_type(
+            ["2024-01-02T03:04:05Z", "2024-01-02 03:04:05.5", ""])[0])
+        self.assertIs(datetime, grid.guess_type(["2024-01-02"])[0])
+        self.assertIs(str, grid.guess_type(["2024-01-02", "soon"])[0])
+        # Epoch times need a suggestive name.
+        self.assertIs(int, grid.guess_type(["1704164645"])[0])
+        self.assertIs(int, grid.guess_type(["1704164645"], "id")[0])
+        self.assertIs(
+            datetime, grid.guess_type(["1704164645123"], "timestamp")[0])
+        self.assertIs(int, grid.guess_type(["12345"], "time")[0])
+        for name in ("created_ts", "eventTime", "UNIX_TIME", "dates", "epoch"):
+            self.assertIs(
+                datetime, grid.guess_type(["1704164645"], name)[0], name)
+        # Names that only contain such words aren't times.
+        for name in (
+                "candidate_id", "update_seq", "timeout_ms", "runtime",
+                "tsv_count", "Stats"):
+            self.assertIs(int, grid.guess_type(["1704164645"], name)[0], name)
+
+
+    def test_as_array(self):
+        expected = np.array(
+            ["2024-01-02T03:04:05", "NaT", "2024-01-02T03:04:05.123456789"],
+            dtype="datetime64[ns]")
+        arr = grid.as_array(datetime, [
+            "2024-01-02T03:04:05Z", "", "2024-01-02 03:04:05.123456789"])
+        np.testing.assert_array_equal(expected, arr)
+        arr = grid.as_array(
+            datetime, ["1704164645", "", "1704164645123456789"])
+        np.testing.assert_array_equal(expected, arr)
+        # UTC offsets take the scalar path.
+        arr = grid.as_array(datetime, ["2024-01-02T08:34:05+05:30"])
+        np.testing.assert_array_equal(expected[: 1], arr)
+        with self.assertRaises(ValueError):
+            grid.as_array(datetime, ["2024-01-02", "soon"])
+
+
+    def test_model(self):
+        data = (
+            "time,ts,day\n"
+            "2024-01-02T03:04:05Z,1704164645123,2024-01-02\n"
+            ",1704164646123,2024-01-03\n")
+        model = grid.DelimitedFileModel(
+            LineReader(io.BytesIO(data.encode("utf-8"))), True, 100, None,
+            None, "test.csv")
+        self.assertEqual((datetime, datetime, datetime), model.types)
+        fmts = model.get_default_formatters(grid.DEFAULT_CFG)
+        model.ensure_rows(2)
+        rows = [ 
+            [ f(v) for f, v in zip(fmts, model.get_row(i)) ] 
+            for i in range(2) ]
+        self.assertEqual(
+            ["2024-01-02T03:04:05Z", "2024-01-02T03:04:05.123Z", "2024-01-02"],
+            rows[0])
+        self.assertEqual("NaT", rows[1][0].strip())
+
+
+
+class GroupByTest(unittest.TestCase):
+
+    def make_model(self):
+        data = "sym,px,qty\n" + "".join(
+            "{},{},{}\n".format("ABC"[i % 3], "" if i % 5 == 0 else i, i)
+            for i in range(30) )
+        return grid.DelimitedFileModel(
+            LineReader(io.BytesIO(data.encode("utf-8"))), True, 10, None, None,
+            "test.csv")
+
+
+    def test_aggregate(self):
+        model = groupby.GroupByModel(self.make_model(), 0)
+        self.assertEqual(3, model.ensure_rows(3))
+        self.assertTrue(model.done)
+        self.assertEqual(
+            ("sym", "count", "px sum", "px mean", "px min", "px max",
+             "qty sum", "qty mean", "qty min", "qty max"),
+            model.names)
+        # Missing px values are skipped.
+        self.assertEqual(
+            ["B", 10, 110, 13.75, 1, 28, 145, 14.5, 1, 28], model.get_row(1))
+        self.assertEqual(["C", 10], model.get_row(2, [0, 1]))
+
+
+    def test_order(self):
+        # Groups are in the order their keys are first seen.
+        data = "sym,n\nC,1\nA,2\nB,3\nC,4\n"
+        source = grid.DelimitedFileModel(
+            LineReader(io.BytesIO(data.encode("utf-8"))), True, 10, None, None,
+            "test.csv")
+        model = groupby.GroupByModel(source, 0)
+        model.ensure_rows(10)
+        self.assertEqual(
+            [["C", 2, 5], ["A", 1, 2], ["B", 1, 3]],
+            [ model.get_row(i, [0, 1, 2]) for i in range(model.num_rows) ])
+        self.assertEqual([0, 3], model.find_rows(0).tolist())
+
+
+    def test_group_model(self):
+        model = groupby.GroupByModel(self.make_model(), 0, [2])
+        self.assertEqual(("sym", "count", "qty sum", "qty mean", "qty min", 
+                          "qty max"), model.names)
+        rows = model.get_group_model(2)
+        rows.ensure_rows(100)
+        self.assertEqual(10, rows.num_rows)
+        self.assertEqual(["C", 29], rows.get_row(9, [0, 2]))
+
+
+    def test_missing_keys(self):
+        import pandas as pd
+        df = pd.DataFrame(
+            {"k": ["a", None, "b", float("nan"), "a"], "v": [1, 2, 3, 4, 5]})
+        model = groupby.GroupByModel(grid.DataFrameModel(df), 1, [2])
+        model.ensure_rows(10)
+        # The index isn't aggregated by default.
+        self.assertEqual(
+            ("k", "count", "v sum", "v mean", "v min", "v max"),
+            groupby.GroupByModel(grid.DataFrameModel(df), 1).names)
+        # Missing keys are one group.
+        self.assertEqual(
+            [["a", 2, 6], [None, 2, 6], ["b", 1, 3]],
+            [ model.get_row(i, [0, 1, 2]) for i in range(model.num_rows) ])
+
+
+
+class ColumnMapTest(unittest.TestCase):
+
+    def test_hide(self):
+        cols = grid.ColumnMap(4)
+        cols.hide(1)
+        cols.hide(1)
+        self.assertEqual([0, 3], cols.cols)
+        cols.show(2)
+        self.assertEqual([0, 2, 3], cols.cols)
+        cols.hide(0)
+        cols.hide(0)
+        cols.hide(0)
+        self.assertEqual([3], cols.cols)
+        cols.show_all()
+        self.assertEqual([0, 1, 2, 3], cols.cols)
+
+
+    def test_move(self):
+        cols = grid.ColumnMap(4)
+        self.assertEqual(2, cols.move(0, +2))
+        self.assertEqual([1, 2, 0, 3], cols.cols)
+        cols.hide(1)
+        self.assertEqual(2, cols.move(0, +5))
+        self.assertEqual([0, 3, 1], cols.cols)
+        cols.show_all()
+        self.assertEqual([2, 0, 3, 1], cols.cols)
+
+
+    def test_find(self):
+        names = ("id", "price", "bid_price", "Size")
+        cols = grid.ColumnMap(4)
+        cols.hide(1)
+        self.assertEqual(1, cols.find(names, "PRICE"))
+        self.assertEqual([0, 1, 2, 3], cols.cols)
+        self.assertEqual(3, cols.find(names, "si"))
+        self.assertEqual(2, cols.find(names, "bid"))
+        self.assertEqual(2, cols.find(names, "d_p"))
+        self.assertIsNone(cols.find(names, "ask"))
+
+
+
+class GridViewTest(unittest.TestCase):
+
+    def test_first_frame(self):
+        screen = VirtualScreen(10, 40)
+        grid.show_model(make_model(), num_frozen=1, screen=screen)
+        frame = screen.frames[0]
+        self.assertEqual(1, len(screen.frames))
+        self.assertEqual(['id', 'value', 'name'], frame[0].split())
+        self.assertEqual(['0', '0.00', 'n0'], frame[1].split())
+        self.assertEqual(['7', '1.75', 'n7'], frame[8].split())
+        self.assertIn("lines 0-8/", frame[9])
+
+
+    def test_page_down(self):
+        screen = VirtualScreen(10, 40, keys=[curses.KEY_NPAGE] * 3)
+        grid.show_model(make_model(), num_frozen=1, screen=screen)
+        self.assertEqual(4, len(screen.frames))
+        self.assertEqual('n8', screen.frames[1][1].split()[-1])
+        self.assertEqual('n24', screen.frames[3][1].split()[-1])
+        self.assertIn("lines 24-32/", screen.frames[3][9])
+
+
+    def test_jump_to_end(self):
+        screen = VirtualScreen(10, 40, keys=["G"])
+        grid.show_model(make_model(), num_frozen=1, screen=screen)
+        frame = screen.frames[-1]
+        self.assertEqual('n999', frame[8].split()[-1])
+        self.assertIn("lines 992-1000/1000 100%", frame[9])
+
+
+    def test_cursor(self):
+        screen = VirtualScreen(10, 40, keys=["~", curses.KEY_DOWN])
+        grid.show_model(make_model(), num_frozen=1, screen=screen)
+        # The selected cell is drawn with the selection color pair.
+        attrs = screen.get_attrs(2)
+        self.assertEqual(screen.color_pair(6), attrs[0])
+        self.assertNotEqual(screen.color_pair(6), screen.get_attrs(1)[0])
+
+
+    def test_timing(self):
+        screen = VirtualScreen(10, 80, keys=["t", "G"])
+        timer = FrameTimer(show=False)
+        grid.show_model(make_model(), num_frozen=1, screen=screen, timer=timer)
+        self.assertEqual(3, timer.num_frames)
+        self.assertGreater(timer.rows_parsed, 0)
+        self.assertNotIn("frame", screen.frames[0][9])
+        self.assertIn("frame", screen.frames[-1][9])
+        self.assertIn("rows/s", screen.frames[-1][9])
+
+
+    def test_narrow_footer(self):
+        # The footer fits, with the timing overlay and the cursor value.
+        model = make_model()
+        model.filename = "/data/" + "x" * 60 + ".csv"
+        for width, keys in ((80, ["t", "G", "~"]), (40, ["t", "~"])):
+            screen = VirtualScreen(10, width, keys=keys)
+            grid.show_model(
+                model, num_frozen=1, screen=screen,
+                timer=FrameTimer(show=False))
+            footer = screen.frames[-1][9]
+            self.assertIn("lines", footer)
+            self.assertLessEqual(len(footer.rstrip()), width)
+
+
+    def test_cycle_datetime_format(self):
+        data = "id,time\n" + "".join(
+            "{},2024-01-02T03:04:{:02d}Z\n".format(i, i) for i in range(20))
+        model = grid.DelimitedFileModel(
+            LineReader(io.BytesIO(data.encode("utf-8"))), True, 100, None,
+            None, "test.csv")
+        screen = VirtualScreen(10, 40, keys=["~", curses.KEY_RIGHT, "D"])
+        grid.show_model(model, num_frozen=1, screen=screen)
+        self.assertEqual(
+            ["0", "2024-01-02T03:04:00Z"], screen.frames[0][1].split())
+        self.assertEqual(
+            ["0", "2024-01-02", "03:04:00"], screen.frames[-1][1].split())
+
+
+    def test_columns(self):
+        keys = ["~", curses.KEY_RIGHT, "-", "[", "J", "v", "a", "\n"]
+        screen = VirtualScreen(10, 40, keys=keys)
+        grid.show_model(make_model(), num_frozen=1, screen=screen)
+        self.assertEqual(['id', 'name'], screen.frames[3][0].split())
+        # Moving a column left of the frozen one freezes it instead.
+        self.assertEqual(['name', 'id'], screen.frames[4][0].split())
+        # Jumping to a hidden column shows it.
+        self.assertEqual(['name', 'id', 'value'], screen.frames[-1][0].split())
+
+
+    def test_group_by(self):
+        keys = ["~", curses.KEY_RIGHT, curses.KEY_RIGHT, "A", "\n"]
+        keys += [curses.KEY_DOWN, "o"]
+        data = "id,value,name\n" + "".join(
+            "{},{},n{}\n".format(i, i, i % 4) for i in range(100))
+        model = grid.DelimitedFileModel(
+            LineReader(io.BytesIO(data.encode("utf-8"))), True, 100, None,
+            None, "test.csv")
+        screen = VirtualScreen(10, 80, keys=keys)
+        grid.show_model(model, num_frozen=1, screen=screen)
+        # The prompt, then the aggregates of all numeric columns.
+        self.assertIn("aggregate", screen.frames[4][9])
+        self.assertEqual("name", screen.frames[5][0].split()[0])
+        self.assertEqual(
+            ["n1", "25", "1225", "49.0", "1", "97"], 
+            screen.frames[5][2].split()[: 6])
+        self.assertIn("test.csv by name", screen.frames[5][9])
+        # Drill down into the group at the top.
+        self.assertEqual(["1", "1", "n1"], screen.frames[7][1].split())
+        self.assertEqual(["5", "5", "n1"], screen.frames[7][2].split())
+        self.assertIn("name=n1", screen.frames[7][9])
+
+
+    def test_summary(self):
+        keys = ["~", "f", "x", curses.KEY_RIGHT, curses.KEY_RIGHT, "f"]
+        screen = VirtualScreen(12, 60, keys=keys)
+        grid.show_model(make_model(), num_frozen=1, screen=screen)
+        frame = screen.frames[2]
+        self.assertIn("id: histogram of", frame[0])
+        self.assertEqual(["[0,", "11]", "12"], frame[2].split()[: 3])
+        # The popup closes on the last key.
+        frame = screen.frames[-2]
+        self.assertIn("name: most frequent values", frame[0])
+        self.assertEqual("Press any key when done.", frame[-1].strip())
+
+
+    def test_jump_to_percent(self):
+        fd, path = tempfile.mkstemp(suffix=".csv")
+        with os.fdopen(fd, "w") as file:
+            file.write("id,value\n")
+            for i in range(10000):
+                file.write("{:05d},{:06.2f}\n".format(i, i / 100))
+        try:
+            with open(path, "rb") as file:
+                model = grid.DelimitedFileModel(
+                    LineReader(file), True, 100, None, None, "test.csv")
+                # Rows are the same size, so the estimate is exact.
+                self.assertEqual(10000, model.estimated_rows)
+                keys = ["%", "2", "5", "\n"]
+                screen = VirtualScreen(10, 60, keys=keys)
+                grid.show_model(model, num_frozen=1, screen=screen)
+                # Read from the middle, without reading up to it.
+                self.assertLess(model.num_rows, 1000)
+                frame = screen.frames[-2]
+                self.assertEqual(["2500", "25.00"], frame[1].split())
+                # The row numbers are exact once the indexer gets there.
+                six.assertRegex(
+                    self, frame[-1], r"test.csv @25% lines ~?2500-2508/~10000 25%")
+                # Closing stops the indexer, and closes the file.
+                model.close()
+                self.assertTrue(file.closed)
+                self.assertEqual([], [
+                    t for t in threading.enumerate()
+                    if t.name == "ngrid indexer" ])
+        finally:
+            os.unlink(path)
+
+
+    def test_bounded_rows(self):
+        fd, path = tempfile.mkstemp(suffix=".csv")
+        with os.fdopen(fd, "w") as file:
+            file.write("id,name\n")
+            for i in range(10000):
+                file.write("{},\"n,{}\"\n".format(i, i))
+        try:
+            with open(path, "rb") as file:
+                data = file.read()
+            # A stream spills rows; a file reads them again by offset.
+            for lines in (
+                    LineReader(io.BytesIO(data)), 
+                    LineReader(open(path, "rb"))):
+                model = grid.DelimitedFileModel(
+                    lines, True, 100, None, None, "test.csv", max_rows=2048)
+                model.ensure_rows(10000)
+                self.assertEqual(10000, model.num_rows)
+                self.assertLess(model.memory_size, 2048 * 1000)
+                self.assertEqual([3, "n,3"], model.get_row(3))
+                self.assertEqual([9999, "n,9999"], model.get_row(9999))
+                ids, = model.get_columns([0], 0, 10000)
+                np.testing.assert_array_equal(np.arange(10000), ids)
+                lines.close()
+        finally:
+            os.unlink(path)
+
+
+    def test_get_row_cols(self):
+        model = make_model()
+        self.assertEqual([0, 0.0, "n0"], model.get_row(0))
+        self.assertEqual(["n3", 3], model.get_row(3, [2, 0]))
+
+
+    def test_wide_chars(self):
+        names = [u"\u6f22\u5b57", u"caf\u00e9", u"\U0001f600!", u"abc"]
+        data = u"name,id\n" + u"".join(
+            u"{},{}\n".format(n, i) for i, n in enumerate(names) )
+        model = grid.DelimitedFileModel(
+            LineReader(io.BytesIO(data.encode("utf-8"))), True, 100, None,
+            None, "test.csv")
+        screen = VirtualScreen(10, 40)
+        grid.show_model(model, screen=screen)
+        frame = screen.frames[0]
+        # The id column starts at the same display position on each line.
+        positions = [
+            text.width(frame[i + 1][: frame[i + 1].index(str(i))])
+            for i in range(len(names)) ]
+        self.assertEqual([positions[0]] * len(names), positions)
+        self.assertEqual(
+            u"\u6f22\u5b57", frame[1][: positions[0]].split()[0])
+
+
+    def test_resize(self):
+        screen = VirtualScreen(10, 40)
+        screen.resize(20, 60)
+        grid.show_model(make_model(), num_frozen=1, screen=screen)
+        frame = screen.frames[-1]
+        self.assertEqual(20, len(frame))
+        self.assertEqual(60, len(frame[0]))
+        self.assertIn("lines 0-18/", frame[19])
+
+
+
+class DataFrameModelTest(unittest.TestCase):
+
+    def setUp(self):
+        import pandas as pd
+        index = pd.MultiIndex.from_product(
+            [["a", "b"], [1, 2, 3]], names=["grp", "n"])
+        columns = pd.MultiIndex.from_product(
+            [["price", "quantity"], ["bid", "ask"]])
+        self.df = pd.DataFrame(
+            np.arange(24.0).reshape(6, 4), index=index, columns=columns)
+
+
+    def test_model(self):
+        model = grid.DataFrameModel(self.df)
+        self.assertEqual(2, model.num_index_cols)
+        self.assertEqual(6, model.num_cols)
+        self.assertEqual(("b", 2, 16.0, 17.0, 18.0, 19.0), model.get_row(4))
+        self.assertEqual([2, 17.0], model.get_row(4, [1, 3]))
+        grps, ns = model.get_columns([0, 1], 2, 5)
+        self.assertEqual(["a", "b", "b"], list(grps))
+        self.assertEqual([3, 1, 2], list(ns))
+        codes, labels = model.get_codes(0, 2, 5)
+        self.assertEqual(["a", "b", "b"], list(labels[codes]))
+        self.assertIsNone(model.get_codes(2, 2, 5))
+        self.assertEqual(
+            [False, False, True], list(model.get_repeated(0, 2, 5)))
+        self.assertEqual(
+            [False, False, False], list(model.get_repeated(1, 2, 5)))
+        self.assertEqual((None, "grp"), model.get_header(0))
+        self.assertEqual(("quantity", "ask"), model.get_header(5))
+
+
+    def test_view(self):
+        screen = VirtualScreen(10, 40)
+        grid.show_dataframe(self.df, screen=screen)
+        frame = screen.frames[0]
+        # Group labels span their columns.
+        self.assertEqual(["price", "quantity"], frame[0].split())
+        self.assertEqual(
+            ["grp", "n", "bid", "ask", "bid", "ask"], frame[1].split())
+        # Repeated outer labels are blank.
+        self.assertEqual(
+            ["a", "1", "0.0", "1.0", "2.0", "3.0"], frame[2].split())
+        self.assertEqual(["2", "4.0", "5.0", "6.0", "7.0"], frame[3].split())
+        self.assertEqual(["b", "1"], frame[5].split()[: 2])
+
+
+    def test_time_zone(self):
+        import pandas as pd
+        times = pd.date_range("2020-01-01", periods=3, tz="US/Eastern")
+        df = pd.DataFrame({"time": times}, index=times)
+        model = grid.DataFrameModel(df)
+        fmts = model.get_default_formatters(dict(grid.DEFAULT_CFG))
+        for fmt in fmts:
+            self.assertIsInstance(fmt, formatters.DatetimeFormatter)
+        index, time = model.get_columns([0, 1], 0, 2)
+        self.assertEqual("M", index.dtype.kind)
+        self.assertEqual("M", time.dtype.kind)
+        # Shown in UTC, by default.
+        screen = VirtualScreen(10, 60)
+        grid.show_dataframe(df, screen=screen)
+        self.assertEqual(
+            ["2020-01-01T05:00:00Z"] * 2, screen.frames[0][1].split())
+
+
+
+class ArrayModelTest(unittest.TestCase):
+
+    def test_structured(self):
+        arr = np.zeros(
+            1000, dtype=[("id", np.int64), ("px", float), ("sym", "U4")])
+        arr["id"] = np.arange(1000)
+        arr["px"] = arr["id"] / 4
+        arr["sym"] = "s"
+        model = grid.ArrayModel(arr)
+        self.assertEqual(("id", "px", "sym"), model.names)
+        self.assertEqual([7, 1.75, "s"], model.get_row(7))
+        self.assertEqual(["s", 7], model.get_row(7, [2, 0]))
+        # Columns are views of the array.
+        px, = model.get_columns([1], 10, 20)
+        self.assertTrue(np.shares_memory(px, arr))
+        self.assertEqual(2.5, px[0])
+        fmts = model.get_default_formatters(grid.DEFAULT_CFG)
+        self.assertEqual("999", fmts[0](999).strip())
+
+        screen = VirtualScreen(5, 40, keys=["G"])
+        grid.show_array(arr, screen=screen)
+        self.assertEqual(["999", "249.75", "s"], screen.frames[-1][-2].split())
+
+
+    def test_other_kinds(self):
+        arr = np.zeros(3, dtype=[
+            ("code", "S4"), ("z", complex), ("dt", "m8[s]"), ("n", int)])
+        arr["code"] = [b"ab", b"caf\xe9", b""]
+        arr["z"] = [1 + 2j, 0, -1j]
+        arr["dt"] = [5, 60, 3600]
+        arr["n"] = [1, 2, 3]
+        model = grid.ArrayModel(arr)
+        self.assertEqual(u"ab", model.get_row(0)[0])
+        codes, = model.get_columns([0], 1, 3)
+        self.assertEqual([u"caf\u00e9", u""], list(codes))
+        fmts = model.get_default_formatters(grid.DEFAULT_CFG)
+        self.assertEqual(u"ab  ", fmts[0](u"ab"))
+
+        screen = VirtualScreen(5, 60)
+        grid.show_array(arr, screen=screen)
+        line = screen.frames[0][1].split()
+        self.assertEqual("ab", line[0])
+        self.assertNotIn("b'ab'", screen.frames[0][1])
+        self.assertEqual("1", line[-1])
+
+
+    def test_memmap(self):
+        with tempfile.NamedTemporaryFile() as file:
+            arr = np.memmap(file.name, dtype=np.float32, shape=(1000, 3))
+            arr[:] = np.arange(3000).reshape(1000, 3)
+            arr.flush()
+            model = grid.ArrayModel(
+                np.memmap(file.name, dtype=np.float32, mode="r", 
+                          shape=(1000, 3)))
+            self.assertEqual(("0", "1", "2"), model.names)
+            self.assertEqual(file.name, model.filename)
+            self.assertEqual(0, model.memory_size)
+            self.assertEqual([2998.0, 2999.0], model.get_row(999, [1, 2]))
+            col, = model.get_columns([2], 0, 2)
+            self.assertEqual([2.0, 5.0], list(col))
+
+        with self.assertRaises(ValueError):
+            grid.ArrayModel(np.zeros((2, 2, 2)))
+
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+
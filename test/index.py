@@ -0,0 +1,107 @@
+import io
+import os
+import tempfile
+import unittest
+
+from   ngrid import index
+
+#-------------------------------------------------------------------------------
+
+def make_data(num_rows=2000):
+    """
+    Returns CSV data with quoted fields that span lines, and comments.
+    """
+    lines = ["id,text\n"]
+    for i in range(num_rows):
+        if i % 100 == 50:
+            lines.append("# comment {}\n".format(i))
+        if i % 7 == 0:
+            lines.append('{},"two\nlines, {}"\n'.format(i, i))
+        else:
+            lines.append("{},row {}\n".format(i, i))
+    return "".join(lines).encode("ascii")
+
+
+class IndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.data = make_data()
+        fd, self.path = tempfile.mkstemp(suffix=".csv")
+        with os.fdopen(fd, "wb") as file:
+            file.write(self.data)
+        self.start = self.data.index(b"\n") + 1
+
+
+    def tearDown(self):
+        os.unlink(self.path)
+
+
+    def row_offset(self, row):
+        return self.data.index("\n{},".format(row).encode("ascii")) + 1
+
+
+    def test_find_record_start(self):
+        file = io.BytesIO(self.data)
+        # Inside a quoted field spanning lines.
+        offset = self.data.index(b"lines, 700")
+        start = index.find_record_start(file, offset, ",", 2, "#")
+        self.assertEqual(self.row_offset(701), start)
+        # At a record start.
+        offset = self.row_offset(1000)
+        start = index.find_record_start(file, offset, ",", 2, "#")
+        self.assertEqual(offset, start)
+
+
+    def test_indexer(self):
+        indexer = index.RowIndexer(self.path, self.start, "#")
+        indexer.run()
+        self.assertTrue(indexer.done)
+        self.assertEqual(2000, indexer.num_rows)
+        for row in (0, 1, 7, 51, 700, 1999):
+            offset = self.row_offset(row) if row > 0 else self.start
+            self.assertEqual(row, indexer.rows_before(offset))
+            self.assertEqual(offset, indexer.find_row(row))
+            self.assertEqual(offset, indexer.find_record_start(offset - 3))
+        self.assertIsNone(indexer.find_row(2000))
+
+
+    def test_indexer_chunks(self):
+        chunk, index.INDEX_CHUNK = index.INDEX_CHUNK, 1000
+        try:
+            indexer = index.RowIndexer(self.path, self.start, "#")
+            indexer.run()
+        finally:
+            index.INDEX_CHUNK = chunk
+        self.assertEqual(2000, indexer.num_rows)
+        for row in (1, 7, 51, 700, 1999):
+            self.assertEqual(self.row_offset(row), indexer.find_row(row))
+
+
+    def test_close(self):
+        chunk, index.INDEX_CHUNK = index.INDEX_CHUNK, 10
+        try:
+            indexer = index.RowIndexer(self.path, self.start, "#")
+            indexer.start()
+            indexer.close()
+        finally:
+            index.INDEX_CHUNK = chunk
+        self.assertFalse(indexer.is_alive())
+
+
+    def test_density(self):
+        with open(self.path, "rb") as file:
+            density = index.RowDensity(
+                file, self.start, len(self.data), sample_bytes=1000)
+        # Lines, rather than records, but close.
+        rows = density.rows_between(self.start, len(self.data))
+        self.assertLess(abs(rows - 2306), 100)
+        offset = density.find_offset(self.start, 1000)
+        self.assertAlmostEqual(
+            1000, density.rows_between(self.start, offset), delta=1)
+
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+
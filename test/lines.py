@@ -0,0 +1,75 @@
+import codecs
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from   ngrid.lines import LineReader, detect_encoding, read_sample
+
+#-------------------------------------------------------------------------------
+
+class DetectEncodingTest(unittest.TestCase):
+
+    def test_utf8(self):
+        self.assertEqual("utf-8", detect_encoding(b"id,name\n1,abc\n"))
+        self.assertEqual(
+            "utf-8", detect_encoding(u"id,name\n1,café\n".encode("utf-8")))
+        # A sample may end in the middle of a character.
+        self.assertEqual(
+            "utf-8", detect_encoding(u"1,漢".encode("utf-8")[: -1]))
+
+
+    def test_bom(self):
+        sample = codecs.BOM_UTF8 + b"id,name\n"
+        self.assertEqual("utf-8-sig", detect_encoding(sample))
+        lines = list(LineReader(io.BytesIO(sample), detect_encoding(sample)))
+        self.assertEqual([u"id,name\n"], lines)
+
+
+    def test_fallback(self):
+        sample = u"id,name\n1,café\n".encode("latin-1")
+        self.assertEqual("latin-1", detect_encoding(sample))
+        self.assertEqual("latin-1", detect_encoding(sample, default="utf-8"))
+        self.assertEqual("cp1252", detect_encoding(sample, default="cp1252"))
+        # The default doesn't decode the sample.
+        self.assertEqual(
+            "latin-1", detect_encoding(b"\xff\xfe", default="ascii"))
+
+
+    def test_read_sample(self):
+        file = io.BytesIO(b"id,name\n1,abc\n")
+        file.seek(2)
+        self.assertEqual(b",name", read_sample(file, 5))
+        self.assertEqual(2, file.tell())
+        # A buffered file is read, then rewound.
+        file = io.BufferedReader(io.BytesIO(b"id,name\n1,abc\n"))
+        self.assertEqual(b"id,na", read_sample(file, 5))
+        self.assertEqual(b"id,name\n", file.readline())
+
+
+    def test_past_buffer(self):
+        # Non-ASCII bytes past the first buffer of a file are detected.
+        data = b"id,name\n" + b"1,abc\n" * 1400 + u"9999,caf\u00e9\n".encode(
+            "latin-1")
+        self.assertGreater(len(data), 8192)
+        dir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(dir, "test.csv")
+            with open(path, "wb") as file:
+                file.write(data)
+            with open(path, "rb") as file:
+                encoding = detect_encoding(read_sample(file))
+                self.assertEqual("latin-1", encoding)
+                lines = list(LineReader(file, encoding))
+            self.assertEqual(u"9999,caf\u00e9\n", lines[-1])
+            self.assertEqual(1402, len(lines))
+        finally:
+            shutil.rmtree(dir)
+
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+
@@ -0,0 +1,156 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+import six
+
+from   ngrid import grid
+from   ngrid.lines import LineReader
+from   ngrid.multi import ConcatModel, FileSet
+from   ngrid.screen import VirtualScreen
+
+#-------------------------------------------------------------------------------
+
+class ConcatModelTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.paths = []
+        for i in range(5):
+            path = os.path.join(self.dir, "part{}.csv".format(i))
+            with open(path, "w") as file:
+                file.write("id,value\n")
+                # The third file is empty.
+                for j in range(0 if i == 2 else 100):
+                    file.write("{:03d},{:.1f}\n".format(i * 100 + j, j / 2))
+            self.paths.append(path)
+        self.opened = []
+        self.handles = []
+
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+
+    def open_model(self, path, types=None):
+        self.opened.append(os.path.basename(path))
+        self.handles.append(open(path, "rb"))
+        return grid.DelimitedFileModel(
+            LineReader(self.handles[-1]), True, 100, None, None, path,
+            types=types)
+
+
+    def test_concat(self):
+        model = ConcatModel(FileSet(self.paths, self.open_model))
+        self.assertEqual(["part0.csv"], self.opened)
+        self.assertEqual(("id", "value"), model.names)
+        # Row counts are estimated from file sizes.
+        self.assertAlmostEqual(400, model.estimated_rows, delta=10)
+
+        model.ensure_rows(150)
+        self.assertEqual(["part0.csv", "part1.csv"], self.opened)
+        self.assertEqual([150, 25.0], model.get_row(150))
+        ids, = model.get_columns([0], 90, 110)
+        np.testing.assert_array_equal(np.arange(90, 110), ids)
+
+        self.assertEqual(400, model.ensure_rows(sys.maxsize))
+        self.assertTrue(model.done)
+        self.assertEqual(400, model.estimated_rows)
+        self.assertEqual([499, 49.5], model.get_row(399))
+
+
+    def test_reopen(self):
+        files = FileSet(self.paths, self.open_model)
+        model = ConcatModel(files, max_open=1)
+        self.assertEqual(400, model.ensure_rows(sys.maxsize))
+        # Files read completely are closed, except the first and last, and
+        # the one most recently used.  The third file is empty.
+        self.assertEqual(
+            [False, True, False, False],
+            [ self.handles[i].closed for i in (0, 1, 3, 4) ])
+
+        # A closed file is opened again when its rows are needed.
+        self.assertEqual([150, 25.0], model.get_row(150))
+        self.assertEqual(
+            ["part0.csv", "part1.csv", "part2.csv", "part3.csv", "part4.csv",
+             "part1.csv"],
+            self.opened)
+        self.assertTrue(self.handles[3].closed)
+        ids, = model.get_columns([0], 190, 410)
+        np.testing.assert_array_equal(
+            np.concatenate([np.arange(190, 200), np.arange(300, 400),
+                            np.arange(400, 500)]),
+            ids)
+        self.assertEqual("part3.csv", self.opened[-1])
+        # Row counts are kept.
+        self.assertEqual([100, 100, 0, 100, 100], files.counts)
+        self.assertEqual(400, model.estimated_rows)
+
+        model.close()
+        self.assertTrue(all( self.handles[i].closed for i in (0, 4, 5, 6) ))
+
+
+    def test_end(self):
+        files = FileSet(self.paths, self.open_model)
+        model = ConcatModel(files)
+        # Only the last file is opened.
+        end = model.get_end_model()
+        self.assertEqual(["part0.csv", "part4.csv"], self.opened)
+        self.assertAlmostEqual(300, end.base_row, delta=10)
+        self.assertTrue(end.approximate)
+        self.assertIsNone(end.get_end_model())
+
+        # Row numbers are exact once the files before have been read.
+        model.ensure_rows(sys.maxsize)
+        self.assertEqual(300, end.base_row)
+        self.assertFalse(end.approximate)
+
+
+    def test_jump_to_end(self):
+        model = ConcatModel(FileSet(self.paths, self.open_model))
+        screen = VirtualScreen(10, 80, keys=["G"])
+        grid.show_model(model, num_frozen=1, screen=screen)
+        self.assertEqual(["part0.csv", "part4.csv"], self.opened)
+        frame = screen.frames[-2]
+        self.assertEqual(["499", "49.5"], frame[-2].split())
+        # Row numbers are estimated.
+        six.assertRegex(self, frame[-1], r"@end lines ~\d+-\d+/~\d+ 100%")
+
+
+    def test_jump_to_row(self):
+        model = ConcatModel(FileSet(self.paths, self.open_model))
+        sub_model = model.get_model_at_row(250)
+        self.assertEqual(["part0.csv", "part3.csv"], self.opened)
+        self.assertTrue(sub_model.approximate)
+        self.assertAlmostEqual(350, sub_model.get_row(0)[0], delta=10)
+
+
+    @unittest.skipUnless(os.path.isdir("/proc/self/fd"), "no /proc")
+    def test_close_jumps(self):
+        model = ConcatModel(FileSet(self.paths, self.open_model))
+        num_fds = len(os.listdir("/proc/self/fd"))
+        for _ in range(5):
+            sub_model = model.get_model_at_row(250)
+            self.assertAlmostEqual(350, sub_model.get_row(0)[0], delta=10)
+            sub_model.close()
+        # Closing each model from the middle of a file closes the files it
+        # opened, including the file's own model.
+        self.assertEqual(num_fds, len(os.listdir("/proc/self/fd")))
+
+
+    def test_schema(self):
+        with open(self.paths[1], "w") as file:
+            file.write("id,price\n1,2\n")
+        model = ConcatModel(FileSet(self.paths, self.open_model))
+        with self.assertRaises(IOError):
+            model.ensure_rows(sys.maxsize)
+
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+
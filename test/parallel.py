@@ -0,0 +1,125 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from   ngrid import parallel
+from   ngrid.parallel import parse_file, splits_as_bytes
+
+#-------------------------------------------------------------------------------
+
+class ParseFileTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "test.csv")
+
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+
+    def parse(self, text, types, encoding="utf-8", **kw_args):
+        with open(self.path, "wb") as file:
+            file.write(text.encode(encoding))
+        start = text.encode(encoding).index(b"\n") + 1
+        types, table, offsets = parse_file(
+            self.path, start, ",", types, encoding=encoding, num_workers=1,
+            **kw_args)
+        rows = [ table.get_row(i) for i in range(table.num_rows) ]
+        return types, rows, offsets.tolist()
+
+
+    def test_splits_as_bytes(self):
+        for encoding in ("utf-8", "utf-8-sig", "latin-1", "cp1252", "ascii"):
+            self.assertTrue(splits_as_bytes(encoding))
+        for encoding in ("utf-16", "shift_jis", "gbk"):
+            self.assertFalse(splits_as_bytes(encoding))
+
+
+    def test_bytes(self):
+        text = (
+            u"id,value,flag,name\n"
+            u"1, 0.5,TRUE,café\n"
+            u"# comment\n"
+            u"\n"
+            u"2,,false,漢字\n"
+            u"3,1e3,True,café\n")
+        types, rows, offsets = self.parse(
+            text, (int, float, bool, str), comment_prefix="#")
+        self.assertEqual((int, float, bool, str), types)
+        self.assertEqual([1, 0.5, True, u"café"], rows[0])
+        self.assertEqual(2, rows[1][0])
+        self.assertNotEqual(rows[1][1], rows[1][1])
+        self.assertEqual([False, u"漢字"], rows[1][2 :])
+        self.assertEqual([3, 1000.0, True, u"café"], rows[2])
+        lines = text.encode("utf-8").splitlines(True)
+        self.assertEqual(
+            [ sum( len(l) for l in lines[: i] ) for i in (1, 4, 5) ], offsets)
+
+
+    def test_same_as_csv(self):
+        # Splitting bytes gives the same rows as the CSV reader, which a quote
+        # anywhere in the range selects.
+        types = (int, str, int)
+        plain = u"id,name,n\n1,caf\u00e9,2\n\n2, na\u00efve ,3\n"
+        # Unicode whitespace at the ends of lines.
+        spaces = plain + u"\u00a03,x,4\u00a0\n4,y,\x1c5\n"
+        for text in (plain, spaces):
+            for encoding in ("utf-8", "latin-1"):
+                data = text.encode(encoding)
+                split = parallel._split_bytes(
+                    data[data.index(b"\n") + 1 :], 0, b",", None, encoding)
+                self.assertEqual(text is plain, split is not None)
+                _, rows, offsets = self.parse(text, types, encoding)
+                _, csv_rows, csv_offsets = self.parse(
+                    text + u'5,"q",6\n', types, encoding)
+                self.assertEqual(csv_rows[: -1], rows)
+                self.assertEqual(csv_offsets[: -1], offsets)
+        self.assertEqual(
+            [u"caf\u00e9", u"na\u00efve", u"x", u"y"], [ r[1] for r in rows ])
+        self.assertEqual([3, 4], [ r[0] for r in rows[2 :] ])
+
+
+    def test_mismatch(self):
+        # Values that don't match the guessed type are read as strings.
+        types, rows, _ = self.parse(u"id,n\n1,2\nx,3\n", (int, int))
+        self.assertEqual((str, int), types)
+        self.assertEqual([[u"1", 2], [u"x", 3]], rows)
+
+
+    def test_short_rows(self):
+        # Fields missing from short rows are empty, on both paths.
+        for name in (u"b", u'"b"'):
+            text = u"id,name,v\n1,a,0.5\n2,{}\n3,c,1.5,x\n".format(name)
+            types, rows, _ = self.parse(text, (int, str, float))
+            self.assertEqual((int, str, float), types)
+            self.assertEqual([1, u"a", 0.5], rows[0])
+            self.assertEqual([2, u"b"], rows[1][: 2])
+            self.assertNotEqual(rows[1][2], rows[1][2])
+            self.assertEqual([3, u"c", 1.5], rows[2])
+
+
+    def test_quoted(self):
+        # With quotes, the CSV reader parses the range.
+        text = u"id,name\n1,\"a,b\"\n2,\"café\"\n"
+        self.assertEqual(
+            [[1, u"a,b"], [2, u"café"]], self.parse(text, (int, str))[1])
+
+
+    def test_encodings(self):
+        text = u"id,name\n1,café\n2,naïve\n"
+        expected = [[1, u"café"], [2, u"naïve"]]
+        self.assertEqual(expected, self.parse(text, (int, str), "latin-1")[1])
+        # Not split as bytes.
+        text = u"id,name\n1,漢字\n2,表示\n"
+        self.assertEqual(
+            [[1, u"漢字"], [2, u"表示"]],
+            self.parse(text, (int, str), "shift_jis")[1])
+
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+
@@ -0,0 +1,77 @@
+import unittest
+
+from   ngrid.rows import BLOCK_ROWS, Interner, RowStore
+
+#-------------------------------------------------------------------------------
+
+def make_rows(start, stop):
+    return [ (str(i), "v{}".format(i)) for i in range(start, stop) ]
+
+
+class RowStoreTest(unittest.TestCase):
+
+    def test_spill(self):
+        num_rows = BLOCK_ROWS * 10 + 7
+        rows = RowStore(max_rows=BLOCK_ROWS * 3)
+        self.assertEqual(num_rows, rows.extend(iter(make_rows(0, num_rows))))
+        self.assertEqual(num_rows, len(rows))
+        self.assertLessEqual(rows.num_cached, BLOCK_ROWS * 3)
+        self.assertGreater(rows.spilled_size, 0)
+        # Spilled blocks are paged back in.
+        self.assertEqual(("5", "v5"), rows[5])
+        self.assertEqual(make_rows(1000, 3100), rows.get_range(1000, 3100))
+        self.assertEqual(
+            make_rows(num_rows - 10, num_rows), rows.get_range(num_rows - 10,
+                                                               num_rows + 10))
+        self.assertEqual(("0", "v0"), rows[-num_rows])
+        self.assertLessEqual(rows.num_cached, BLOCK_ROWS * 3)
+        with self.assertRaises(IndexError):
+            rows[num_rows]
+        rows.close()
+
+
+    def test_read(self):
+        source = make_rows(0, BLOCK_ROWS * 5 + 3)
+        reads = []
+
+        def read(start, num):
+            reads.append(start)
+            return source[start : start + num]
+
+        rows = RowStore(max_rows=1, read=read, num_rows=len(source))
+        self.assertEqual(source[-1], rows[len(source) - 1])
+        self.assertEqual(source[10 : 20], rows.get_range(10, 20))
+        self.assertEqual(source[15], rows[15])
+        self.assertEqual([BLOCK_ROWS * 5, 0], reads)
+        # Evicted blocks are read again, rather than spilled.
+        self.assertEqual(source[: 3], rows.get_range(0, 3))
+        self.assertEqual(
+            source[BLOCK_ROWS - 1 : BLOCK_ROWS * 3 + 1],
+            rows.get_range(BLOCK_ROWS - 1, BLOCK_ROWS * 3 + 1))
+        self.assertEqual(0, rows.spilled_size)
+        self.assertLessEqual(rows.num_cached, BLOCK_ROWS * 2)
+
+
+
+class InternerTest(unittest.TestCase):
+
+    def test_intern(self):
+        intern = Interner([1, 2], max_values=10)
+        rows = [
+            intern([str(i), "v" + str(i % 3), "w" + str(i)])
+            for i in range(20) ]
+        self.assertEqual(("4", "v1", "w4"), rows[4])
+        # Equal values share an object.
+        self.assertIs(rows[1][1], rows[4][1])
+        # The third column has too many distinct values.
+        self.assertEqual([1], intern.cols)
+        # Short rows.
+        self.assertEqual(("5", "v2"), intern(["5", "v" + "2"]))
+        self.assertIs(rows[2][1], intern(["5", "v" + "2"])[1])
+
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+
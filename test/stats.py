@@ -0,0 +1,78 @@
+import unittest
+
+import numpy as np
+
+from   ngrid.stats import Histogram, TopValues
+
+#-------------------------------------------------------------------------------
+
+class TopValuesTest(unittest.TestCase):
+
+    def test_exact(self):
+        top = TopValues()
+        top.update(np.array(["a", "b", "a", None, "c", "a"], dtype=object))
+        top.update(np.array(["b", "b"]))
+        self.assertEqual([("a", 3), ("b", 3)], sorted(top.top(2)))
+        self.assertEqual(7, top.count)
+        self.assertEqual(1, top.missing)
+        self.assertEqual(0, top.error)
+
+
+    def test_bounded(self):
+        values = np.array([ "v{}".format(i) for i in range(1000) ] + ["x"] * 100)
+        top = TopValues(capacity=10)
+        for i in range(0, len(values), 128):
+            top.update(values[i : i + 128])
+        value, count = top.top(1)[0]
+        self.assertEqual("x", value)
+        self.assertLessEqual(count, 100)
+        self.assertLessEqual(100, count + top.error)
+        self.assertLessEqual(top.error, len(values) // 11)
+
+
+
+class HistogramTest(unittest.TestCase):
+
+    def test_ints(self):
+        hist = Histogram(num_bins=8)
+        hist.update(np.arange(10))
+        self.assertEqual(
+            [(0, 1, 2), (2, 3, 2), (4, 5, 2), (6, 7, 2), (8, 9, 2)],
+            hist.bins())
+        # Bins widen to include new values.
+        hist.update(np.array([-30, 25]))
+        self.assertEqual(
+            [(-30, -17, 1), (-16, -1, 0), (0, 15, 10), (16, 25, 1)],
+            hist.bins())
+        self.assertEqual([(-30, -1, 1), (0, 25, 11)], hist.bins(2))
+
+
+    def test_floats(self):
+        hist = Histogram()
+        values = np.random.RandomState(0).normal(size=10000)
+        values[: 10] = np.nan
+        for i in range(0, len(values), 1000):
+            hist.update(values[i : i + 1000])
+        self.assertEqual(10, hist.missing)
+        bins = hist.bins(10)
+        self.assertLessEqual(len(bins), 10)
+        self.assertEqual(9990, sum( c for _, _, c in bins ))
+        self.assertEqual(np.nanmin(values), bins[0][0])
+        self.assertEqual(np.nanmax(values), bins[-1][1])
+
+
+    def test_datetimes(self):
+        hist = Histogram(num_bins=4)
+        hist.update(np.array(
+            ["2024-01-01", "NaT", "2024-01-03"], dtype="datetime64[ns]"))
+        bins = hist.bins()
+        self.assertEqual(np.datetime64("2024-01-01", "ns"), bins[0][0])
+        self.assertEqual(np.datetime64("2024-01-03", "ns"), bins[-1][1])
+        self.assertEqual(1, hist.missing)
+
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+